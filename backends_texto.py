@@ -0,0 +1,119 @@
+"""Backends de leitura de uma página do PDF (Config.BACKEND_TEXTO).
+
+Cada backend recebe o PDF e a página abertos pelo pdfplumber e devolve
+(texto, imagens), em que imagens traz os campos de pagina.images usados na
+seleção das fotos (largura e altura desenhadas e o stream).
+
+- 'pdfplumber' (referência): page.extract_text() e page.images. O pdfplumber
+  cria um LTChar e depois um dicionário com todos os atributos resolvidos
+  para cada caractere, o que domina o tempo da extração.
+- 'pdfminer': interpreta o content stream com um dispositivo do pdfminer que
+  guarda só a geometria de cada caractere usada pelo agrupamento em palavras
+  e linhas do pdfplumber (chars_to_textmap, o mesmo de extract_text) e as
+  imagens da página, numa única interpretação. O texto é o mesmo, sem os
+  objetos intermediários.
+"""
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LTContainer, LTImage
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.pdffont import PDFUnicodeNotDefined
+from pdfminer.utils import apply_matrix_pt
+from pdfplumber.utils import chars_to_textmap
+from config import Config
+
+
+def _imagens_layout(objetos):
+    for obj in objetos:
+        if isinstance(obj, LTImage):
+            yield obj
+        elif isinstance(obj, LTContainer):
+            yield from _imagens_layout(obj)
+
+
+def _imagens(layout):
+    return [{'width': img.width, 'height': img.height, 'stream': img.stream}
+            for img in _imagens_layout(layout)]
+
+
+class _AgregadorSoImagens(PDFPageAggregator):
+    """Interpreta a página sem montar os caracteres: o layout só recebe imagens,
+    figuras e desenhos vetoriais"""
+
+    def render_string(self, textstate, seq, ncs, graphicstate):
+        pass
+
+
+class _AgregadorCaracteres(PDFPageAggregator):
+    """Em vez de um LTChar por caractere, guarda os campos que chars_to_textmap lê,
+    calculados como em LTChar e em pdfplumber.Page.process_object"""
+
+    def __init__(self, rsrcmgr, pagina):
+        super().__init__(rsrcmgr, pageno=pagina.page_number)
+        self.altura = pagina.height
+        self.doctop_inicial = pagina.initial_doctop
+        self.caracteres = []
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+        try:
+            texto = font.to_unichr(cid)
+        except PDFUnicodeNotDefined:
+            texto = self.handle_undefined_char(font, cid)
+        avanco = font.char_width(cid) * fontsize * scaling
+        if font.is_vertical():
+            vx, vy = font.char_disp(cid)
+            vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+            vy = (1000 - vy) * fontsize * 0.001
+            inferior_esquerdo = (-vx, vy + rise + avanco)
+            superior_direito = (-vx + fontsize, vy + rise)
+        else:
+            descida = font.get_descent() * fontsize
+            inferior_esquerdo = (0, descida + rise)
+            superior_direito = (avanco, descida + rise + fontsize)
+        a, b, c, d, _, _ = matrix
+        x0, y0 = apply_matrix_pt(matrix, inferior_esquerdo)
+        x1, y1 = apply_matrix_pt(matrix, superior_direito)
+        if x1 < x0:
+            x0, x1 = x1, x0
+        if y1 < y0:
+            y0, y1 = y1, y0
+        topo = self.altura - y1
+        self.caracteres.append({
+            'text': texto, 'x0': x0, 'x1': x1, 'top': topo, 'bottom': self.altura - y0,
+            'doctop': self.doctop_inicial + topo, 'upright': 0 < a * d * scaling and b * c <= 0,
+        })
+        return avanco
+
+
+def ler_pagina_pdfplumber(pdf, pagina):
+    return pagina.extract_text() or "", pagina.images
+
+
+def ler_pagina_pdfminer(pdf, pagina):
+    dispositivo = _AgregadorCaracteres(pdf.rsrcmgr, pagina)
+    PDFPageInterpreter(pdf.rsrcmgr, dispositivo).process_page(pagina.page_obj)
+    # Mesmos parâmetros de pdfplumber.Page._get_textmap
+    texto = chars_to_textmap(dispositivo.caracteres, x_shift=pagina.bbox[0], y_shift=pagina.bbox[1],
+                             layout_width=pagina.width, layout_height=pagina.height).as_string
+    return texto, _imagens(dispositivo.get_result())
+
+
+def imagens_sem_texto(pdf, pagina):
+    """Só as imagens da página (para as páginas de fotos, em qualquer backend)"""
+    dispositivo = _AgregadorSoImagens(pdf.rsrcmgr, pageno=pagina.page_number)
+    PDFPageInterpreter(pdf.rsrcmgr, dispositivo).process_page(pagina.page_obj)
+    return _imagens(dispositivo.get_result())
+
+
+BACKENDS_TEXTO = {
+    'pdfplumber': ler_pagina_pdfplumber,
+    'pdfminer': ler_pagina_pdfminer,
+}
+
+
+def obter_backend(nome=None):
+    """Função de leitura de página do backend pedido (padrão: Config.BACKEND_TEXTO)"""
+    nome = nome or Config.BACKEND_TEXTO
+    try:
+        return BACKENDS_TEXTO[nome]
+    except KeyError:
+        raise ValueError(f"Backend de texto desconhecido: {nome} (opções: {', '.join(BACKENDS_TEXTO)})")
@@ -0,0 +1,353 @@
+"""Banco persistente dos registros extraídos (SQLite em Config.BANCO_ARQUIVO).
+
+Cada registro pontuado de um lote é gravado com chave no RF (reenviar o mesmo
+relatório atualiza a linha em vez de duplicá-la); registros de erro e sem RF
+não são guardados. Data é guardada também em Data_ISO (AAAA-MM-DD) para que
+filtros e agrupamentos por período usem o índice, e Data_ART em Data_ART_ISO
+para que a ordenação por ela siga a ordem cronológica. Há índices em
+Fiscal_Nome_Completo (com Data_ISO), Data_ISO, RF_Principal e Regularizacao,
+então pontuacao_agregada() responde por agente e período sem abrir nenhum PDF.
+
+lotes_registros guarda quais RFs vieram em cada lote (um RF reenviado continua
+pertencendo aos lotes anteriores), e pagina_lote() devolve os registros de um
+lote página a página, ordenados e filtrados no SQLite.
+
+Os lotes são persistentes: lotes guarda quando cada um foi criado e atualizado
+e lotes_arquivos o SHA-256 de cada PDF já recebido e o RF que ele gerou, para
+que novos envios ao mesmo lote só extraiam os arquivos que ainda não estão nele
+(ver PipelineLote) e as saídas sejam refeitas a partir de registros_lote().
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from config import Config
+
+# Colunas de cada registro (mesmos nomes das chaves dos dicionários) e tipos
+COLUNAS = (
+    ('RF', 'TEXT PRIMARY KEY'),
+    ('Situação', 'TEXT'),
+    ('Fiscal', 'TEXT'),
+    ('Data', 'TEXT'),
+    ('Data_ISO', 'TEXT'),
+    ('Fato_Gerador', 'TEXT'),
+    ('Protocolo', 'TEXT'),
+    ('Nome_Arquivo', 'TEXT'),
+    ('RF_Principal', 'TEXT'),
+    ('Fiscal_Nome_Completo', 'TEXT'),
+    ('Acoes', 'INTEGER'),
+    ('Oficio', 'INTEGER'),
+    ('Resposta_Oficio', 'INTEGER'),
+    ('Regularizacao', 'TEXT'),
+    ('Fotos_Extraidas', 'INTEGER'),
+    ('Status_Fotos', 'TEXT'),
+    ('Fotos', 'TEXT'),
+    ('Data_ART', 'TEXT'),
+    ('Data_ART_ISO', 'TEXT'),
+    ('Data_Relatorio_Anterior', 'TEXT'),
+    ('Informacoes_Complementares', 'TEXT'),
+    ('Pontuacao', 'REAL'),
+    ('Lote', 'TEXT'),
+    ('Gravado_Em', 'REAL'),
+)
+NOMES_COLUNAS = tuple(nome for nome, _ in COLUNAS)
+
+INDICES = {
+    'idx_registros_fiscal_data': ('Fiscal_Nome_Completo', 'Data_ISO'),
+    'idx_registros_data': ('Data_ISO',),
+    'idx_registros_rf_principal': ('RF_Principal',),
+    'idx_registros_regularizacao': ('Regularizacao',),
+}
+
+# Colunas aceitas na ordenação de pagina_lote (Data e Data_ART ordenam pela forma AAAA-MM-DD)
+ORDENACOES = {
+    'RF': '"RF"', 'Nome_Arquivo': '"Nome_Arquivo"', 'Fiscal_Nome_Completo': '"Fiscal_Nome_Completo"',
+    'Data': '"Data_ISO"', 'Data_ART': '"Data_ART_ISO"', 'Regularizacao': '"Regularizacao"',
+    'Acoes': '"Acoes"', 'Oficio': '"Oficio"', 'Resposta_Oficio': '"Resposta_Oficio"',
+    'Status_Fotos': '"Status_Fotos"', 'Pontuacao': '"Pontuacao"',
+}
+MAXIMO_POR_PAGINA = 500
+
+# Agrupamentos aceitos por pontuacao_agregada (expressão SQL do período)
+PERIODOS = {
+    'dia': 'Data_ISO',
+    'mes': 'substr(Data_ISO, 1, 7)',
+    'ano': 'substr(Data_ISO, 1, 4)',
+}
+
+
+def _coluna(nome):
+    return '"' + nome + '"'
+
+
+def data_iso(data):
+    """'DD/MM/AAAA' -> 'AAAA-MM-DD' (None se a data não estiver nesse formato)"""
+    try:
+        return datetime.strptime(data, '%d/%m/%Y').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+
+def data_consulta(data):
+    """Data de um filtro em 'AAAA-MM-DD' ou 'DD/MM/AAAA', normalizada para 'AAAA-MM-DD'"""
+    if data is None:
+        return None
+    try:
+        return datetime.strptime(data, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        convertida = data_iso(data)
+        if convertida is None:
+            raise ValueError(f"Data inválida: {data} (use AAAA-MM-DD ou DD/MM/AAAA)")
+        return convertida
+
+
+class BancoResultados:
+    """Registros extraídos indexados por RF, agente, período e regularização"""
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or Config.BANCO_ARQUIVO
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        colunas = ', '.join(f'{_coluna(nome)} {tipo}' for nome, tipo in COLUNAS)
+        self._conexao.execute(f'CREATE TABLE IF NOT EXISTS registros ({colunas})')
+        self._migrar_data_art()
+        for indice, campos in INDICES.items():
+            self._conexao.execute(
+                f'CREATE INDEX IF NOT EXISTS {indice} ON registros({", ".join(map(_coluna, campos))})'
+            )
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS lotes_registros ('
+            '"Lote" TEXT NOT NULL, "RF" TEXT NOT NULL, PRIMARY KEY ("Lote", "RF")) WITHOUT ROWID'
+        )
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS lotes ('
+            '"Lote" TEXT PRIMARY KEY, "Criado_Em" REAL NOT NULL, "Atualizado_Em" REAL NOT NULL)'
+        )
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS lotes_arquivos ('
+            '"Lote" TEXT NOT NULL, "Sha256" TEXT NOT NULL, "RF" TEXT NOT NULL, '
+            'PRIMARY KEY ("Lote", "Sha256")) WITHOUT ROWID'
+        )
+
+        atualizacoes = ', '.join(f'{_coluna(nome)} = excluded.{_coluna(nome)}' for nome in NOMES_COLUNAS[1:])
+        self._sql_gravar = (
+            f'INSERT INTO registros ({", ".join(map(_coluna, NOMES_COLUNAS))}) '
+            f'VALUES ({", ".join("?" * len(NOMES_COLUNAS))}) '
+            f'ON CONFLICT("RF") DO UPDATE SET {atualizacoes}'
+        )
+
+    def _migrar_data_art(self):
+        """Bancos criados antes de Data_ART_ISO: cria a coluna e a preenche a partir de Data_ART"""
+        existentes = {linha['name'] for linha in self._conexao.execute('PRAGMA table_info(registros)')}
+        if 'Data_ART_ISO' in existentes:
+            return
+        self._conexao.create_function('data_iso', 1, data_iso, deterministic=True)
+        self._conexao.execute('BEGIN')
+        try:
+            self._conexao.execute('ALTER TABLE registros ADD COLUMN "Data_ART_ISO" TEXT')
+            self._conexao.execute('UPDATE registros SET "Data_ART_ISO" = data_iso("Data_ART")')
+            self._conexao.execute('COMMIT')
+        except BaseException:
+            self._conexao.execute('ROLLBACK')
+            raise
+
+    def gravar(self, registros, lote=None, hashes=None):
+        """Grava (ou atualiza pelo RF) os registros válidos em uma única transação.
+        hashes (SHA-256 do PDF de cada registro, na mesma ordem; None se desconhecido)
+        registra os arquivos no lote.
+        Retorna quantos foram gravados."""
+        agora = time.time()
+        linhas = []
+        arquivos = []
+        for dados, sha in zip(registros, hashes or itertools.repeat(None)):
+            rf = dados.get('RF')
+            if not rf or rf == 'ERRO':
+                continue
+            valores = dict(dados, Data_ISO=data_iso(dados.get('Data')),
+                           Data_ART_ISO=data_iso(dados.get('Data_ART')), Lote=lote, Gravado_Em=agora)
+            linhas.append(tuple(valores.get(nome) for nome in NOMES_COLUNAS))
+            if sha is not None:
+                arquivos.append((lote, sha, rf))
+        if not linhas:
+            return 0
+        with self._lock:
+            self._conexao.execute('BEGIN')
+            try:
+                self._conexao.executemany(self._sql_gravar, linhas)
+                if lote is not None:
+                    self._conexao.executemany(
+                        'INSERT OR IGNORE INTO lotes_registros ("Lote", "RF") VALUES (?, ?)',
+                        ((lote, linha[0]) for linha in linhas)
+                    )
+                    self._conexao.executemany(
+                        'INSERT OR REPLACE INTO lotes_arquivos ("Lote", "Sha256", "RF") VALUES (?, ?, ?)',
+                        arquivos
+                    )
+                    self._conexao.execute(
+                        'INSERT INTO lotes ("Lote", "Criado_Em", "Atualizado_Em") VALUES (?, ?, ?) '
+                        'ON CONFLICT("Lote") DO UPDATE SET "Atualizado_Em" = excluded."Atualizado_Em"',
+                        (lote, agora, agora)
+                    )
+            except BaseException:
+                self._conexao.execute('ROLLBACK')
+                raise
+            self._conexao.execute('COMMIT')
+        return len(linhas)
+
+    def obter(self, rf):
+        """Registro gravado com o RF ou None"""
+        with self._lock:
+            linha = self._conexao.execute('SELECT * FROM registros WHERE "RF" = ?', (rf,)).fetchone()
+        return dict(linha) if linha is not None else None
+
+    def lote_existe(self, lote):
+        with self._lock:
+            return self._conexao.execute('SELECT 1 FROM lotes WHERE "Lote" = ?', (lote,)).fetchone() is not None
+
+    def arquivos_lote(self, lote):
+        """SHA-256 dos PDFs já recebidos no lote -> RF extraído de cada um"""
+        with self._lock:
+            return dict(self._conexao.execute(
+                'SELECT "Sha256", "RF" FROM lotes_arquivos WHERE "Lote" = ?', (lote,)
+            ).fetchall())
+
+    def registros_lote(self, lote):
+        """Todos os registros do lote (um por RF), na ordem de RF"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                'SELECT r.* FROM lotes_registros l JOIN registros r ON r."RF" = l."RF" '
+                'WHERE l."Lote" = ? ORDER BY r."RF"', (lote,)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def listar_lotes(self, limite=100):
+        """Lotes mais recentes com a quantidade de RFs e a pontuação somada"""
+        with self._lock:
+            linhas = self._conexao.execute(
+                'SELECT t."Lote" AS lote, t."Criado_Em" AS criado_em, t."Atualizado_Em" AS atualizado_em, '
+                'COUNT(r."RF") AS registros, ROUND(COALESCE(SUM(r."Pontuacao"), 0), 2) AS pontuacao '
+                'FROM lotes t LEFT JOIN lotes_registros l ON l."Lote" = t."Lote" '
+                'LEFT JOIN registros r ON r."RF" = l."RF" '
+                'GROUP BY t."Lote" ORDER BY t."Atualizado_Em" DESC LIMIT ?', (limite,)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def pagina_lote(self, lote, pagina=1, por_pagina=50, ordenar='Pontuacao', direcao='desc',
+                    busca=None, regularizacao=None, status_fotos=None):
+        """Uma página dos registros do lote, ordenada por uma coluna de ORDENACOES e
+        filtrada por texto (RF, arquivo ou agente), regularização e status das fotos.
+        Retorna os registros, o total filtrado e a página efetiva."""
+        if ordenar not in ORDENACOES:
+            raise ValueError(f"Ordenação desconhecida: {ordenar} (opções: {', '.join(ORDENACOES)})")
+        if direcao not in ('asc', 'desc'):
+            raise ValueError(f"Direção desconhecida: {direcao} (opções: asc, desc)")
+        por_pagina = max(1, min(int(por_pagina), MAXIMO_POR_PAGINA))
+        pagina = max(1, int(pagina))
+
+        filtros = ['l."Lote" = ?']
+        parametros = [lote]
+        if busca:
+            filtros.append('(r."RF" LIKE ? OR r."Nome_Arquivo" LIKE ? OR r."Fiscal_Nome_Completo" LIKE ?)')
+            parametros.extend([f'%{busca}%'] * 3)
+        for coluna, valor in (('Regularizacao', regularizacao), ('Status_Fotos', status_fotos)):
+            if valor:
+                filtros.append(f'r.{_coluna(coluna)} = ?')
+                parametros.append(valor)
+        origem = ('FROM lotes_registros l JOIN registros r ON r."RF" = l."RF" WHERE '
+                  + ' AND '.join(filtros))
+
+        with self._lock:
+            total = self._conexao.execute(f'SELECT COUNT(*) {origem}', parametros).fetchone()[0]
+            paginas = max(1, -(-total // por_pagina))
+            pagina = min(pagina, paginas)
+            linhas = self._conexao.execute(
+                f'SELECT r.* {origem} ORDER BY r.{ORDENACOES[ordenar]} {direcao}, r."RF" '
+                f'LIMIT ? OFFSET ?', parametros + [por_pagina, (pagina - 1) * por_pagina]
+            ).fetchall()
+        return {'registros': [dict(linha) for linha in linhas], 'total': total,
+                'pagina': pagina, 'por_pagina': por_pagina, 'paginas': paginas}
+
+    def pontuacao_agregada(self, agrupar='fiscal', periodo=None, fiscal=None, inicio=None, fim=None,
+                           regularizacao=None, rf_principal=None):
+        """Totais por agente e/ou período ('dia', 'mes' ou 'ano'), com filtros opcionais
+        de agente, intervalo de datas (AAAA-MM-DD, inclusivo), regularização e RF principal"""
+        if periodo is not None and periodo not in PERIODOS:
+            raise ValueError(f"Período desconhecido: {periodo} (opções: {', '.join(PERIODOS)})")
+
+        grupos = []
+        if agrupar == 'fiscal':
+            grupos.append(('fiscal', '"Fiscal_Nome_Completo"'))
+        elif agrupar is not None:
+            raise ValueError(f"Agrupamento desconhecido: {agrupar} (opções: fiscal)")
+        if periodo is not None:
+            grupos.append(('periodo', PERIODOS[periodo]))
+
+        filtros = []
+        parametros = []
+        for coluna, valor in (('Fiscal_Nome_Completo', fiscal), ('Regularizacao', regularizacao),
+                              ('RF_Principal', rf_principal)):
+            if valor is not None:
+                filtros.append(f'{_coluna(coluna)} = ?')
+                parametros.append(valor)
+        if inicio is not None:
+            filtros.append('"Data_ISO" >= ?')
+            parametros.append(data_consulta(inicio))
+        if fim is not None:
+            filtros.append('"Data_ISO" <= ?')
+            parametros.append(data_consulta(fim))
+
+        selecao = [f'{expressao} AS {nome}' for nome, expressao in grupos] + [
+            'COUNT(*) AS relatorios',
+            'ROUND(COALESCE(SUM("Pontuacao"), 0), 2) AS pontuacao',
+            'COALESCE(SUM("Acoes"), 0) AS acoes',
+            'COALESCE(SUM("Oficio"), 0) AS oficios',
+            'COALESCE(SUM("Resposta_Oficio"), 0) AS respostas_oficio',
+            'COALESCE(SUM("Regularizacao" = \'SIM\'), 0) AS regularizacoes',
+            'COALESCE(SUM("Status_Fotos" = \'SIM\'), 0) AS com_fotos',
+        ]
+        sql = f'SELECT {", ".join(selecao)} FROM registros'
+        if filtros:
+            sql += ' WHERE ' + ' AND '.join(filtros)
+        if grupos:
+            # Pelas expressões: o apelido "fiscal" seria resolvido como a coluna "Fiscal"
+            expressoes = ', '.join(expressao for _, expressao in grupos)
+            sql += f' GROUP BY {expressoes} ORDER BY {expressoes}'
+
+        with self._lock:
+            linhas = self._conexao.execute(sql, parametros).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def estatisticas(self):
+        with self._lock:
+            registros, fiscais, primeira, ultima = self._conexao.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT "Fiscal_Nome_Completo"), MIN("Data_ISO"), MAX("Data_ISO") '
+                'FROM registros'
+            ).fetchone()
+        return {'registros': registros, 'fiscais': fiscais, 'data_inicial': primeira, 'data_final': ultima}
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+_banco_padrao = None
+_banco_lock = threading.Lock()
+
+
+def obter_banco():
+    """Banco compartilhado pelo processo (None quando Config.BANCO_ATIVO é falso)"""
+    global _banco_padrao
+    if not Config.BANCO_ATIVO:
+        return None
+    with _banco_lock:
+        if _banco_padrao is None:
+            _banco_padrao = BancoResultados()
+        return _banco_padrao
@@ -0,0 +1 @@
+"""Benchmarks do pipeline de processamento (executar com python -m benchmarks.<modulo>)"""
@@ -0,0 +1,77 @@
+"""Paridade e vazão dos backends de texto (backends_texto.py).
+
+Extrai cada PDF do corpus da suíte (benchmarks/suite.py) com o backend de
+referência ('pdfplumber') e com os demais, confere se os dicionários extraídos,
+a contagem de fotos e o texto de cada página são idênticos e mede páginas/s
+de cada backend. Termina com código 1 se algum arquivo divergir.
+
+Uso: python -m benchmarks.bench_backends_texto [--arquivos N] [--semente S] [pdfs...]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from backends_texto import BACKENDS_TEXTO
+from benchmarks.suite import SEMENTE, preparar_corpus
+from extracao import abrir_pdf, extrair_dados_texto, ler_pdf_passagem_unica
+
+REFERENCIA = 'pdfplumber'
+
+
+def textos_paginas(caminho, ler_pagina):
+    with abrir_pdf(caminho) as pdf:
+        return [ler_pagina(pdf, pagina)[0] for pagina in pdf.pages]
+
+
+def extrair(caminho, temp_dir, backend):
+    nome = os.path.basename(caminho)
+    texto, fotos = ler_pdf_passagem_unica(caminho, temp_dir, nome, backend_texto=backend)
+    return extrair_dados_texto(texto, nome), fotos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', help='PDFs reais (padrão: corpus sintético da suíte)')
+    parser.add_argument('--arquivos', type=int, default=100)
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    args = parser.parse_args()
+
+    caminhos = args.pdfs or preparar_corpus(args.arquivos, args.semente)
+    temp_dir = tempfile.mkdtemp()
+    divergencias = 0
+    try:
+        # Vazão: texto de todas as páginas, sem a extração dos campos
+        tempos = {}
+        paginas = 0
+        for nome, ler_pagina in BACKENDS_TEXTO.items():
+            inicio = time.perf_counter()
+            paginas = sum(len(textos_paginas(caminho, ler_pagina)) for caminho in caminhos)
+            tempos[nome] = time.perf_counter() - inicio
+        for nome, tempo in tempos.items():
+            print(f"{nome:<12} {paginas / tempo:8.1f} páginas/s  ({tempo:.2f} s, "
+                  f"{tempos[REFERENCIA] / tempo:.2f}x a referência)")
+
+        # Paridade: campos extraídos, fotos e texto página a página
+        for caminho in caminhos:
+            referencia = extrair(caminho, temp_dir, REFERENCIA)
+            textos_referencia = textos_paginas(caminho, BACKENDS_TEXTO[REFERENCIA])
+            for nome, ler_pagina in BACKENDS_TEXTO.items():
+                if nome == REFERENCIA:
+                    continue
+                if extrair(caminho, temp_dir, nome) != referencia:
+                    divergencias += 1
+                    print(f"DIVERGÊNCIA {nome}: campos de {os.path.basename(caminho)}")
+                elif textos_paginas(caminho, ler_pagina) != textos_referencia:
+                    print(f"aviso {nome}: texto de {os.path.basename(caminho)} difere (campos iguais)")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"{len(caminhos)} arquivo(s), {divergencias} divergência(s) nos campos extraídos")
+    sys.exit(1 if divergencias else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Entrada dos PDFs: leitura antiga (arquivo aberto pelo pdfplumber, membros de ZIP em
+bytes) contra o mapeamento de fontes_pdf.py (mmap e MembroZip).
+
+Cada cenário roda num processo novo sobre o corpus da suíte (benchmarks/suite.py) e
+mede as chamadas read() e os bytes lidos (/proc/self/io), o pico de memória anônima
+(RssAnon: privada do processo, ao contrário das páginas mapeadas do arquivo, que
+ficam no cache do sistema e são compartilhadas) e o tempo:
+
+- disco: o worker lendo cada PDF gravado em disco (processar_pdf_individual);
+- zip_web: o processo web preparando os PDFs de um .zip para o motor (hash, estimativa
+  de páginas e serialização para o worker), com até Config.PIPELINE_CAPACIDADE
+  arquivos na fila, como no PipelineLote;
+- zip_worker: o worker lendo os PDFs do .zip a partir do que recebeu.
+
+Uso: python -m benchmarks.bench_entrada [--arquivos N] [--semente S] [--compressao stored|deflated]
+"""
+import argparse
+import collections
+import io
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+from benchmarks.suite import SEMENTE, preparar_corpus
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CENARIOS = ('disco', 'zip_web', 'zip_worker')
+COMPRESSOES = {'stored': zipfile.ZIP_STORED, 'deflated': zipfile.ZIP_DEFLATED}
+MIB = 1024 * 1024
+
+
+def contadores_io():
+    with open('/proc/self/io') as f:
+        valores = dict(linha.split(': ') for linha in f.read().splitlines())
+    return int(valores['syscr']), int(valores['rchar'])
+
+
+def memoria_anonima():
+    with open('/proc/self/status') as f:
+        for linha in f:
+            if linha.startswith('RssAnon:'):
+                return int(linha.split()[1]) * 1024
+    return 0
+
+
+def abrir_pdf_antigo(fonte):
+    """extracao.abrir_pdf antes do mapeamento: caminho aberto pelo pdfplumber, bytes em BytesIO"""
+    import pdfplumber
+
+    if isinstance(fonte, (bytes, bytearray)):
+        fonte = io.BytesIO(fonte)
+    return pdfplumber.open(fonte)
+
+
+def fontes_zip(caminho_zip, mapeado):
+    """Fontes dos PDFs do .zip como o motor as recebe: MembroZip ou bytes (leitura antiga)"""
+    from fontes_pdf import MembroZip
+
+    with zipfile.ZipFile(caminho_zip) as arquivo_zip:
+        for info in arquivo_zip.infolist():
+            nome = os.path.basename(info.filename)
+            yield (MembroZip.de_info(caminho_zip, info) if mapeado else arquivo_zip.read(info)), nome
+
+
+def executar_cenario(cenario, mapeado, caminhos, caminho_zip):
+    """Executado no processo medido: devolve os contadores do cenário"""
+    import extracao
+    from cache_extracao import hash_conteudo
+    from config import Config
+    from fontes_pdf import MembroZip
+    from processamento import estimar_paginas
+
+    if not mapeado:
+        extracao.abrir_pdf = abrir_pdf_antigo
+    temp_dir = tempfile.mkdtemp()
+    if cenario == 'zip_worker':
+        # O que o processo web enviou; o worker desserializa um arquivo por vez
+        enviados = [(pickle.dumps(fonte), nome) for fonte, nome in fontes_zip(caminho_zip, mapeado)]
+
+    pico_anonima = base_anonima = memoria_anonima()
+    serializados = 0
+    syscr, rchar = contadores_io()
+    inicio = time.perf_counter()
+    if cenario == 'disco':
+        for caminho in caminhos:
+            extracao.processar_pdf_individual((caminho, os.path.basename(caminho), temp_dir))
+            pico_anonima = max(pico_anonima, memoria_anonima())
+    elif cenario == 'zip_web':
+        fila = collections.deque(maxlen=Config.PIPELINE_CAPACIDADE)
+        for fonte, nome in fontes_zip(caminho_zip, mapeado):
+            hash_conteudo(fonte)
+            # Como em MotorExtracao._pesado: membros comprimidos não têm as páginas contadas
+            if not (isinstance(fonte, MembroZip) and fonte.compressao != zipfile.ZIP_STORED):
+                estimar_paginas(fonte)
+            serializados += len(pickle.dumps(fonte))
+            fila.append((fonte, nome))
+            pico_anonima = max(pico_anonima, memoria_anonima())
+    else:
+        for serializado, nome in enviados:
+            extracao.processar_pdf_individual((pickle.loads(serializado), nome, temp_dir))
+            pico_anonima = max(pico_anonima, memoria_anonima())
+    duracao = time.perf_counter() - inicio
+    syscr_fim, rchar_fim = contadores_io()
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    return {'segundos': round(duracao, 3), 'chamadas_read': syscr_fim - syscr,
+            'mib_lidos': round((rchar_fim - rchar) / MIB, 2),
+            'pico_anonima_mib': round((pico_anonima - base_anonima) / MIB, 2),
+            'mib_serializados': round(serializados / MIB, 2)}
+
+
+def medir(cenario, mapeado, pasta_corpus, caminho_zip):
+    processo = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_entrada', '--_cenario', cenario,
+         '--_mapeado', str(int(mapeado)), '--_corpus', pasta_corpus, '--_zip', caminho_zip],
+        cwd=RAIZ, capture_output=True, text=True, check=True)
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--arquivos', type=int, default=100)
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--compressao', choices=COMPRESSOES, default='deflated')
+    # Usados pelo processo medido
+    parser.add_argument('--_cenario', choices=CENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--_mapeado', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--_corpus', help=argparse.SUPPRESS)
+    parser.add_argument('--_zip', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._cenario:
+        caminhos = sorted(os.path.join(args._corpus, nome) for nome in os.listdir(args._corpus)
+                          if nome.endswith('.pdf'))
+        print(json.dumps(executar_cenario(args._cenario, bool(args._mapeado), caminhos, args._zip)))
+        return
+
+    caminhos = preparar_corpus(args.arquivos, args.semente)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        caminho_zip = os.path.join(temp_dir, 'corpus.zip')
+        with zipfile.ZipFile(caminho_zip, 'w', COMPRESSOES[args.compressao]) as arquivo_zip:
+            for caminho in caminhos:
+                arquivo_zip.write(caminho, os.path.basename(caminho))
+        pasta_corpus = os.path.dirname(caminhos[0])
+        print(f"{len(caminhos)} PDFs, {sum(map(os.path.getsize, caminhos)) / MIB:.1f} MiB, zip {args.compressao}")
+        for cenario in CENARIOS:
+            antigo = medir(cenario, False, pasta_corpus, caminho_zip)
+            novo = medir(cenario, True, pasta_corpus, caminho_zip)
+            print(f"{cenario}:")
+            for nome, medida in (('antigo', antigo), ('mapeado', novo)):
+                print(f"  {nome:<8} {medida['segundos']:7.2f} s  read() {medida['chamadas_read']:7d}  "
+                      f"lidos {medida['mib_lidos']:7.1f} MiB  pico anônima {medida['pico_anonima_mib']:6.1f} MiB  "
+                      f"serializados {medida['mib_serializados']:6.1f} MiB")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
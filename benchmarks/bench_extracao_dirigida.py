@@ -0,0 +1,58 @@
+"""Compara a extração de texto de todas as páginas (MODO_TEXTO 'completo') com a
+dirigida pelos marcos das seções ('dirigido'), que depois do título da seção 08 só
+varre as imagens: tempo por arquivo nos dois modos de fotos e conferência de que os
+campos extraídos e a contagem de fotos são idênticos.
+
+Uso: python -m benchmarks.bench_extracao_dirigida [--arquivos N] [--fotos F] [pdfs...]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.sintetico import gerar_lote
+from extracao import extrair_dados_texto, ler_pdf_passagem_unica
+
+
+def extrair(caminho, temp_dir, modo_fotos, modo_texto):
+    nome = os.path.basename(caminho)
+    texto, fotos = ler_pdf_passagem_unica(caminho, temp_dir, nome, modo_fotos, modo_texto)
+    return extrair_dados_texto(texto, nome), fotos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', help='PDFs reais (padrão: relatórios sintéticos)')
+    parser.add_argument('--arquivos', type=int, default=20)
+    parser.add_argument('--fotos', type=int, default=8, help='fotos por relatório sintético (2 por página)')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        caminhos = args.pdfs or gerar_lote(os.path.join(temp_dir, 'pdfs'), args.arquivos,
+                                           variado=True, fotos=args.fotos)
+        for modo_fotos in ('contagem', 'completo'):
+            tempos = {'completo': [], 'dirigido': []}
+            divergentes = []
+            for caminho in caminhos:
+                resultados = {}
+                for modo_texto in tempos:
+                    inicio = time.perf_counter()
+                    resultados[modo_texto] = extrair(caminho, temp_dir, modo_fotos, modo_texto)
+                    tempos[modo_texto].append(time.perf_counter() - inicio)
+                if resultados['completo'] != resultados['dirigido']:
+                    divergentes.append(os.path.basename(caminho))
+
+            antes = statistics.mean(tempos['completo'])
+            depois = statistics.mean(tempos['dirigido'])
+            print(f"fotos '{modo_fotos}': completo {antes * 1000:7.1f} ms/arquivo, "
+                  f"dirigido {depois * 1000:7.1f} ms/arquivo ({antes / depois:.2f}x); "
+                  f"divergências: {len(divergentes)} {divergentes[:5]}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Tempo de importação de cada camada e bibliotecas pesadas que ela carrega.
+
+Cada cenário roda em um processo novo com python -X importtime (a mediana de
+algumas repetições, depois de uma execução que aquece os .pyc): o tempo
+acumulado do próprio cenário, as importações de primeiro nível mais caras e
+quais bibliotecas pesadas (pandas, fpdf, PIL, pdfplumber...) ficaram em
+sys.modules. Termina com código 1 se uma camada carregar uma biblioteca
+que não usa (ex.: o processo web importando pandas só para subir).
+
+Também é chamado pela suíte (benchmarks/suite.py), que guarda o resultado
+no JSON e compara com execuções anteriores.
+
+Uso: python -m benchmarks.bench_importacao [--repeticoes N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PESADOS = ('pandas', 'numpy', 'openpyxl', 'pyarrow', 'fpdf', 'fontTools', 'PIL', 'pdfplumber', 'pdfminer')
+
+# Cenário -> (código importado, bibliotecas pesadas que não podem aparecer)
+CENARIOS = {
+    'web': ('import app', PESADOS),
+    'cli': ('import cli', PESADOS),
+    'worker': ('import processamento, importlib\n'
+               'for modulo in processamento.PRECARGA_WORKERS: importlib.import_module(modulo)',
+               ('pandas', 'numpy', 'openpyxl', 'pyarrow', 'fpdf', 'fontTools')),
+    'saidas': ('import saidas', PESADOS),
+}
+
+# Impressa pelo processo medido: pacotes pesados carregados
+SONDA = ("\nimport sys, json\n"
+         f"print(json.dumps(sorted(m for m in {PESADOS!r} if m in sys.modules)))")
+
+
+def _executar(codigo):
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo + SONDA], cwd=RAIZ,
+                              capture_output=True, text=True, check=True)
+    # Linhas "import time: self [us] | cumulative | nome"; cada nível de aninhamento
+    # acrescenta dois espaços antes do nome
+    niveis = ({}, {})
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        if nivel < len(niveis):
+            nome = nome.strip()
+            niveis[nivel][nome] = niveis[nivel].get(nome, 0) + int(acumulado)
+    carregados = json.loads(processo.stdout.strip().splitlines()[-1])
+    return niveis, carregados
+
+
+def medir_cenario(codigo, repeticoes=5):
+    """Mediana do tempo total de importação (ms), as 5 importações mais caras feitas pelos
+    módulos do cenário e os pesados carregados"""
+    _executar(codigo)  # aquece os .pyc
+    totais = []
+    amostras = []
+    carregados = []
+    for _ in range(repeticoes):
+        (primeiro_nivel, segundo_nivel), carregados = _executar(codigo)
+        totais.append(sum(primeiro_nivel.values()))
+        amostras.append(segundo_nivel)
+    mediana = sorted(range(repeticoes), key=lambda i: totais[i])[repeticoes // 2]
+    mais_caros = sorted(amostras[mediana].items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'total_ms': round(statistics.median(totais) / 1000, 1),
+        'mais_caros_ms': {nome: round(tempo / 1000, 1) for nome, tempo in mais_caros},
+        'pesados_carregados': carregados,
+    }
+
+
+def medir_importacao(repeticoes=5):
+    """Resultados de todos os cenários, com as bibliotecas que não deveriam estar carregadas"""
+    resultados = {}
+    for nome, (codigo, proibidos) in CENARIOS.items():
+        medida = medir_cenario(codigo, repeticoes)
+        medida['indevidos'] = [m for m in medida['pesados_carregados'] if m in proibidos]
+        resultados[nome] = medida
+    return resultados
+
+
+def imprimir(resultados):
+    for nome, medida in resultados.items():
+        caros = ', '.join(f"{modulo} {tempo:.0f}" for modulo, tempo in medida['mais_caros_ms'].items())
+        print(f"{nome:<8} {medida['total_ms']:8.1f} ms  (mais caros, ms: {caros})")
+        print(f"{'':<8} pesados: {', '.join(medida['pesados_carregados']) or 'nenhum'}"
+              + (f"  INDEVIDOS: {', '.join(medida['indevidos'])}" if medida['indevidos'] else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = medir_importacao(args.repeticoes)
+    imprimir(resultados)
+    sys.exit(1 if any(medida['indevidos'] for medida in resultados.values()) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compara o tempo por arquivo da leitura antiga (duas aberturas do PDF) com a passagem única,
+gravando as fotos (modo 'completo') ou só contando pelos metadados (modo 'contagem').
+
+Uso: python -m benchmarks.bench_passagem_unica [--arquivos N] [--paginas P] [pdfs...]
+"""
+import argparse
+import functools
+import shutil
+import statistics
+import tempfile
+import os
+import time
+import pdfplumber
+
+from extracao import (PADRAO_SECAO_FOTOS, abrir_pdf, ler_pdf_passagem_unica, nome_pasta_fotos,
+                      pasta_fotos, salvar_fotos_paginas)
+from benchmarks.sintetico import gerar_lote
+
+
+# Implementação anterior das fotos (segunda abertura do PDF), mantida como referência
+def _encontrar_pagina_secao_fotos_legado(pdf):
+    for page_num, page in enumerate(pdf.pages, 1):
+        texto_pagina = page.extract_text() or ""
+        if PADRAO_SECAO_FOTOS.search(texto_pagina):
+            return page_num
+    return None
+
+
+def _extrair_fotos_legado(pdf_path, temp_dir, filename):
+    fotos_extraidas = []
+    fotos_dir = pasta_fotos(temp_dir, nome_pasta_fotos(filename))
+    os.makedirs(fotos_dir, exist_ok=True)
+    
+    try:
+        with abrir_pdf(pdf_path) as pdf:
+            pagina_inicio_fotos = _encontrar_pagina_secao_fotos_legado(pdf)
+            paginas_processar = range(len(pdf.pages))
+            if pagina_inicio_fotos is not None:
+                paginas_processar = range(pagina_inicio_fotos - 1, len(pdf.pages))
+            
+            fotos_extraidas = salvar_fotos_paginas(
+                ((page_num, pdf.pages[page_num].images) for page_num in paginas_processar),
+                fotos_dir
+            )
+    except Exception:
+        pass
+    
+    return fotos_extraidas
+
+
+def leitura_antiga(caminho, temp_dir, nome):
+    with pdfplumber.open(caminho) as pdf:
+        texto = "\n".join(page.extract_text() or "" for page in pdf.pages)
+    fotos = _extrair_fotos_legado(caminho, temp_dir, nome)
+    return texto, fotos
+
+
+def medir(funcao, caminhos, temp_dir):
+    tempos = []
+    for caminho in caminhos:
+        inicio = time.perf_counter()
+        funcao(caminho, temp_dir, caminho.rsplit('/', 1)[-1])
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('pdfs', nargs='*', help='PDFs reais (padrão: relatórios sintéticos)')
+    parser.add_argument('--arquivos', type=int, default=5)
+    parser.add_argument('--paginas', type=int, default=30, help='páginas de texto extras por relatório')
+    args = parser.parse_args()
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        caminhos = args.pdfs or gerar_lote(temp_dir, args.arquivos, paginas_extras=args.paginas)
+        
+        # Aquecimento (imports e caches do pdfminer)
+        ler_pdf_passagem_unica(caminhos[0], temp_dir, 'aquecimento.pdf')
+        
+        completo = functools.partial(ler_pdf_passagem_unica, modo_fotos='completo')
+        contagem = functools.partial(ler_pdf_passagem_unica, modo_fotos='contagem')
+        for rotulo, funcao in (('antes (2 aberturas)', leitura_antiga),
+                               ('passagem única/completo', completo),
+                               ('passagem única/contagem', contagem)):
+            tempos = medir(funcao, caminhos, temp_dir)
+            print(f"{rotulo:<25} média {statistics.mean(tempos) * 1000:8.1f} ms/arquivo"
+                  f"  mediana {statistics.median(tempos) * 1000:8.1f} ms")
+        
+        antigo = leitura_antiga(caminhos[0], temp_dir, 'conferencia.pdf')
+        novo = completo(caminhos[0], temp_dir, 'conferencia.pdf')
+        print(f"Resultados idênticos: {antigo[0] == novo[0] and len(antigo[1]) == novo[1]}")
+        
+        divergencias = sum(
+            (completo(c, temp_dir, 'status.pdf')[1] > 0) != (contagem(c, temp_dir, 'status.pdf')[1] > 0)
+            for c in caminhos
+        )
+        print(f"Status_Fotos divergentes (completo x contagem): {divergencias} de {len(caminhos)}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compara a planilha antiga (DataFrame -> ExcelWriter em BytesIO -> cópia para o
+arquivo) com a gravação em fluxo de planilha.py: tempo, crescimento do pico de
+memória residente (acima da memória já ocupada pelos registros) e conferência
+do conteúdo. Cada variante roda em um processo novo para que uma não
+influencie a medição da outra.
+
+Uso: python -m benchmarks.bench_planilha [--registros N] [--formato xlsx|csv|parquet]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.bench_pontuacao import registros_sinteticos
+from planilha import EscritorPlanilha, PADROES_PLANILHA
+from pontuacao import pontuar
+from processamento import CAMPOS_REGISTRO
+
+
+def registros_completos(quantidade):
+    registros = registros_sinteticos(quantidade)
+    for i, dados in enumerate(registros):
+        dados.update({
+            'Situação': 'Em andamento', 'Fiscal': f"FISCAL {i % 40}", 'Data': '10/03/2025',
+            'Fato_Gerador': 'Obra sem ART', 'Nome_Arquivo': f"rf_{i:06d}.pdf",
+            'RF_Principal': '', 'Fiscal_Nome_Completo': f"Fiscal Número {i % 40}",
+            'Fotos_Extraidas': 1 if dados['Status_Fotos'] == 'SIM' else 0,
+            'Fotos': 'Foto(s) detectada(s)', 'Data_ART': '01/02/2025',
+            'Data_Relatorio_Anterior': '', 'Informacoes_Complementares': 'x' * (i % 80),
+        })
+    # Mesma ordem de chaves dos registros devolvidos pelo motor
+    return [{campo: dados[campo] for campo in CAMPOS_REGISTRO} for dados in registros]
+
+
+def memoria_residente():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def gravar_antigo(registros, caminho, formato):
+    for dados in registros:
+        for chave, valor in PADROES_PLANILHA.items():
+            dados.setdefault(chave, valor)
+    pontuar(registros)
+    df = pd.DataFrame(registros)
+    df['Pontuacao'] = df.pop('Pontuacao')
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Dados Completos', index=False)
+    with open(caminho, 'wb') as f:
+        f.write(buffer.getvalue())
+
+
+def gravar_fluxo(registros, caminho, formato):
+    with EscritorPlanilha(caminho, formato) as escritor:
+        for dados in registros:
+            escritor.adicionar(dados)
+
+
+def medir(funcao, quantidade, caminho, formato):
+    registros = registros_completos(quantidade)
+    base = memoria_residente()
+    inicio = time.perf_counter()
+    funcao(registros, caminho, formato)
+    tempo = time.perf_counter() - inicio
+    # ru_maxrss em KiB no Linux
+    return tempo, max(0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--registros', type=int, default=50_000)
+    parser.add_argument('--formato', default='xlsx', choices=['xlsx', 'csv', 'parquet'])
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp()
+    caminhos = {}
+    for rotulo, funcao, formato in (('antigo (DataFrame/BytesIO)', gravar_antigo, 'xlsx'),
+                                    (f'em fluxo ({args.formato})', gravar_fluxo, args.formato)):
+        caminho = os.path.join(pasta, f"{funcao.__name__}.{formato}")
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            tempo, pico = pool.apply(medir, (funcao, args.registros, caminho, formato))
+        caminhos[funcao.__name__] = caminho
+        print(f"{rotulo:<28} {tempo:7.2f} s  pico +{pico / 1024 / 1024:7.1f} MiB"
+              f"  arquivo {os.path.getsize(caminho) / 1024 / 1024:6.1f} MiB")
+
+    if args.formato == 'xlsx':
+        antigo = pd.read_excel(caminhos['gravar_antigo']).fillna('')
+        novo = pd.read_excel(caminhos['gravar_fluxo']).fillna('')
+        print(f"Conteúdo idêntico: {antigo.equals(novo)}")
+
+
+if __name__ == '__main__':
+    main()
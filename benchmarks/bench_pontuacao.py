@@ -0,0 +1,94 @@
+"""Compara a pontuação registro a registro (calcular_pontuacao + df.at, como era
+em gerar_excel, gerar_pdf e finalizar_lote) com a passagem vetorizada de
+pontuacao.py sobre registros sintéticos, e confere se os valores coincidem.
+
+Uso: python -m benchmarks.bench_pontuacao [--registros N]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from pontuacao import TABELA_PONTUACAO, pontuar, resumo_pontuacao
+
+
+def calcular_pontuacao_antiga(dados):
+    try:
+        pontuacao_tabela = TABELA_PONTUACAO[dados.get('Status_Fotos', 'NÃO')]
+        tem_protocolo = 1 if dados.get('Protocolo') and str(dados['Protocolo']).strip() else 0
+        total = (
+            pontuacao_tabela['RFs'] +
+            (pontuacao_tabela['Ações'] * dados.get('Acoes', 0)) +
+            (pontuacao_tabela['Ofícios'] * dados.get('Oficio', 0)) +
+            (pontuacao_tabela['Resposta Ofícios'] * dados.get('Resposta_Oficio', 0)) +
+            (pontuacao_tabela['Protocolos'] * tem_protocolo) +
+            pontuacao_tabela['Fotos'] +
+            (pontuacao_tabela['Regularização'] if dados.get('Regularizacao') == 'SIM' else 0)
+        )
+        return round(total, 2)
+    except Exception:
+        return 0.0
+
+
+def registros_sinteticos(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    registros = []
+    for i in range(quantidade):
+        registros.append({
+            'RF': 'ERRO' if i % 50 == 0 else f"{i:013d}",
+            'Status_Fotos': aleatorio.choice(['SIM', 'NÃO']),
+            'Acoes': aleatorio.randint(0, 6),
+            'Oficio': aleatorio.randint(0, 1),
+            'Resposta_Oficio': aleatorio.randint(0, 1),
+            'Protocolo': aleatorio.choice(['', '  ', f"{i:06d}/2025"]),
+            'Regularizacao': aleatorio.choice(['SIM', 'NÃO', 'NÃO']),
+        })
+    return registros
+
+
+def pontuacao_antiga(registros):
+    """Caminho antigo: Excel com df.at, tabela e resumo do PDF e total da página"""
+    df = pd.DataFrame(registros)
+    for i, dados in enumerate(registros):
+        df.at[i, 'Pontuacao'] = calcular_pontuacao_antiga(dados)
+    validos = [d for d in registros if d.get('RF') != 'ERRO']
+    por_registro = [calcular_pontuacao_antiga(d) for d in validos]
+    pontuacao_sim = sum(calcular_pontuacao_antiga(d) for d in validos if d.get('Status_Fotos') == 'SIM')
+    pontuacao_nao = sum(calcular_pontuacao_antiga(d) for d in validos if d.get('Status_Fotos') == 'NÃO')
+    total = sum(calcular_pontuacao_antiga(d) for d in validos)
+    return df['Pontuacao'].tolist(), por_registro, pontuacao_sim, pontuacao_nao, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--registros', type=int, default=100_000)
+    args = parser.parse_args()
+
+    registros = registros_sinteticos(args.registros)
+
+    inicio = time.perf_counter()
+    antigo = pontuacao_antiga([dict(r) for r in registros])
+    tempo_antigo = time.perf_counter() - inicio
+
+    copia = [dict(r) for r in registros]
+    inicio = time.perf_counter()
+    quadro = pontuar(copia)
+    resumo = resumo_pontuacao(quadro)
+    tempo_novo = time.perf_counter() - inicio
+
+    print(f"{args.registros} registros")
+    print(f"registro a registro  {tempo_antigo * 1000:9.1f} ms")
+    print(f"vetorizado           {tempo_novo * 1000:9.1f} ms  ({tempo_antigo / tempo_novo:.1f}x)")
+
+    divergentes = sum(a != b for a, b in zip(antigo[0], quadro['Pontuacao'].tolist()))
+    totais_iguais = (
+        abs(antigo[2] - resumo['pontuacao_sim']) < 1e-6
+        and abs(antigo[3] - resumo['pontuacao_nao']) < 1e-6
+        and abs(antigo[4] - resumo['total_pontuacao']) < 1e-6
+    )
+    print(f"Pontuações divergentes: {divergentes}; totais iguais: {totais_iguais}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Microbenchmark da extração por regex sobre texto sintético de relatórios.
+
+Compara a divisão antiga (extrair_secao compilando o padrão a cada chamada,
+quatro varreduras do texto e nova varredura da seção 04) com dividir_secoes
+(uma única varredura com padrões pré-compilados) e confere se os campos
+extraídos são idênticos.
+
+Uso: python -m benchmarks.bench_regex [--textos N] [--paginas P] [--repeticoes R]
+"""
+import argparse
+import re
+import time
+
+import extracao
+from extracao import extrair_dados_texto, is_empty_info
+from benchmarks.sintetico import texto_relatorio
+
+
+# Implementação anterior das seções, mantida como referência
+def _extrair_secao_legado(texto, titulo_secao):
+    padrao = re.compile(
+        r'{}(.*?)(?=\d{{2}}\s*-\s*[A-Z]|\Z)'.format(re.escape(titulo_secao)),
+        re.DOTALL | re.IGNORECASE
+    )
+    match = padrao.search(texto)
+    if match:
+        conteudo = match.group(1).strip()
+        return None if is_empty_info(conteudo) else conteudo
+    padrao_alternativo = re.compile(r'{}\s*(.*?)'.format(re.escape(titulo_secao)), re.DOTALL | re.IGNORECASE)
+    match_alt = padrao_alternativo.search(texto)
+    if match_alt:
+        conteudo = re.split(r'\d{2}\s*-\s*[A-Z]', match_alt.group(1).strip())[0].strip()
+        return None if is_empty_info(conteudo) else conteudo
+    return None
+
+
+def _contar_ramos_legado(texto):
+    padrao = r'04\s*-\s*Identificação dos Contratados, Responsáveis Técnicos e/ou Fiscalizados(.*?)(?=05\s*-\s*Documentos Solicitados|\Z)'
+    match_secao = re.search(padrao, texto, re.DOTALL | re.IGNORECASE)
+    if not match_secao:
+        return 0
+    return len(re.findall(r'Ramo\s+Atividade\s*:', match_secao.group(1), re.IGNORECASE))
+
+
+def _verificar_oficio_legado(texto):
+    texto_str = str(texto).lower()
+    for padrao in [r'of[ií]cio', r'of\.', r'ofc', r'oficio', r'of[\s\-]?[0-9]']:
+        if re.search(padrao, texto_str, re.IGNORECASE):
+            return 1
+    return 0
+
+
+def _dividir_secoes_legado(texto):
+    secoes = {numero: _extrair_secao_legado(texto, titulo) for numero, titulo in extracao.TITULOS_SECOES.items()}
+    secoes['ramos_04'] = texto if secoes['04'] else None
+    return secoes
+
+
+def extrair_legado(texto, filename):
+    """extrair_dados_texto com a divisão de seções e as buscas da versão anterior"""
+    originais = (extracao.dividir_secoes, extracao.contar_ramos_atividade, extracao.verificar_oficio)
+    extracao.dividir_secoes = _dividir_secoes_legado
+    extracao.contar_ramos_atividade = _contar_ramos_legado
+    extracao.verificar_oficio = _verificar_oficio_legado
+    try:
+        return extrair_dados_texto(texto, filename)
+    finally:
+        extracao.dividir_secoes, extracao.contar_ramos_atividade, extracao.verificar_oficio = originais
+
+
+def medir(funcao, textos, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for i, texto in enumerate(textos):
+            funcao(texto, f'rf_{i}.pdf')
+    return (time.perf_counter() - inicio) / (repeticoes * len(textos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--textos', type=int, default=200)
+    parser.add_argument('--paginas', type=int, default=30, help='páginas de texto extras por relatório')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+    
+    textos = [texto_relatorio(i, ramos=i % 6, paginas_extras=args.paginas) for i in range(1, args.textos + 1)]
+    
+    # Os prints DEBUG da extração não entram na medição
+    extracao.print = lambda *a, **k: None
+    
+    divergencias = sum(
+        extrair_legado(texto, 'x.pdf') != extrair_dados_texto(texto, 'x.pdf') for texto in textos
+    )
+    antes = medir(extrair_legado, textos, args.repeticoes)
+    depois = medir(extrair_dados_texto, textos, args.repeticoes)
+    
+    tamanho_medio = sum(map(len, textos)) / len(textos)
+    print(f"{len(textos)} textos, {tamanho_medio / 1024:.1f} KiB em média")
+    print(f"antes  (extrair_secao por seção) {antes * 1e6:10.1f} µs/texto")
+    print(f"depois (dividir_secoes)          {depois * 1e6:10.1f} µs/texto  ({antes / depois:.1f}x)")
+    print(f"Divergências: {divergencias}")
+
+
+if __name__ == '__main__':
+    main()
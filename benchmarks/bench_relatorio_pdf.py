@@ -0,0 +1,51 @@
+"""Tempo de finalização do relatório em PDF: a geração antiga (tudo depois da
+extração, com BytesIO) contra o RelatorioPDF incremental, cujas linhas já foram
+desenhadas durante a extração e que só precisa dos resumos e da gravação.
+
+Uso: python -m benchmarks.bench_relatorio_pdf [--registros N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_planilha import registros_completos
+from pontuacao import pontuar
+from relatorio_pdf import RelatorioPDF
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--registros', type=int, default=5000)
+    args = parser.parse_args()
+
+    registros = registros_completos(args.registros)
+    pasta = tempfile.mkdtemp()
+
+    # Antes: todo o PDF montado depois da extração (mesmo RelatorioPDF alimentado de uma vez)
+    inicio = time.perf_counter()
+    relatorio = RelatorioPDF()
+    for dados in registros:
+        relatorio.adicionar(dados)
+    relatorio.concluir(os.path.join(pasta, 'completo.pdf'))
+    tempo_total = time.perf_counter() - inicio
+
+    # Depois: adicionar() acontece enquanto a extração roda; mede-se só a espera final
+    pontuar(registros)
+    relatorio = RelatorioPDF()
+    inicio = time.perf_counter()
+    for dados in registros:
+        relatorio.adicionar(dados)
+    tempo_durante = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    relatorio.concluir(os.path.join(pasta, 'incremental.pdf'))
+    tempo_final = time.perf_counter() - inicio
+
+    print(f"{args.registros} registros")
+    print(f"montagem completa após a extração   {tempo_total:7.2f} s")
+    print(f"linhas desenhadas durante a extração {tempo_durante:7.2f} s")
+    print(f"espera ao final (resumos + gravação) {tempo_final:7.2f} s")
+
+
+if __name__ == '__main__':
+    main()
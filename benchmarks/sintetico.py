@@ -0,0 +1,141 @@
+"""Gerador de relatórios de fiscalização sintéticos no layout do CREA-RJ"""
+import os
+import random
+import re
+from datetime import datetime, timezone
+from io import BytesIO
+from fpdf import FPDF
+from PIL import Image
+
+# Data fixa nos metadados: o mesmo número gera sempre o mesmo arquivo (e o mesmo hash)
+DATA_CRIACAO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def gerar_foto(largura=400, altura=300, semente=0):
+    """Gera uma foto JPEG com ruído (incompressível o bastante para passar no filtro de tamanho)"""
+    rnd = random.Random(semente)
+    img = Image.frombytes('RGB', (largura, altura), rnd.randbytes(largura * altura * 3))
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=70)
+    buffer.seek(0)
+    return buffer
+
+
+def _remover_predictor_jpeg(conteudo):
+    """O fpdf2 grava DecodeParms com Predictor nas imagens JPEG, o que o pdfminer não
+    decodifica. Substitui a entrada por espaços (mesmo tamanho, preservando o xref)"""
+    return re.sub(
+        rb'/DecodeParms <<[^>]*>>',
+        lambda m: b' ' * len(m.group(0)),
+        bytes(conteudo)
+    )
+
+
+def linhas_relatorio(numero=1, ramos=2, semente=None):
+    """Linhas do cabeçalho e das seções 04 a 07 no layout esperado pelas regexes.
+    
+    Alguns números geram variações (seção vazia, sem data da ART, ofício
+    abreviado) para exercitar todos os ramos da extração.
+    """
+    rnd = random.Random(numero if semente is None else semente)
+    linhas = [
+        'RELATÓRIO DE FISCALIZAÇÃO',
+        f'Número : {2025000000000 + numero}',
+        'Situação : Concluído',
+        f'Agente de Fiscalização : {1000 + numero % 50} - AGENTE SINTETICO {numero % 50}',
+        f'Data Relatório : {rnd.randint(1, 28):02d}/03/2025',
+        f'Fato Gerador : PROTOCOLO {100000 + numero}',
+        f'RF Principal : {2024000000000 + numero}',
+        '04 - Identificação dos Contratados, Responsáveis Técnicos e/ou Fiscalizados'
+    ]
+    for i in range(ramos):
+        linhas.append(f'Contratado : EMPRESA {i + 1} LTDA')
+        linhas.append('Ramo Atividade : ENGENHARIA CIVIL')
+    
+    linhas.append('05 - Documentos Solicitados / Expedidos')
+    if numero % 5 == 0:
+        linhas.append('SEM INFORMAÇÃO')
+    elif numero % 3 == 0:
+        linhas.append(f'OF-{numero} enviado ao responsável técnico')
+    else:
+        linhas.append(f'Ofício nº {numero}/2025 expedido ao responsável')
+    
+    linhas.append('06 - Documentos Recebidos')
+    if numero % 7 == 0:
+        linhas.append('Cópia ART recebida sem data')
+    else:
+        linhas.append(f'Cópia ART recebida. OUTROS - {rnd.randint(1, 28):02d}/04/2025')
+    
+    linhas.append('07 - Outras Informações')
+    linhas.append(f'Data do Relatório Anterior : {rnd.randint(1, 28):02d}/{rnd.choice(["02", "05"])}/2025')
+    linhas.append(f'Informações Complementares : Obra em andamento (Observação sintética {numero})')
+    return linhas
+
+
+def linhas_extras(paginas):
+    """Texto de preenchimento equivalente a `paginas` páginas de observações"""
+    return [
+        f'Observação de campo {j + 1}: texto de preenchimento para simular relatórios longos.'
+        for _ in range(paginas) for j in range(30)
+    ]
+
+
+def texto_relatorio(numero=1, ramos=2, paginas_extras=0, semente=None):
+    """Texto do relatório como sai da extração página a página (para benchmarks sem PDF)"""
+    return "\n".join(linhas_relatorio(numero, ramos, semente) + linhas_extras(paginas_extras) + ['08 - Fotos'])
+
+
+def gerar_relatorio(caminho, numero=1, ramos=2, paginas_extras=0, fotos=2, semente=None):
+    """Gera um PDF de relatório de fiscalização com seções 04 a 08"""
+    pdf = FPDF()
+    pdf.set_creation_date(DATA_CRIACAO)
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font('Helvetica', '', 10)
+    
+    def linha(texto):
+        pdf.multi_cell(0, 6, texto, new_x='LMARGIN', new_y='NEXT')
+    
+    for texto in linhas_relatorio(numero, ramos, semente):
+        linha(texto)
+    
+    extras = linhas_extras(paginas_extras)
+    for j, texto in enumerate(extras):
+        if j % 30 == 0:
+            pdf.add_page()
+        linha(texto)
+    
+    pdf.add_page()
+    linha('08 - Fotos')
+    for i in range(fotos):
+        if i and i % 2 == 0:
+            pdf.add_page()
+        pdf.image(gerar_foto(semente=numero * 100 + i), w=120)
+        linha(f'Foto {i + 1}: registro fotográfico da obra, vista {i + 1} do local fiscalizado, '
+              f'com identificação do responsável técnico e das condições observadas em campo.')
+    
+    with open(caminho, 'wb') as f:
+        f.write(_remover_predictor_jpeg(pdf.output()))
+    return caminho
+
+
+def parametros_variados(numero, semente=0):
+    """Quantidade de ramos de atividade, fotos e páginas extras de um relatório,
+    sorteados de forma reproduzível a partir do número e da semente"""
+    rnd = random.Random(semente * 1_000_003 + numero)
+    return {
+        'ramos': rnd.choice((0, 1, 1, 2, 2, 3, 4, 6)),
+        'fotos': rnd.choice((0, 1, 2, 2, 3, 4)),
+        'paginas_extras': rnd.choice((0, 0, 0, 1, 2, 5)),
+    }
+
+
+def gerar_lote(destino, quantidade, variado=False, semente=0, **kwargs):
+    """Gera `quantidade` relatórios em `destino` e retorna a lista de caminhos.
+    Com variado=True cada relatório recebe parametros_variados()."""
+    os.makedirs(destino, exist_ok=True)
+    caminhos = []
+    for i in range(1, quantidade + 1):
+        parametros = {**parametros_variados(i, semente), **kwargs} if variado else kwargs
+        caminhos.append(gerar_relatorio(os.path.join(destino, f'rf_{i:05d}.pdf'), numero=i, **parametros))
+    return caminhos
@@ -0,0 +1,315 @@
+"""Suíte de benchmarks reproduzível sobre relatórios sintéticos.
+
+Para cada tamanho de lote (padrão: 10, 100 e 1000 arquivos) gera, ou reaproveita,
+um corpus determinístico (benchmarks/sintetico.py com semente fixa: ramos de
+atividade, fotos e páginas variam de relatório para relatório) e mede, em um
+processo novo por tamanho:
+
+- latência: processar_pdf_individual arquivo a arquivo em um único processo
+  (p50/p95/p99/máximo e tempo médio por etapa, de instrumentacao.py);
+- vazão: o lote completo pelo PipelineLote (pool de processos, pontuação,
+  planilha e relatório em PDF), em arquivos/s e páginas/s;
+- memória: pico de memória residente do processo e soma de processo + workers.
+
+Antes dos tamanhos, mede o tempo de importação de cada camada (web, CLI,
+workers e saídas) com benchmarks/bench_importacao.py.
+
+Os resultados vão para um JSON com commit, Python, CPUs e configuração, que
+pode ser comparado com uma execução anterior com --comparar.
+
+Uso: python -m benchmarks.suite [--tamanhos 10 100 1000] [--semente S] [--workers N]
+                                [--saida arquivo.json] [--comparar anterior.json]
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from benchmarks.bench_importacao import imprimir as imprimir_importacao, medir_importacao
+from benchmarks.sintetico import gerar_lote
+from config import Config
+
+TAMANHOS = (10, 100, 1000)
+SEMENTE = 2025
+# Incrementar quando o gerador mudar, para não reaproveitar corpus antigos
+VERSAO_CORPUS = 2
+PASTA_CORPUS = os.path.join(tempfile.gettempdir(), 'crea_rj_benchmarks')
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+MIB = 1024 * 1024
+
+
+def preparar_corpus(quantidade, semente, pasta_base=PASTA_CORPUS):
+    """Gera o corpus uma vez por (versão, semente, tamanho) e o reaproveita depois"""
+    pasta = os.path.join(pasta_base, f"v{VERSAO_CORPUS}_s{semente}_n{quantidade}")
+    marcador = os.path.join(pasta, '.completo')
+    if not os.path.exists(marcador):
+        shutil.rmtree(pasta, ignore_errors=True)
+        gerar_lote(pasta, quantidade, variado=True, semente=semente)
+        open(marcador, 'w').close()
+    return sorted(glob.glob(os.path.join(pasta, '*.pdf')))
+
+
+def memoria_residente(pid='self'):
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class AmostradorMemoria(threading.Thread):
+    """Acompanha o pico da memória residente do processo somada à dos workers do motor
+    (os workers do forkserver não entram em RUSAGE_CHILDREN)"""
+
+    def __init__(self, motor, intervalo=0.05):
+        super().__init__(daemon=True)
+        self.motor = motor
+        self.intervalo = intervalo
+        self.pico_total = 0
+        self.pico_worker = 0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.is_set():
+            executor = self.motor._executor
+            workers = [memoria_residente(pid) for pid in list(getattr(executor, '_processes', None) or {})]
+            self.pico_worker = max([self.pico_worker] + workers)
+            self.pico_total = max(self.pico_total, memoria_residente() + sum(workers))
+            self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+def percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[round((len(ordenados) - 1) * fracao)]
+
+
+def medir_latencia(caminhos):
+    from extracao import processar_pdf_individual
+    from instrumentacao import METRICAS
+
+    METRICAS.drenar()
+    temp_dir = tempfile.mkdtemp()
+    tempos = []
+    try:
+        for caminho in caminhos:
+            inicio = time.perf_counter()
+            processar_pdf_individual((caminho, os.path.basename(caminho), temp_dir))
+            tempos.append(time.perf_counter() - inicio)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    resumo = METRICAS.resumo()
+    return {
+        'media_ms': round(sum(tempos) / len(tempos) * 1000, 2),
+        'p50_ms': round(percentil(tempos, 0.50) * 1000, 2),
+        'p95_ms': round(percentil(tempos, 0.95) * 1000, 2),
+        'p99_ms': round(percentil(tempos, 0.99) * 1000, 2),
+        'max_ms': round(max(tempos) * 1000, 2),
+        'paginas_por_segundo_media': resumo['paginas_por_segundo_media'],
+        'etapas': resumo['etapas'],
+    }
+
+
+def medir_vazao(caminhos, max_workers):
+    from banco_resultados import BancoResultados
+    from pipeline import PipelineLote
+    from pontuacao import pontuar, resumo_pontuacao
+    from processamento import MotorExtracao
+    from saidas import SaidasLote
+
+    temp_dir = tempfile.mkdtemp()
+    motor = MotorExtracao(max_workers=max_workers, cache=None)
+    # Banco descartável: o lote medido não vai para o banco de resultados real
+    banco = BancoResultados(os.path.join(temp_dir, 'resultados.sqlite3'))
+    try:
+        # Pool aquecido antes de medir (a criação dos workers não faz parte do lote)
+        motor._obter_executor()
+        amostrador = AmostradorMemoria(motor)
+        amostrador.start()
+
+        inicio = time.perf_counter()
+        saidas = SaidasLote(temp_dir)
+        pipeline = PipelineLote(saidas, temp_dir, motor=motor, banco=banco)
+        registros = list(pipeline.executar([(c, os.path.basename(c), temp_dir) for c in caminhos]))
+        tempo_extracao = time.perf_counter() - inicio
+        resumo_pontuacao(pontuar(registros))
+        saidas.concluir(os.path.join(temp_dir, f"dados.{saidas.extensao}"), os.path.join(temp_dir, 'relatorio.pdf'))
+        tempo_total = time.perf_counter() - inicio
+
+        amostrador.parar()
+    finally:
+        motor.encerrar()
+        banco.fechar()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    tempos = pipeline.tempos.resumo()
+    paginas = tempos['paginas_lidas']
+    return {
+        'segundos': round(tempo_total, 3),
+        'segundos_extracao': round(tempo_extracao, 3),
+        'arquivos_por_segundo': round(len(caminhos) / tempo_total, 2),
+        'paginas': paginas,
+        'paginas_por_segundo': round(paginas / tempo_total, 1),
+        'erros': sum(1 for dados in registros if dados.get('RF') == 'ERRO'),
+        'filas_pico': {nome: fila['pico'] for nome, fila in pipeline.profundidades()['filas'].items()},
+        'etapas': tempos['etapas'],
+        'memoria_pico_total_mib': round(amostrador.pico_total / MIB, 1),
+        'memoria_pico_worker_mib': round(amostrador.pico_worker / MIB, 1),
+    }
+
+
+def executar_tamanho(caminhos, max_workers):
+    """Executado em um processo novo (o pico de memória não herda o tamanho anterior)"""
+    base = memoria_residente()
+    latencia = medir_latencia(caminhos)
+    vazao = medir_vazao(caminhos, max_workers)
+    return {
+        'arquivos': len(caminhos),
+        'latencia': latencia,
+        'vazao': vazao,
+        'memoria': {
+            'base_mib': round(base / MIB, 1),
+            # ru_maxrss em KiB no Linux
+            'pico_processo_mib': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def _medir_em_processo(conexao, caminhos, max_workers):
+    try:
+        conexao.send((True, executar_tamanho(caminhos, max_workers)))
+    except Exception:
+        conexao.send((False, traceback.format_exc()))
+    finally:
+        conexao.close()
+
+
+def medir_em_processo_novo(caminhos, max_workers):
+    """Processo comum (não daemon, ao contrário dos de um Pool) para poder criar o pool do motor"""
+    contexto = multiprocessing.get_context('spawn')
+    receptor, emissor = contexto.Pipe(duplex=False)
+    processo = contexto.Process(target=_medir_em_processo, args=(emissor, caminhos, max_workers))
+    processo.start()
+    emissor.close()
+    try:
+        sucesso, valor = receptor.recv()
+    except EOFError:
+        raise RuntimeError(f"Processo de medição terminou sem resultado (código {processo.exitcode})")
+    finally:
+        processo.join()
+    if not sucesso:
+        raise RuntimeError(f"Falha na medição:\n{valor}")
+    return valor
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(PASTA_RESULTADOS), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior):
+    """Imprime a variação das principais métricas em relação a uma execução anterior"""
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('gerado_em')}):")
+    metricas = (('vazao', 'arquivos_por_segundo', 'arquivos/s'),
+                ('latencia', 'p50_ms', 'p50 ms'),
+                ('latencia', 'p95_ms', 'p95 ms'),
+                ('vazao', 'memoria_pico_total_mib', 'pico MiB'))
+    for tamanho, resultado in atual['resultados'].items():
+        anterior_tamanho = anterior.get('resultados', {}).get(tamanho)
+        if anterior_tamanho is None:
+            continue
+        partes = []
+        for grupo, chave, rotulo in metricas:
+            novo = resultado[grupo].get(chave)
+            velho = anterior_tamanho.get(grupo, {}).get(chave)
+            if novo is None or not velho:
+                continue
+            partes.append(f"{rotulo} {velho} -> {novo} ({(novo - velho) / velho * 100:+.1f}%)")
+        print(f"  {tamanho:>5} arquivos: " + "; ".join(partes))
+    partes = []
+    for cenario, medida in atual.get('importacao', {}).items():
+        velho = anterior.get('importacao', {}).get(cenario, {}).get('total_ms')
+        if velho:
+            novo = medida['total_ms']
+            partes.append(f"{cenario} {velho} -> {novo} ms ({(novo - velho) / velho * 100:+.1f}%)")
+    if partes:
+        print("  importação: " + "; ".join(partes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS))
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--workers', type=int, default=Config.MAX_WORKERS)
+    parser.add_argument('--corpus', default=PASTA_CORPUS, help='pasta onde os relatórios sintéticos ficam guardados')
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/suite_<data>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    resultado = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semente': args.semente,
+        'versao_corpus': VERSAO_CORPUS,
+        'config': {
+            'max_workers': args.workers,
+            'chunk_size': Config.CHUNK_SIZE,
+            'arquivos_por_worker': Config.ARQUIVOS_POR_WORKER,
+            'modo_fotos': Config.MODO_FOTOS,
+            'formato_planilha': Config.FORMATO_PLANILHA,
+            'pipeline_capacidade': Config.PIPELINE_CAPACIDADE,
+        },
+        'resultados': {},
+    }
+
+    print("Importação por camada:")
+    resultado['importacao'] = medir_importacao()
+    imprimir_importacao(resultado['importacao'])
+
+    for quantidade in args.tamanhos:
+        inicio = time.perf_counter()
+        caminhos = preparar_corpus(quantidade, args.semente, args.corpus)
+        print(f"{quantidade} arquivos (corpus pronto em {time.perf_counter() - inicio:.1f} s)")
+        medida = medir_em_processo_novo(caminhos, args.workers)
+        resultado['resultados'][str(quantidade)] = medida
+        latencia, vazao = medida['latencia'], medida['vazao']
+        print(f"  latência   p50 {latencia['p50_ms']:8.1f} ms  p95 {latencia['p95_ms']:8.1f} ms"
+              f"  máx {latencia['max_ms']:8.1f} ms")
+        print(f"  vazão      {vazao['arquivos_por_segundo']:8.2f} arquivos/s  {vazao['paginas_por_segundo']:8.1f} páginas/s"
+              f"  ({vazao['segundos']:.2f} s, {vazao['erros']} erro(s))")
+        print(f"  memória    pico {medida['memoria']['pico_processo_mib']:.1f} MiB no processo,"
+              f" {vazao['memoria_pico_total_mib']:.1f} MiB com os workers")
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"suite_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Cache persistente de extração por conteúdo.
+
+A chave é o SHA-256 dos bytes do PDF mais extracao.VERSAO_EXTRATOR, então
+o mesmo relatório reenviado (com qualquer nome) reaproveita o dicionário
+produzido por processar_pdf_individual. As entradas ficam em um SQLite em
+Config.CACHE_ARQUIVO, limitado a Config.CACHE_LIMITE_MB com remoção das
+entradas usadas há mais tempo (LRU).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+from extracao import VERSAO_EXTRATOR
+from fontes_pdf import mapear
+
+
+def hash_conteudo(fonte):
+    """SHA-256 (hex) do conteúdo de um PDF dado como caminho, bytes ou MembroZip, calculado
+    direto sobre o arquivo mapeado"""
+    with mapear(fonte) as dados:
+        return hashlib.sha256(dados).hexdigest()
+
+
+def chave_arquivo(fonte, modo_fotos=None, sha=None):
+    """SHA-256 do conteúdo (caminho do arquivo ou bytes) combinado com a versão do extrator
+    e o modo de detecção de fotos (o 'completo' também valida cada foto). Com sha (hash já
+    calculado por quem chamou) o PDF não é lido de novo."""
+    return f"{sha or hash_conteudo(fonte)}:{VERSAO_EXTRATOR}:{modo_fotos or Config.MODO_FOTOS}"
+
+
+class CacheExtracao:
+    """Cache LRU em disco dos dados extraídos de cada PDF, com contadores de acertos"""
+    
+    def __init__(self, caminho=None, limite_bytes=None):
+        self.caminho = caminho or Config.CACHE_ARQUIVO
+        self.limite_bytes = limite_bytes or Config.CACHE_LIMITE_MB * 1024 * 1024
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('''
+            CREATE TABLE IF NOT EXISTS extracoes (
+                chave TEXT PRIMARY KEY,
+                dados TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            )
+        ''')
+        self._conexao.execute('CREATE INDEX IF NOT EXISTS idx_extracoes_acesso ON extracoes(ultimo_acesso)')
+        
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self._tamanho_total = self._conexao.execute(
+            'SELECT COALESCE(SUM(tamanho), 0) FROM extracoes'
+        ).fetchone()[0]
+    
+    def obter(self, chave):
+        """Retorna o dicionário armazenado para a chave ou None (contabiliza acerto/falha)"""
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT dados FROM extracoes WHERE chave = ?', (chave,)
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+            self._conexao.execute(
+                'UPDATE extracoes SET ultimo_acesso = ? WHERE chave = ?', (time.time(), chave)
+            )
+        return json.loads(linha[0])
+    
+    def gravar(self, chave, dados):
+        """Armazena o resultado de uma extração bem-sucedida (registros de erro não são guardados)"""
+        if dados.get('RF') == 'ERRO':
+            return
+        conteudo = json.dumps(dados, ensure_ascii=False)
+        tamanho = len(conteudo.encode('utf-8'))
+        with self._lock:
+            anterior = self._conexao.execute(
+                'SELECT tamanho FROM extracoes WHERE chave = ?', (chave,)
+            ).fetchone()
+            self._conexao.execute(
+                'INSERT OR REPLACE INTO extracoes (chave, dados, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?)',
+                (chave, conteudo, tamanho, time.time())
+            )
+            self._tamanho_total += tamanho - (anterior[0] if anterior else 0)
+            if self._tamanho_total > self.limite_bytes:
+                self._remover_excedente()
+    
+    def _remover_excedente(self):
+        """Remove as entradas menos usadas até ficar em 90% do limite (chamado com o lock)"""
+        alvo = self.limite_bytes * 0.9
+        cursor = self._conexao.execute('SELECT chave, tamanho FROM extracoes ORDER BY ultimo_acesso')
+        removidas = []
+        for chave, tamanho in cursor:
+            if self._tamanho_total <= alvo:
+                break
+            removidas.append((chave,))
+            self._tamanho_total -= tamanho
+        cursor.close()
+        self._conexao.executemany('DELETE FROM extracoes WHERE chave = ?', removidas)
+        self.remocoes += len(removidas)
+    
+    def estatisticas(self):
+        with self._lock:
+            entradas = self._conexao.execute('SELECT COUNT(*) FROM extracoes').fetchone()[0]
+            consultas = self.acertos + self.falhas
+            return {
+                'entradas': entradas,
+                'tamanho_bytes': self._tamanho_total,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acertos': round(self.acertos / consultas, 3) if consultas else 0.0
+            }
+    
+    def limpar(self):
+        with self._lock:
+            self._conexao.execute('DELETE FROM extracoes')
+            self._tamanho_total = 0
+    
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+_cache_padrao = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache():
+    """Cache compartilhado pelo processo (None quando Config.CACHE_ATIVO é falso)"""
+    global _cache_padrao
+    if not Config.CACHE_ATIVO:
+        return None
+    with _cache_lock:
+        if _cache_padrao is None:
+            _cache_padrao = CacheExtracao()
+        return _cache_padrao
@@ -0,0 +1,229 @@
+"""Processamento em lote pela linha de comando, sem o Flask.
+
+Percorre pastas (recursivamente), arquivos e padrões glob, extrai e pontua os
+PDFs no pool de processos do MotorExtracao (todos os núcleos por padrão) pelo
+mesmo PipelineLote da aplicação web e grava a planilha e o relatório em PDF
+na pasta de saída. Os registros também vão para o banco de resultados.
+
+Cada registro pronto é acrescentado ao checkpoint (checkpoint.jsonl na pasta
+de saída) junto com o caminho, o tamanho e a data de modificação do PDF
+(registros de erro não entram, então esses PDFs são tentados de novo).
+Numa nova execução com a mesma pasta de saída, os arquivos já registrados e
+não modificados são pulados e os registros do checkpoint entram nas saídas
+sem nova extração: depois de uma interrupção o lote continua de onde parou,
+e uma execução noturna só processa os PDFs novos ou alterados.
+
+Uso: python cli.py pastas_ou_pdfs... [--saida PASTA] [--workers N]
+                   [--formato xlsx|csv|parquet] [--recomecar] [--sem-cache]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from config import Config
+from instrumentacao import configurar_log
+
+logger = logging.getLogger('cli')
+
+ARQUIVO_CHECKPOINT = 'checkpoint.jsonl'
+INTERVALO_PROGRESSO = 5.0  # segundos entre as linhas de progresso no log
+
+
+def encontrar_pdfs(entradas):
+    """Pares (caminho absoluto, nome) dos PDFs das pastas, arquivos e globs dados,
+    sem repetições. O nome é o caminho relativo à pasta de entrada, para que PDFs
+    homônimos em subpastas diferentes continuem distinguíveis."""
+    encontrados = {}
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = []
+            for raiz, pastas, arquivos in os.walk(entrada):
+                pastas.sort()
+                candidatos.extend(os.path.join(raiz, nome) for nome in sorted(arquivos))
+            base = entrada
+        else:
+            candidatos = sorted(glob.glob(entrada, recursive=True))
+            base = None
+        for caminho in candidatos:
+            if not caminho.lower().endswith('.pdf') or not os.path.isfile(caminho):
+                continue
+            absoluto = os.path.abspath(caminho)
+            if absoluto not in encontrados:
+                encontrados[absoluto] = os.path.relpath(caminho, base) if base else caminho
+    return list(encontrados.items())
+
+
+def identidade(caminho):
+    """Tamanho e data de modificação: um PDF alterado depois do checkpoint é reprocessado"""
+    estado = os.stat(caminho)
+    return estado.st_size, estado.st_mtime_ns
+
+
+class Checkpoint:
+    """Registros já processados de uma pasta de saída (uma linha JSON por PDF)"""
+
+    def __init__(self, caminho, recomecar=False):
+        from extracao import VERSAO_EXTRATOR
+
+        self.caminho = caminho
+        self.registros = {}  # caminho do PDF -> (tamanho, mtime, dados)
+        cabecalho = None
+        if os.path.exists(caminho) and not recomecar:
+            cabecalho = self._ler()
+            if cabecalho is not None and cabecalho.get('versao_extrator') != VERSAO_EXTRATOR:
+                logger.info("Checkpoint de outra versão do extrator (%s): recomeçando",
+                            cabecalho.get('versao_extrator'))
+                cabecalho = None
+                self.registros = {}
+
+        if cabecalho is None:
+            self.lote = uuid.uuid4().hex
+            self._arquivo = open(caminho, 'w', encoding='utf-8')
+            self._escrever({'lote': self.lote, 'versao_extrator': VERSAO_EXTRATOR, 'criado_em': time.time()})
+        else:
+            self.lote = cabecalho['lote']
+            self._arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def _ler(self):
+        cabecalho = None
+        with open(self.caminho, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    item = json.loads(linha)
+                except ValueError:
+                    # Última linha cortada por uma interrupção no meio da gravação
+                    continue
+                if cabecalho is None:
+                    cabecalho = item
+                    continue
+                self.registros[item['caminho']] = (item['tamanho'], item['mtime'], item['dados'])
+        return cabecalho
+
+    def _escrever(self, item):
+        self._arquivo.write(json.dumps(item, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+
+    def registrado(self, caminho):
+        """Dados do PDF se ele já está no checkpoint e não mudou desde então"""
+        registro = self.registros.get(caminho)
+        if registro is None:
+            return None
+        try:
+            if identidade(caminho) != tuple(registro[:2]):
+                return None
+        except OSError:
+            return None
+        return registro[2]
+
+    def gravar(self, caminho, tamanho_mtime, dados):
+        self.registros[caminho] = (*tamanho_mtime, dados)
+        self._escrever({'caminho': caminho, 'tamanho': tamanho_mtime[0], 'mtime': tamanho_mtime[1],
+                        'dados': dados})
+
+    def fechar(self):
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._arquivo.close()
+
+
+def processar(entradas, pasta_saida, max_workers=None, formato=None, recomecar=False, usar_cache=True):
+    """Processa os PDFs das entradas e grava planilha e relatório em pasta_saida.
+    Retorna o resumo da pontuação, ou None se nenhum PDF foi encontrado."""
+    from banco_resultados import obter_banco
+    from cache_extracao import obter_cache
+    from pipeline import PipelineLote
+    from pontuacao import pontuar, resumo_pontuacao
+    from processamento import MotorExtracao
+    from saidas import SaidasLote
+
+    pdfs = encontrar_pdfs(entradas)
+    if not pdfs:
+        return None
+
+    os.makedirs(pasta_saida, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(pasta_saida, ARQUIVO_CHECKPOINT), recomecar)
+    saidas = SaidasLote(pasta_saida, formato)
+    todos_dados = []
+    pendentes = {}  # caminho -> (nome, tamanho e mtime)
+    for caminho, nome in pdfs:
+        dados = checkpoint.registrado(caminho)
+        if dados is not None:
+            saidas.adicionar(dados)
+            todos_dados.append(dados)
+            continue
+        try:
+            pendentes[caminho] = (nome, identidade(caminho))
+        except OSError as e:
+            logger.error("Erro ao ler %s: %s", caminho, e)
+    logger.info("%d PDF(s) encontrado(s): %d já no checkpoint, %d a processar",
+                len(pdfs), len(todos_dados), len(pendentes))
+
+    temp_dir = tempfile.mkdtemp()
+    motor = MotorExtracao(max_workers=max_workers or os.cpu_count(),
+                          cache=obter_cache() if usar_cache else None)
+    try:
+        pipeline = PipelineLote(saidas, temp_dir, motor=motor, banco=obter_banco(), lote=checkpoint.lote)
+        arquivos = [(caminho, nome, temp_dir) for caminho, (nome, _) in pendentes.items()]
+        inicio = ultimo_progresso = time.perf_counter()
+        # Pelo caminho absoluto: o mesmo nome relativo pode vir de duas entradas
+        for processados, (args, dados) in enumerate(pipeline.executar(arquivos, com_args=True), 1):
+            if dados.get('RF') != 'ERRO':
+                checkpoint.gravar(args[0], pendentes[args[0]][1], dados)
+            todos_dados.append(dados)
+            agora = time.perf_counter()
+            if agora - ultimo_progresso >= INTERVALO_PROGRESSO:
+                ultimo_progresso = agora
+                logger.info("%d/%d arquivos (%.1f arquivos/s)", processados, len(arquivos),
+                            processados / (agora - inicio))
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        caminho_planilha = os.path.join(pasta_saida, f"dados_crea_rj_{timestamp}.{saidas.extensao}")
+        caminho_pdf = os.path.join(pasta_saida, f"relatorio_crea_rj_{timestamp}.pdf")
+        saidas.concluir(caminho_planilha, caminho_pdf)
+        logger.info("Planilha: %s", caminho_planilha)
+        logger.info("Relatório: %s", caminho_pdf)
+        logger.info("Tempos do lote: %s", pipeline.tempos.resumo())
+    finally:
+        saidas.cancelar()  # Sem efeito se o lote já foi concluído
+        checkpoint.fechar()
+        motor.encerrar()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return resumo_pontuacao(pontuar(todos_dados))
+
+
+def main(argv=None):
+    from planilha import formatos_disponiveis
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entradas', nargs='+', help='pastas (percorridas recursivamente), PDFs ou globs ("**/*.pdf")')
+    parser.add_argument('--saida', default='resultados_cli', help='pasta das saídas e do checkpoint')
+    parser.add_argument('--workers', type=int, default=None, help='processos de extração (padrão: todos os núcleos)')
+    parser.add_argument('--formato', default=None, choices=formatos_disponiveis(),
+                        help=f'formato da planilha (padrão: {Config.FORMATO_PLANILHA})')
+    parser.add_argument('--recomecar', action='store_true', help='ignora o checkpoint e processa tudo de novo')
+    parser.add_argument('--sem-cache', action='store_true', help='não usa o cache de extração')
+    args = parser.parse_args(argv)
+
+    configurar_log(Config.NIVEL_LOG)
+    try:
+        resumo = processar(args.entradas, args.saida, args.workers, args.formato, args.recomecar, not args.sem_cache)
+    except KeyboardInterrupt:
+        logger.warning("Interrompido: o mesmo comando continua a partir do checkpoint em %s", args.saida)
+        return 130
+    if resumo is None:
+        logger.error("Nenhum PDF encontrado em: %s", ' '.join(args.entradas))
+        return 1
+    print(json.dumps(resumo, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,7 +4,7 @@ class Config:
     SECRET_KEY = 'crea-rj-secret-key-2025'
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB - AUMENTADO
-    ALLOWED_EXTENSIONS = {'pdf'}
+    ALLOWED_EXTENSIONS = {'pdf', 'zip'}
     
     # Configurações de processamento
     TABELA_PONTUACAO = {
@@ -30,4 +30,65 @@ class Config:
     
     # Otimizações para grandes volumes
     CHUNK_SIZE = 10  # Processar 10 PDFs por vez
-    MAX_WORKERS = 4   # Número máximo de processos paralelos
\ No newline at end of file
+    MAX_WORKERS = int(os.environ.get('MAX_WORKERS', 4))   # Número máximo de processos paralelos
+    ARQUIVOS_POR_WORKER = 100  # Reciclar o processo worker após N arquivos (memória do pdfminer)
+    
+    # Controle de memória do motor (0 desativa cada limite)
+    # Workers que terminam um lote acima deste RSS fazem o pool ser recriado
+    MEMORIA_WORKER_LIMITE_MB = int(os.environ.get('MEMORIA_WORKER_LIMITE_MB', 1024))
+    # Soma do tamanho dos PDFs enviados aos workers e ainda não devolvidos (todos os lotes)
+    MEMORIA_EM_VOO_MB = int(os.environ.get('MEMORIA_EM_VOO_MB', 256))
+    
+    # Prazo por PDF (0 desativa): passado PRAZO_ARQUIVO_S o worker interrompe a leitura e
+    # devolve um registro de erro; se o PDF estiver preso em código C, o processo é
+    # encerrado à força PRAZO_MARGEM_S segundos depois
+    PRAZO_ARQUIVO_S = float(os.environ.get('PRAZO_ARQUIVO_S', 60))
+    PRAZO_MARGEM_S = 15
+    
+    # Faixa lenta: PDFs acima destes limites (e os de um lote cujo worker morreu) são lidos
+    # um a um, cada um num processo próprio, sem ocupar o pool de workers. As páginas não
+    # são contadas em membros de ZIP comprimidos (só o tamanho descompactado vale)
+    FAIXA_LENTA_MB = 20
+    FAIXA_LENTA_PAGINAS = 300
+    FAIXA_LENTA_PROCESSOS = 1
+    
+    # Tarefas assíncronas (/tarefas)
+    TAREFAS_SIMULTANEAS = 2  # Lotes processados ao mesmo tempo (os demais aguardam na fila)
+    TAREFAS_RETENCAO = 3600  # Segundos que uma tarefa concluída fica disponível para consulta
+    
+    # Cache de extração por conteúdo (SHA-256 do PDF)
+    CACHE_ATIVO = os.environ.get('CACHE_ATIVO', '1') != '0'
+    CACHE_ARQUIVO = os.path.join('cache', 'extracao.sqlite3')
+    CACHE_LIMITE_MB = 256  # Acima disso as entradas usadas há mais tempo são removidas
+    
+    # Banco persistente dos registros extraídos (consultas por agente, RF e período)
+    BANCO_ATIVO = os.environ.get('BANCO_ATIVO', '1') != '0'
+    BANCO_ARQUIVO = os.environ.get('BANCO_ARQUIVO', os.path.join('dados', 'resultados.sqlite3'))
+    
+    # Detecção de fotos: 'contagem' conta as fotos válidas pelos metadados das imagens, sem
+    # gravá-las; 'completo' grava e valida cada foto
+    MODO_FOTOS = os.environ.get('MODO_FOTOS', 'contagem')
+    
+    # Extração de texto: 'dirigido' só extrai o texto até a página que abre a seção
+    # 08 - Fotos (as seguintes passam apenas pela varredura de imagens) e volta ao
+    # 'completo' (texto de todas as páginas) quando faltam os marcos das seções
+    MODO_TEXTO = os.environ.get('MODO_TEXTO', 'dirigido')
+    
+    # Leitura de cada página (backends_texto.py): 'pdfminer' monta o texto direto do
+    # content stream; 'pdfplumber' (extract_text) é a referência. Os dois extraem os mesmos
+    # campos (tests/test_backends_texto.py)
+    BACKEND_TEXTO = os.environ.get('BACKEND_TEXTO', 'pdfminer')
+    
+    # Exportação opcional das fotos em ZIP (marcada no envio do lote)
+    FOTOS_MINIATURA_PX = 1280  # Maior lado das miniaturas JPEG
+    FOTOS_MINIATURA_QUALIDADE = 80
+    
+    # Planilha de dados do lote: 'xlsx', 'csv' ou 'parquet' (Parquet requer pyarrow)
+    FORMATO_PLANILHA = os.environ.get('FORMATO_PLANILHA', 'xlsx')
+    
+    # Execução em estágios (pipeline.py)
+    PIPELINE_CAPACIDADE = 64  # Registros por fila entre estágios
+    PIPELINE_BLOCO_PONTUACAO = 200  # Máximo de registros pontuados de uma vez
+    
+    # Nível do log (DEBUG mostra os detalhes de cada arquivo extraído)
+    NIVEL_LOG = os.environ.get('NIVEL_LOG', 'INFO').upper()
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Exportação opcional das fotos de um lote para um arquivo ZIP.
+
+Quando solicitada no envio, os PDFs são extraídos no modo 'completo' e, à
+medida que cada resultado chega, as fotos gravadas pelo worker são passadas
+a um ExportadorFotos. A leitura, a deduplicação por SHA-256 (a mesma foto da
+obra costuma aparecer em RFs consecutivos) e as miniaturas JPEG opcionais
+rodam em um pool de threads, em paralelo à extração e à geração do Excel e
+do PDF; concluir() só espera o que ainda falta antes de fechar o ZIP. O PIL
+só é importado quando há miniaturas a gerar. Cada PDF tem a sua pasta no ZIP
+(nome_pasta_fotos, numerada pela posição no lote), então arquivos com o mesmo
+nome não se misturam e indice.csv aponta para a foto certa.
+"""
+import csv
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import Config
+from extracao import nome_pasta_fotos, pasta_fotos
+
+
+def gerar_miniatura(conteudo, lado, qualidade):
+    """JPEG reduzido para caber em lado x lado (JPEGs são decodificados já reduzidos)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(conteudo)) as img:
+        img.draft('RGB', (lado, lado))
+        img = img.convert('RGB')
+        img.thumbnail((lado, lado))
+        saida = io.BytesIO()
+        img.save(saida, 'JPEG', quality=qualidade, optimize=True)
+    return saida.getvalue()
+
+
+class ExportadorFotos:
+    """Grava no ZIP, sem repetir conteúdo, as fotos extraídas de cada PDF do lote"""
+
+    def __init__(self, caminho_zip, miniaturas=False, lado_miniatura=None, qualidade=None, max_workers=None):
+        self.caminho = caminho_zip
+        self.miniaturas = miniaturas
+        self.lado_miniatura = lado_miniatura or Config.FOTOS_MINIATURA_PX
+        self.qualidade = qualidade or Config.FOTOS_MINIATURA_QUALIDADE
+        self.fotos = 0
+        self.duplicadas = 0
+        self.falhas = 0
+        self._zip = zipfile.ZipFile(caminho_zip, 'w')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or Config.MAX_WORKERS,
+                                            thread_name_prefix='exportacao_fotos')
+        self._lock = threading.Lock()
+        self._futuros = []
+        self._nomes = {}  # sha256 -> nome no ZIP
+        self._indice = []  # (arquivo_pdf, foto, sha256)
+        self._concluido = False
+
+    def adicionar(self, temp_dir, arquivo_pdf, pasta=None):
+        """Agenda a exportação das fotos gravadas para arquivo_pdf (retorna sem esperar).
+        pasta é a que o worker recebeu (nome_pasta_fotos); por padrão, a do nome do arquivo."""
+        pasta = pasta or nome_pasta_fotos(arquivo_pdf)
+        diretorio = pasta_fotos(temp_dir, pasta)
+        if not os.path.isdir(diretorio):
+            return
+        for foto in sorted(os.listdir(diretorio)):
+            self._futuros.append(self._executor.submit(
+                self._exportar, os.path.join(diretorio, foto), arquivo_pdf, pasta, foto))
+
+    def _exportar(self, caminho, arquivo_pdf, pasta, foto):
+        try:
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+        except OSError:
+            with self._lock:
+                self.falhas += 1
+            return
+
+        sha = hashlib.sha256(conteudo).hexdigest()
+        with self._lock:
+            self._indice.append((arquivo_pdf, foto, sha))
+            if sha in self._nomes:
+                self.duplicadas += 1
+                return
+            # Reserva o conteúdo antes de gerar a miniatura para não repetir o trabalho
+            self._nomes[sha] = None
+
+        base, extensao = os.path.splitext(foto)
+        if self.miniaturas:
+            try:
+                miniatura = gerar_miniatura(conteudo, self.lado_miniatura, self.qualidade)
+                if len(miniatura) < len(conteudo) or extensao != '.jpg':
+                    conteudo, extensao = miniatura, '.jpg'
+            except Exception:
+                pass  # Mantém a foto original
+
+        nome = f"{pasta}/{base}{extensao}"
+        with self._lock:
+            if nome in self._nomes.values():
+                nome = f"{pasta}/{base}_{sha[:8]}{extensao}"
+            self._nomes[sha] = nome
+            # Fotos já são comprimidas: armazenar sem recompressão
+            self._zip.writestr(nome, conteudo, compress_type=zipfile.ZIP_STORED)
+            self.fotos += 1
+
+    def concluir(self):
+        """Espera as fotos pendentes, grava indice.csv e fecha o ZIP. Retorna as estatísticas."""
+        if not self._concluido:
+            wait(self._futuros)
+            self._executor.shutdown(wait=True)
+
+            indice = io.StringIO()
+            escritor = csv.writer(indice)
+            escritor.writerow(['arquivo_pdf', 'foto', 'arquivo_no_zip', 'sha256'])
+            for arquivo_pdf, foto, sha in self._indice:
+                escritor.writerow([arquivo_pdf, foto, self._nomes.get(sha) or '', sha])
+            self._zip.writestr('indice.csv', indice.getvalue())
+            self._zip.close()
+            self._concluido = True
+
+        return {
+            'fotos': self.fotos,
+            'duplicadas': self.duplicadas,
+            'falhas': self.falhas,
+            'tamanho_bytes': os.path.getsize(self.caminho)
+        }
+
+    def cancelar(self):
+        """Interrompe a exportação e remove o ZIP incompleto"""
+        if self._concluido:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._zip.close()
+        self._concluido = True
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
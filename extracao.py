@@ -0,0 +1,589 @@
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from io import BytesIO
+from datetime import datetime
+from config import Config
+from fontes_pdf import abrir_fluxo
+from instrumentacao import METRICAS, cronometro
+
+# pdfplumber/pdfminer (backends_texto) e PIL são importados nas funções que os usam:
+# o processo web importa este módulo só pelos regexes, VERSAO_EXTRATOR e registro_erro.
+# Os workers já nascem com eles carregados (ver processamento.PRECARGA_WORKERS).
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que uma mudança na extração alterar os dados produzidos
+# (invalida o cache de extração, ver cache_extracao.py)
+VERSAO_EXTRATOR = '2'
+
+# Títulos das seções usadas na pontuação (comparados sem diferenciar maiúsculas)
+TITULOS_SECOES = {
+    '04': "04 - Identificação dos Contratados, Responsáveis Técnicos e/ou Fiscalizados",
+    '05': "05 - Documentos Solicitados / Expedidos",
+    '06': "06 - Documentos Recebidos",
+    '07': "07 - Outras Informações"
+}
+
+# Padrões pré-compilados (compilados uma vez por processo, não a cada PDF)
+# Cabeçalho numerado "NN - X": a busca parte do hífen (literal, varredura rápida)
+# e os dois dígitos anteriores são conferidos em _limites_secoes
+PADRAO_HIFEN_SECAO = re.compile(r'-\s*[A-Z]', re.IGNORECASE)
+PADROES_TITULOS_SECOES = {
+    numero: re.compile(re.escape(titulo), re.IGNORECASE) for numero, titulo in TITULOS_SECOES.items()
+}
+PADRAO_INICIO_SECAO_04 = re.compile(
+    r'04\s*-\s*Identificação dos Contratados, Responsáveis Técnicos e/ou Fiscalizados', re.IGNORECASE
+)
+PADRAO_INICIO_SECAO_05 = re.compile(r'05\s*-\s*Documentos Solicitados', re.IGNORECASE)
+PADRAO_INFO_AUSENTE = re.compile(r'^(SEM|NAO|NÃO|NAO INFORMADO|SEM INFORMAÇÃO)\s*[A-Z]*\s*$', re.IGNORECASE)
+PADRAO_NOME_AGENTE = re.compile(r'\d+\s*-\s*([A-Za-zÀ-ÿ\s]+)')
+PADROES_CAMPOS_BASICOS = [
+    ('RF', re.compile(r'Número\s*:\s*([^\n]+)')),
+    ('Situação', re.compile(r'Situação\s*:\s*([^\n]+)')),
+    ('Fiscal', re.compile(r'Agente\s+de\s+Fiscalização\s*:\s*([^\n]+)')),
+    ('Data', re.compile(r'Data\s+Relatório\s*:\s*([^\n]+)')),
+    ('Fato_Gerador', re.compile(r'Fato\s+Gerador\s*:\s*([^\n]+)')),
+    ('Protocolo', re.compile(r'Protocolo\s*:\s*([^\n]+)'))
+]
+PADRAO_DATA = re.compile(r'(\d{2}/\d{2}/\d{4})')
+PADRAO_RF_PRINCIPAL = re.compile(r'RF Principal\s*:\s*(\d+)', re.IGNORECASE)
+PADRAO_RAMO_ATIVIDADE = re.compile(r'Ramo\s+Atividade\s*:', re.IGNORECASE)
+# Equivalente às buscas por "ofício", "of.", "ofc", "oficio" e "of 123"/"of-123"
+PADRAO_OFICIO = re.compile(r'of(?:[ií]cio|\.|c|[\s\-]?[0-9])', re.IGNORECASE)
+PADRAO_COPIA_ART = re.compile(r'c[óo]pia\s+art', re.IGNORECASE)
+PADRAO_NUMERO_PROTOCOLO = re.compile(r'(?:PROCESSO|PROTOCOLO)[/\s]*(\d+)', re.IGNORECASE)
+PADRAO_DATA_ART = re.compile(r'OUTROS\s*[-\s]*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+PADRAO_DATA_ART_ALTERNATIVO = re.compile(r'OUTROS[^\d]*(\d{2}/\d{2}/\d{4})', re.IGNORECASE)
+PADRAO_DATA_RELATORIO_ANTERIOR = re.compile(
+    r'Data\s+do\s+Relat[óo]rio\s+Anterior\s*:\s*(\d{2}/\d{2}/\d{4})', re.IGNORECASE
+)
+PADRAO_INFO_COMPLEMENTARES = re.compile(
+    r'Informações\s+Complementares\s*:\s*[^(]*\(([^)]+)\)', re.IGNORECASE | re.DOTALL
+)
+
+def clean_text(text):
+    """Limpa texto removendo espaços extras e normalizando"""
+    if not text:
+        return ''
+    text = str(text).replace('\n', ' ').strip()
+    return ' '.join(text.split())
+
+def is_empty_info(text):
+    """Verifica se o texto indica informação ausente"""
+    if not text or str(text).strip() == '':
+        return True
+    return bool(PADRAO_INFO_AUSENTE.search(str(text).strip()))
+
+def extrair_nome_completo_agente(texto_fiscal):
+    """Obtém o nome completo do agente de fiscalização"""
+    if not texto_fiscal:
+        return ""
+    
+    match = PADRAO_NOME_AGENTE.match(texto_fiscal)
+    if match:
+        return match.group(1).strip()
+    return texto_fiscal
+
+def _limites_secoes(texto):
+    """Posições onde r'\\d{2}\\s*-\\s*[A-Z]' (IGNORECASE) casaria, em ordem crescente"""
+    limites = []
+    for match in PADRAO_HIFEN_SECAO.finditer(texto):
+        inicio = match.start()
+        while inicio > 0 and texto[inicio - 1].isspace():
+            inicio -= 1
+        # isdecimal/isspace correspondem a \d e \s das regexes em str
+        if inicio >= 2 and texto[inicio - 1].isdecimal() and texto[inicio - 2].isdecimal():
+            limites.append(inicio - 2)
+    return limites
+
+def dividir_secoes(texto):
+    """Divide o texto nas seções 04 a 07 com uma única varredura dos cabeçalhos "NN - X".
+    
+    Cada seção vai do seu título até o próximo cabeçalho numerado (mesmo
+    recorte da antiga extração seção a seção). 'ramos_04' é o trecho da seção 04 até
+    "05 - Documentos Solicitados", usado na contagem de ações.
+    """
+    secoes = dict.fromkeys(TITULOS_SECOES)
+    secoes['ramos_04'] = None
+    if not texto:
+        return secoes
+    
+    # Todo título de seção começa em um limite "NN - X", então basta testar os limites
+    limites = _limites_secoes(texto)
+    pendentes = dict(PADROES_TITULOS_SECOES)
+    fim_ramos_04 = len(texto)
+    
+    for indice, posicao in enumerate(limites):
+        numero = texto[posicao:posicao + 2]
+        
+        padrao = pendentes.get(numero)
+        if padrao is not None:
+            match = padrao.match(texto, posicao)
+            if match:
+                del pendentes[numero]
+                proximo = bisect_left(limites, match.end(), indice + 1)
+                fim = limites[proximo] if proximo < len(limites) else len(texto)
+                conteudo = texto[match.end():fim].strip()
+                secoes[numero] = None if is_empty_info(conteudo) else conteudo
+        
+        if numero == '04' and secoes['ramos_04'] is None:
+            match = PADRAO_INICIO_SECAO_04.match(texto, posicao)
+            if match:
+                inicio_ramos_04 = match.end()
+                for posicao_05 in limites[bisect_left(limites, inicio_ramos_04, indice + 1):]:
+                    if PADRAO_INICIO_SECAO_05.match(texto, posicao_05):
+                        fim_ramos_04 = posicao_05
+                        break
+                secoes['ramos_04'] = texto[inicio_ramos_04:fim_ramos_04]
+    
+    return secoes
+
+def extrair_campos_basicos(texto):
+    campos = {}
+    
+    # Os campos do cabeçalho aparecem antes das seções, então a busca para cedo
+    for campo, padrao in PADROES_CAMPOS_BASICOS:
+        try:
+            match = padrao.search(texto)
+            campos[campo] = clean_text(match.group(1)) if match else ''
+        except Exception:
+            campos[campo] = ''
+    
+    # Formatar data no padrão DD/MM/AAAA
+    if campos.get('Data'):
+        match_data = PADRAO_DATA.search(campos['Data'])
+        if match_data:
+            # Garantir formato DD/MM/AAAA
+            data_str = match_data.group(1)
+            try:
+                data_obj = datetime.strptime(data_str, '%d/%m/%Y')
+                campos['Data'] = data_obj.strftime('%d/%m/%Y')
+            except ValueError:
+                campos['Data'] = data_str
+    
+    return campos
+
+def extrair_rf_principal(texto):
+    """Extrai o RF Principal do texto"""
+    if not texto:
+        return ''
+    
+    match = PADRAO_RF_PRINCIPAL.search(texto)
+    if match:
+        return match.group(1)
+    return ''
+
+def contar_ramos_atividade(trecho_secao_04):
+    """Conta 'Ramo Atividade :' no trecho da seção 04 (ver dividir_secoes)"""
+    if not trecho_secao_04:
+        return 0
+    return len(PADRAO_RAMO_ATIVIDADE.findall(trecho_secao_04))
+
+def verificar_oficio(texto):
+    """Verifica se contém registros de ofício no texto (retorna 1 se sim, 0 se não)"""
+    if not texto or is_empty_info(texto):
+        return 0
+    
+    return 1 if PADRAO_OFICIO.search(str(texto)) else 0
+
+def verificar_resposta_oficio(texto):
+    """Verifica se contém 'Cópia ART' no texto (retorna 1 se sim, 0 se não)"""
+    if not texto or is_empty_info(texto):
+        return 0
+    
+    return 1 if PADRAO_COPIA_ART.search(str(texto)) else 0
+
+def extrair_numero_protocolo(texto):
+    """Extrai apenas o número do protocolo do campo Fato Gerador"""
+    if not texto:
+        return ''
+    
+    match = PADRAO_NUMERO_PROTOCOLO.search(texto)
+    if match:
+        return match.group(1)
+    return ''
+
+def extrair_data_art(texto):
+    """Extrai a data da ART da seção 06 - Documentos Recebidos, item 'Outros'"""
+    if not texto or is_empty_info(texto):
+        return ''
+    
+    # Padrão melhorado para encontrar data no formato "OUTROS - DD/MM/AAAA"
+    match = PADRAO_DATA_ART.search(texto)
+    
+    if match:
+        data_encontrada = match.group(1)
+        
+        # Validar se é uma data válida e garantir formato DD/MM/AAAA
+        try:
+            datetime.strptime(data_encontrada, '%d/%m/%Y')
+            return data_encontrada
+        except ValueError:
+            return ''
+    
+    # Tentativa alternativa com padrão mais flexível
+    match_alt = PADRAO_DATA_ART_ALTERNATIVO.search(texto)
+    
+    if match_alt:
+        data_encontrada = match_alt.group(1)
+        
+        # Validar se é uma data válida e garantir formato DD/MM/AAAA
+        try:
+            datetime.strptime(data_encontrada, '%d/%m/%Y')
+            return data_encontrada
+        except ValueError:
+            return ''
+    
+    return ''
+
+def extrair_data_relatorio_anterior(texto):
+    """CORREÇÃO: Extrai a data do relatório anterior da seção 07 - Outras Informações"""
+    if not texto or is_empty_info(texto):
+        return ''
+    
+    # Padrão para encontrar data no formato DD/MM/AAAA
+    match = PADRAO_DATA_RELATORIO_ANTERIOR.search(texto)
+    
+    if match:
+        data_encontrada = match.group(1)
+        
+        # Validar se é uma data válida
+        try:
+            datetime.strptime(data_encontrada, '%d/%m/%Y')
+            return data_encontrada
+        except ValueError:
+            return ''
+    
+    return ''
+
+def extrair_informacoes_complementares(texto):
+    """Extrai exclusivamente o texto entre parênteses da seção Informações Complementares"""
+    if not texto or is_empty_info(texto):
+        return ''
+    
+    # Busca específica pelo padrão "Informações Complementares :" seguido de texto entre parênteses
+    match = PADRAO_INFO_COMPLEMENTARES.search(texto)
+    
+    if match:
+        return clean_text(match.group(1))
+    
+    return ''
+
+def abrir_pdf(fonte):
+    """Abre um PDF a partir de um caminho (mapeado só para leitura), do conteúdo em bytes ou
+    de um membro de ZIP (fontes_pdf.py). O mapeamento é liberado ao fechar o PDF."""
+    import pdfplumber
+
+    fluxo = abrir_fluxo(fonte)
+    try:
+        return pdfplumber.PDF(fluxo, stream_is_external=False)
+    except BaseException:
+        fluxo.close()
+        raise
+
+PADRAO_SECAO_FOTOS = re.compile(r'08\s*[-]?\s*Fotos', re.IGNORECASE)
+
+# Extensão pelo formato real identificado pelo PIL (o stream é gravado como está)
+EXTENSOES_FOTOS = {'JPEG': '.jpg', 'JPEG2000': '.jp2', 'PNG': '.png', 'TIFF': '.tif'}
+
+def nome_pasta_fotos(filename, indice=None):
+    """Nome da pasta das fotos de um PDF; com o índice do arquivo no lote, uploads ou
+    membros de ZIP com o mesmo nome não dividem a pasta"""
+    base = os.path.splitext(os.path.basename(filename))[0]
+    return base if indice is None else f"{indice:05d}_{base}"
+
+def pasta_fotos(temp_dir, nome):
+    """Pasta onde o modo 'completo' grava as fotos de um PDF (nome: ver nome_pasta_fotos)"""
+    return os.path.join(temp_dir, "fotos", nome)
+
+def salvar_fotos_paginas(paginas, fotos_dir):
+    """Grava as imagens válidas de uma sequência de (índice da página, lista de imagens)"""
+    from PIL import Image
+
+    fotos_extraidas = []
+    
+    for page_num, imagens in paginas:
+        for img in imagens:
+            try:
+                # Filtro para evitar logos pequenos
+                if img.get('width', 0) < 100 or img.get('height', 0) < 100:
+                    continue
+                    
+                if 'stream' in img:
+                    img_data = img['stream'].get_data()
+                    if img_data and len(img_data) > 1000:
+                        # Verificar se a imagem é válida antes de gravar
+                        try:
+                            with Image.open(BytesIO(img_data)) as test_img:
+                                formato = test_img.format
+                                test_img.verify()
+                        except Exception:
+                            continue
+                        
+                        extensao = EXTENSOES_FOTOS.get(formato, f".{(formato or 'bin').lower()}")
+                        img_name = f"foto_{len(fotos_extraidas) + 1}_pag{page_num + 1}{extensao}"
+                        img_path = os.path.join(fotos_dir, img_name)
+                        
+                        with open(img_path, "wb") as f:
+                            f.write(img_data)
+                        fotos_extraidas.append(img_path)
+            except Exception:
+                continue
+    
+    return fotos_extraidas
+
+# Filtros cujo stream já é um arquivo de imagem (JPEG/JPEG 2000) que o PIL reconhece;
+# streams Flate/CCITT/JBIG2 viram pixels crus e são descartados por salvar_fotos_paginas
+FILTROS_FOTO = {'DCTDecode', 'DCT', 'JPXDecode'}
+
+def foto_qualificada(img):
+    """Aplica os critérios de salvar_fotos_paginas só com os metadados do XObject
+    (dimensões, filtro e /Length declarado), sem ler nem decodificar o stream"""
+    from pdfminer.pdftypes import resolve1
+
+    if img.get('width', 0) < 100 or img.get('height', 0) < 100:
+        return False
+    stream = img.get('stream')
+    if stream is None:
+        return False
+    filtros = stream.get_filters()
+    if not filtros or getattr(filtros[-1][0], 'name', None) not in FILTROS_FOTO:
+        return False
+    tamanho = resolve1(stream.attrs.get('Length'))
+    if not isinstance(tamanho, int):
+        tamanho = len(stream.rawdata or stream.data or b'')
+    return tamanho > 1000
+
+def contar_fotos_paginas(paginas):
+    """Conta as fotos válidas de (índice da página, lista de imagens) sem gravar nada.
+    Percorre todas as páginas (Fotos_Extraidas guarda o total, não só se há fotos), então
+    cada página da seção 08 passa pela varredura de imagens."""
+    quantidade = 0
+    for _, imagens in paginas:
+        for img in imagens:
+            try:
+                if foto_qualificada(img):
+                    quantidade += 1
+            except Exception:
+                continue
+    return quantidade
+
+def _imagens_sob_demanda(pdf, pagina):
+    """Adia a varredura de imagens da página até que as fotos sejam percorridas (depois
+    do eventual fallback de texto); contar ou gravar as fotos percorre todas"""
+    from backends_texto import imagens_sem_texto
+
+    with cronometro('imagens_sem_texto'):
+        imagens = imagens_sem_texto(pdf, pagina)
+    yield from imagens
+
+def marcos_presentes(texto):
+    """Confere se o texto tem o cabeçalho (Número) e os títulos das seções 04 a 07"""
+    return (PADROES_CAMPOS_BASICOS[0][1].search(texto) is not None
+            and all(padrao.search(texto) for padrao in PADROES_TITULOS_SECOES.values()))
+
+def ler_pdf_passagem_unica(pdf_path, temp_dir, filename, modo_fotos=None, modo_texto=None, backend_texto=None,
+                           pasta=None):
+    """Abre o PDF uma única vez: extrai o texto de cada página e localiza a seção
+    08 - Fotos. No modo 'completo' grava as fotos em temp_dir; no modo 'contagem'
+    conta as fotos pelos metadados, sem gravá-las. Retorna (texto, quantidade_fotos)
+    
+    No modo de texto 'dirigido' as páginas posteriores à que abre a seção 08 só
+    passam pela varredura de imagens, que interpreta cada uma delas em qualquer
+    modo de fotos (a contagem é exata); o que se poupa é a extração do texto. Se o
+    texto lido até ali não tiver os marcos (Número e seções 04 a 07), o texto dessas
+    páginas também é extraído, como no modo 'completo'. O texto e as imagens de cada página vêm do backend_texto
+    (backends_texto.py)."""
+    from backends_texto import obter_backend
+
+    modo_fotos = modo_fotos or Config.MODO_FOTOS
+    modo_texto = modo_texto or Config.MODO_TEXTO
+    ler_pagina = obter_backend(backend_texto)
+    
+    textos_paginas = []
+    imagens_paginas = []
+    paginas_sem_texto = []
+    pagina_inicio_fotos = None
+    
+    with cronometro('abertura_pdf'):
+        pdf = abrir_pdf(pdf_path)
+        paginas = pdf.pages
+    
+    with pdf:
+        inicio_leitura = time.perf_counter()
+        for page_num, pagina in enumerate(paginas):
+            if pagina_inicio_fotos is not None and modo_texto == 'dirigido':
+                # Depois do título da seção 08 só há fotos: nenhuma análise de texto
+                paginas_sem_texto.append(page_num)
+                imagens_paginas.append((page_num, _imagens_sob_demanda(pdf, pagina)))
+                continue
+            
+            with cronometro('extract_text'):
+                texto_pagina, imagens = ler_pagina(pdf, pagina)
+            # Layout e objetos da página não são mais usados: liberados antes da próxima
+            pagina.flush_cache()
+            textos_paginas.append(texto_pagina)
+            
+            if pagina_inicio_fotos is None and PADRAO_SECAO_FOTOS.search(texto_pagina):
+                pagina_inicio_fotos = page_num
+            
+            # Apenas metadados; os streams só são lidos depois de saber onde começam as fotos
+            imagens_paginas.append((page_num, imagens))
+        
+        if paginas_sem_texto and not marcos_presentes("\n".join(textos_paginas)):
+            # Marcos ausentes (ex.: "08 - Fotos" em um sumário): texto de todas as páginas
+            logger.debug("%s: marcos ausentes, extraindo o texto de todas as páginas", filename)
+            with cronometro('extract_text_fallback'):
+                for page_num in paginas_sem_texto:
+                    textos_paginas.append(ler_pagina(pdf, paginas[page_num])[0])
+                    paginas[page_num].flush_cache()
+        
+        duracao_leitura = time.perf_counter() - inicio_leitura
+        # Páginas abertas, inclusive as que no modo 'dirigido' só passam pela varredura de fotos
+        METRICAS.observar('paginas_arquivo', len(paginas))
+        if paginas and duracao_leitura > 0:
+            METRICAS.observar('paginas_por_segundo', len(paginas) / duracao_leitura)
+        
+        # Sem a seção 08 - Fotos, todas as páginas são consideradas (mesmo comportamento anterior)
+        inicio = pagina_inicio_fotos if pagina_inicio_fotos is not None else 0
+        with cronometro('fotos'):
+            try:
+                if modo_fotos == 'completo':
+                    fotos_dir = pasta_fotos(temp_dir, pasta or nome_pasta_fotos(filename))
+                    os.makedirs(fotos_dir, exist_ok=True)
+                    quantidade_fotos = len(salvar_fotos_paginas(imagens_paginas[inicio:], fotos_dir))
+                else:
+                    quantidade_fotos = contar_fotos_paginas(imagens_paginas[inicio:])
+            except Exception:
+                quantidade_fotos = 0
+    
+    return "\n".join(textos_paginas), quantidade_fotos
+
+def determinar_regularizacao(data_art, data_relatorio_anterior):
+    """CORREÇÃO: Determina se houve regularização baseado nas datas"""
+    if not data_art or not data_relatorio_anterior:
+        return 'NÃO'
+    
+    try:
+        # Converter strings para objetos datetime
+        data_art_dt = datetime.strptime(data_art, '%d/%m/%Y')
+        data_rel_ant_dt = datetime.strptime(data_relatorio_anterior, '%d/%m/%Y')
+        
+        # Se a data da ART for igual ou posterior à data do relatório anterior = SIM
+        if data_art_dt >= data_rel_ant_dt:
+            return 'SIM'
+        else:
+            return 'NÃO'
+    except ValueError:
+        # Em caso de erro no parsing das datas
+        return 'NÃO'
+
+def registro_erro(filename, motivo="Erro no processamento"):
+    """Registro padrão para arquivos que não puderam ser processados"""
+    return {
+        'Nome_Arquivo': filename,
+        'RF': 'ERRO',
+        'Fiscal': motivo,
+        'Fiscal_Nome_Completo': '',
+        'Data': '',
+        'Acoes': 0,
+        'Oficio': 0,
+        'Resposta_Oficio': 0,
+        'Fotos_Extraidas': 0,
+        'Status_Fotos': 'NÃO',
+        'Fotos': 'Erro no processamento',
+        'Regularizacao': 'NÃO',
+        'Data_ART': '',
+        'Data_Relatorio_Anterior': '',
+        'Informacoes_Complementares': ''
+    }
+
+def extrair_dados_texto(texto, filename):
+    """Extrai todos os campos de pontuação do texto de um relatório (sem as fotos)"""
+    dados = extrair_campos_basicos(texto)
+    dados['Nome_Arquivo'] = filename
+    dados['RF_Principal'] = extrair_rf_principal(texto)
+    dados['Protocolo'] = extrair_numero_protocolo(dados.get('Fato_Gerador', ''))
+    
+    # Extrair nome completo do agente
+    if dados.get('Fiscal'):
+        dados['Fiscal_Nome_Completo'] = extrair_nome_completo_agente(dados['Fiscal'])
+    else:
+        dados['Fiscal_Nome_Completo'] = ''
+    
+    # Valores padrão
+    dados['Acoes'] = 0
+    dados['Oficio'] = 0
+    dados['Resposta_Oficio'] = 0
+    dados['Regularizacao'] = 'NÃO'
+    dados['Fotos_Extraidas'] = 0
+    dados['Status_Fotos'] = 'NÃO'
+    dados['Fotos'] = 'Nenhuma foto extraída'
+    dados['Data_ART'] = ''
+    dados['Data_Relatorio_Anterior'] = ''
+    dados['Informacoes_Complementares'] = ''  # NOVO CAMPO
+    
+    # Processar seções específicas (uma única varredura do texto)
+    secoes = dividir_secoes(texto)
+    
+    if secoes['04']:
+        # CORREÇÃO: Usar a função que funciona
+        dados['Acoes'] = contar_ramos_atividade(secoes['ramos_04'])
+        logger.debug("Arquivo: %s - Ações encontradas: %s", filename, dados['Acoes'])
+    if secoes['05']:
+        dados['Oficio'] = verificar_oficio(secoes['05'])
+    if secoes['06']:
+        dados['Resposta_Oficio'] = verificar_resposta_oficio(secoes['06'])
+        dados['Data_ART'] = extrair_data_art(secoes['06'])
+    if secoes['07']:
+        # CORREÇÃO: Extrair data do relatório anterior
+        dados['Data_Relatorio_Anterior'] = extrair_data_relatorio_anterior(secoes['07'])
+        # NOVO: Extrair informações complementares
+        dados['Informacoes_Complementares'] = extrair_informacoes_complementares(secoes['07'])
+    
+    # CORREÇÃO: Determinar regularização baseado nas datas
+    dados['Regularizacao'] = determinar_regularizacao(
+        dados['Data_ART'], 
+        dados['Data_Relatorio_Anterior']
+    )
+    
+    logger.debug("Regularização: %s (ART: %s, Relatório Anterior: %s)",
+                 dados['Regularizacao'], dados['Data_ART'], dados['Data_Relatorio_Anterior'])
+    
+    return dados
+
+def processar_pdf_individual(args):
+    """Processa (file_path, filename, temp_dir[, exportar_fotos]); file_path também pode ser
+    o conteúdo em bytes ou um MembroZip. Com exportar_fotos as fotos são gravadas em pasta_fotos(),
+    na pasta que ele nomeia (nome_pasta_fotos) ou, se for só True, na do nome do arquivo"""
+    file_path, filename, temp_dir = args[:3]
+    exportar_fotos = args[3] if len(args) > 3 else None
+    modo_fotos = 'completo' if exportar_fotos else Config.MODO_FOTOS
+    pasta = exportar_fotos if isinstance(exportar_fotos, str) else None
+    
+    try:
+        with cronometro('arquivo'):
+            # Uma única abertura do PDF para texto e fotos
+            texto, quantidade_fotos = ler_pdf_passagem_unica(file_path, temp_dir, filename, modo_fotos, pasta=pasta)
+            
+            with cronometro('regex_secoes'):
+                dados = extrair_dados_texto(texto, filename)
+        
+        # Definir status das fotos (já detectadas na leitura do PDF)
+        dados['Fotos_Extraidas'] = quantidade_fotos
+        
+        if quantidade_fotos > 0:
+            dados['Status_Fotos'] = 'SIM'
+            dados['Fotos'] = f"{quantidade_fotos} foto(s) extraída(s)"
+        else:
+            dados['Status_Fotos'] = 'NÃO'
+            dados['Fotos'] = "Nenhuma foto extraída"
+        
+        return dados
+        
+    except Exception as e:
+        logger.error("Erro ao processar %s: %s", filename, e)
+        return registro_erro(filename)
@@ -0,0 +1,168 @@
+"""Acesso ao conteúdo dos PDFs sem cópias inteiras em memória.
+
+Um PDF chega ao motor como caminho (upload gravado em disco), bytes ou
+MembroZip (PDF dentro de um .zip enviado, referenciado pela posição no
+arquivo). Arquivos em disco são mapeados só para leitura (mmap): o hash, a
+estimativa de páginas (que o motor não faz em membros comprimidos) e a leitura
+pelo pdfminer no worker usam as páginas do cache do sistema, compartilhadas
+entre o processo web e os workers, em vez de cada um ler a sua cópia. Membros de ZIP armazenados sem compressão são
+mapeados direto do .zip; os comprimidos são descompactados por quem os lê, e
+do processo web ao worker só vai o MembroZip, não o conteúdo.
+"""
+import io
+import mmap
+import os
+import struct
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import NamedTuple
+
+ASSINATURA_CABECALHO_LOCAL = b'PK\x03\x04'
+COMPRESSAO_OUTRA = -1  # Métodos lidos pelo zipfile (bzip2, lzma, membros cifrados)
+
+
+class FonteInvalida(OSError):
+    pass
+
+
+class MembroZip(NamedTuple):
+    """PDF dentro de um .zip: o necessário para lê-lo sem reabrir o diretório central"""
+    caminho_zip: str
+    membro: str
+    tamanho: int  # Descompactado
+    tamanho_comprimido: int
+    deslocamento: int  # Cabeçalho local do membro
+    compressao: int
+
+    @classmethod
+    def de_info(cls, caminho_zip, info):
+        compressao = info.compress_type
+        if info.flag_bits & 0x1 or compressao not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            compressao = COMPRESSAO_OUTRA
+        return cls(caminho_zip, info.filename, info.file_size, info.compress_size, info.header_offset, compressao)
+
+
+def tamanho_fonte(fonte):
+    """Tamanho em bytes do PDF (descompactado, para membros de ZIP)"""
+    if isinstance(fonte, MembroZip):
+        return fonte.tamanho
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        return len(fonte)
+    return os.path.getsize(fonte)
+
+
+def _mapear_arquivo(caminho):
+    """mmap somente leitura do arquivo inteiro (None para arquivo vazio, que não pode ser mapeado)"""
+    with open(caminho, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _dados_membro(membro, mapa):
+    """Conteúdo do membro a partir do .zip mapeado: memoryview sem cópia (armazenado) ou bytes"""
+    if membro.compressao == COMPRESSAO_OUTRA:
+        with zipfile.ZipFile(membro.caminho_zip) as arquivo_zip:
+            return arquivo_zip.read(membro.membro)
+    inicio = membro.deslocamento
+    if mapa is None or mapa[inicio:inicio + 4] != ASSINATURA_CABECALHO_LOCAL:
+        raise FonteInvalida(f"Cabeçalho local inválido em {membro.caminho_zip}: {membro.membro}")
+    tamanho_nome, tamanho_extra = struct.unpack('<HH', mapa[inicio + 26:inicio + 30])
+    inicio += 30 + tamanho_nome + tamanho_extra
+    dados = memoryview(mapa)[inicio:inicio + membro.tamanho_comprimido]
+    if membro.compressao == zipfile.ZIP_STORED:
+        return dados
+    try:
+        return zlib.decompress(dados, -zlib.MAX_WBITS, membro.tamanho or zlib.DEF_BUF_SIZE)
+    except zlib.error as e:
+        raise FonteInvalida(f"{membro.membro}: {e}") from e
+    finally:
+        dados.release()
+
+
+@contextmanager
+def mapear(fonte):
+    """Conteúdo do PDF como buffer (mmap, memoryview ou bytes), válido dentro do bloco.
+    Arquivos em disco e membros de ZIP armazenados não são copiados."""
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        yield fonte
+        return
+    mapa = _mapear_arquivo(fonte.caminho_zip if isinstance(fonte, MembroZip) else fonte)
+    try:
+        if not isinstance(fonte, MembroZip):
+            yield mapa if mapa is not None else b''
+            return
+        dados = _dados_membro(fonte, mapa)
+        try:
+            yield dados
+        finally:
+            if isinstance(dados, memoryview):
+                dados.release()
+    finally:
+        if mapa is not None:
+            mapa.close()
+
+
+class JanelaMemoria(io.RawIOBase):
+    """Arquivo somente leitura sobre um memoryview; close() também fecha o mapa de origem"""
+
+    def __init__(self, dados, mapa=None):
+        self._dados = dados
+        self._mapa = mapa
+        self._posicao = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, tamanho=-1):
+        fim = len(self._dados) if tamanho is None or tamanho < 0 else self._posicao + tamanho
+        trecho = bytes(self._dados[self._posicao:fim])
+        self._posicao += len(trecho)
+        return trecho
+
+    def readinto(self, destino):
+        trecho = self.read(len(destino))
+        destino[:len(trecho)] = trecho
+        return len(trecho)
+
+    def seek(self, deslocamento, origem=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._posicao, io.SEEK_END: len(self._dados)}[origem]
+        self._posicao = max(0, base + deslocamento)
+        return self._posicao
+
+    def tell(self):
+        return self._posicao
+
+    def close(self):
+        if not self.closed:
+            self._dados.release()
+            if self._mapa is not None:
+                self._mapa.close()
+        super().close()
+
+
+def abrir_fluxo(fonte):
+    """Arquivo binário somente leitura com o conteúdo do PDF (para o pdfminer); fechá-lo
+    libera o mapeamento"""
+    if isinstance(fonte, (bytes, bytearray)):
+        return io.BytesIO(fonte)
+    if isinstance(fonte, memoryview):
+        return JanelaMemoria(fonte[:])  # Fatia própria: fechar não libera o buffer de quem chamou
+    mapa = _mapear_arquivo(fonte.caminho_zip if isinstance(fonte, MembroZip) else fonte)
+    if not isinstance(fonte, MembroZip):
+        return mapa if mapa is not None else io.BytesIO(b'')
+    try:
+        dados = _dados_membro(fonte, mapa)
+    except BaseException:
+        if mapa is not None:
+            mapa.close()
+        raise
+    if isinstance(dados, memoryview):
+        return JanelaMemoria(dados, mapa)
+    if mapa is not None:
+        mapa.close()
+    return io.BytesIO(dados)
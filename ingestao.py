@@ -0,0 +1,157 @@
+"""Recebimento de uploads em fluxo.
+
+Em vez de esperar o Werkzeug armazenar o corpo multipart inteiro e só então
+gravar os arquivos um a um, o corpo da requisição é lido em blocos e cada
+PDF é entregue ao motor de extração assim que a sua parte termina de chegar.
+Assim o tempo de upload e o tempo de CPU da extração se sobrepõem.
+
+Arquivos .zip são aceitos: os PDFs contidos não são extraídos para o disco
+nem lidos aqui; o motor recebe um fontes_pdf.MembroZip (caminho do .zip e
+posição do membro) e o worker lê o PDF direto do arquivo compactado.
+"""
+import itertools
+import logging
+import os
+import zipfile
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+from fontes_pdf import MembroZip
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO = 64 * 1024
+TAMANHO_MAXIMO_CAMPO = 1024  # Campos simples do formulário (opções), não arquivos
+
+
+def eh_zip(filename):
+    return filename.lower().endswith('.zip')
+
+
+def iterar_pdfs_zip(caminho_zip, temp_dir, limite_membro=None):
+    """Gera (MembroZip, filename, temp_dir) para cada PDF dentro do ZIP.
+    
+    Diretórios, metadados do macOS, arquivos que não são PDF e membros maiores
+    que limite_membro (descompactados) são ignorados.
+    """
+    with zipfile.ZipFile(caminho_zip) as arquivo_zip:
+        for info in arquivo_zip.infolist():
+            if info.is_dir() or info.filename.startswith('__MACOSX/'):
+                continue
+            filename = secure_filename(os.path.basename(info.filename))
+            if not filename.lower().endswith('.pdf') or filename.startswith('.'):
+                continue
+            if limite_membro is not None and info.file_size > limite_membro:
+                logger.warning("Ignorando %s: %d bytes descompactado", info.filename, info.file_size)
+                continue
+            yield MembroZip.de_info(caminho_zip, info), filename, temp_dir
+
+
+class UploadEmFluxo:
+    """Itera sobre os PDFs de um corpo multipart à medida que são recebidos.
+    
+    Gera (file_path, filename, temp_dir) para cada PDF aceito, gravado em
+    temp_dir, e (MembroZip, filename, temp_dir) para cada PDF de um .zip enviado.
+    Depois da iteração, `partes` indica quantos arquivos vieram no campo e
+    `recebidos` quantos PDFs foram aceitos. Os campos simples do formulário
+    ficam em `campos`; os que vêm antes dos arquivos podem ser lidos antes da
+    iteração com ler_campos().
+    """
+    
+    def __init__(self, stream, content_type, temp_dir, campo='pdfFiles', aceitar=None, limite_membro_zip=None):
+        _, opcoes = parse_options_header(content_type or '')
+        boundary = opcoes.get('boundary')
+        if not boundary:
+            raise ValueError('Requisição sem corpo multipart/form-data')
+        
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary.encode('latin-1'))
+        self.temp_dir = temp_dir
+        self.campo = campo
+        self.aceitar = aceitar or (lambda filename: True)
+        self.limite_membro_zip = limite_membro_zip
+        self.partes = 0
+        self.recebidos = 0
+        self.campos = {}
+        self._campo_atual = None
+        self._eventos = self._ler_eventos()
+        self._evento_pendente = None
+    
+    def _ler_eventos(self):
+        """Eventos do decoder multipart, lendo o corpo em blocos conforme necessário"""
+        while True:
+            bloco = self._stream.read(TAMANHO_BLOCO)
+            self._decoder.receive_data(bloco or None)
+            
+            evento = self._decoder.next_event()
+            while not isinstance(evento, (NeedData, Epilogue)):
+                yield evento
+                evento = self._decoder.next_event()
+            
+            if not bloco or isinstance(evento, Epilogue):
+                return
+    
+    def _tratar_campo(self, evento):
+        """Acumula o valor dos campos simples; devolve False para eventos de arquivo"""
+        if isinstance(evento, Field):
+            self._campo_atual = evento.name
+            self.campos[evento.name] = ''
+        elif isinstance(evento, File):
+            self._campo_atual = None
+            return False
+        elif isinstance(evento, Data) and self._campo_atual is not None:
+            valor = self.campos[self._campo_atual] + evento.data.decode('utf-8', 'replace')
+            self.campos[self._campo_atual] = valor[:TAMANHO_MAXIMO_CAMPO]
+        return True
+    
+    def ler_campos(self):
+        """Lê o corpo até o primeiro arquivo e devolve os campos enviados antes dele"""
+        for evento in self._eventos:
+            if not self._tratar_campo(evento):
+                self._evento_pendente = evento
+                break
+        return self.campos
+    
+    def _abrir_parte(self, evento):
+        """Destino da parte atual: (arquivo aberto, caminho, nome) ou None para descartar"""
+        if evento.name != self.campo:
+            return None
+        self.partes += 1
+        filename = secure_filename(evento.filename or '')
+        if not filename or not self.aceitar(filename):
+            return None
+        # Prefixo evita que dois uploads com o mesmo nome sobrescrevam um ao outro
+        caminho = os.path.join(self.temp_dir, f"{self.partes:05d}_{filename}")
+        return open(caminho, 'wb'), caminho, filename
+    
+    def _membros_zip(self, caminho, filename):
+        try:
+            for args in iterar_pdfs_zip(caminho, self.temp_dir, self.limite_membro_zip):
+                self.recebidos += 1
+                yield args
+        except zipfile.BadZipFile:
+            logger.warning("Arquivo ZIP inválido: %s", filename)
+    
+    def __iter__(self):
+        destino = None
+        pendente = [self._evento_pendente] if self._evento_pendente is not None else []
+        self._evento_pendente = None
+        try:
+            for evento in itertools.chain(pendente, self._eventos):
+                if self._tratar_campo(evento):
+                    if isinstance(evento, Data) and destino is not None:
+                        destino[0].write(evento.data)
+                        if not evento.more_data:
+                            arquivo, caminho, filename = destino
+                            arquivo.close()
+                            destino = None
+                            if eh_zip(filename):
+                                yield from self._membros_zip(caminho, filename)
+                            else:
+                                self.recebidos += 1
+                                yield caminho, filename, self.temp_dir
+                else:
+                    destino = self._abrir_parte(evento)
+        finally:
+            if destino is not None:
+                destino[0].close()
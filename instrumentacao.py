@@ -0,0 +1,153 @@
+"""Medição de tempo por etapa e configuração do log.
+
+Cada etapa quente (abertura do PDF, extract_text de cada página, regexes das
+seções, varredura de fotos, pontuação, planilha e relatório em PDF) é medida
+com cronometro() e vira uma observação no histograma
+etapa_duracao_segundos{etapa=...}; cada PDF também registra quantas páginas
+foram abertas e quantas por segundo. Os workers do motor acumulam as observações no próprio processo e
+as devolvem junto com os registros (drenar/mesclar), de modo que METRICAS no
+processo web soma tudo o que foi processado, exposto em /metrics no formato
+texto do Prometheus. Um lote pode somar as mesmas observações numa instância
+própria de Metricas para o resumo de tempos da tarefa.
+"""
+import logging
+import os
+import resource
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites superiores dos buckets (o último captura o resto)
+BUCKETS_DURACAO = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+BUCKETS_PAGINAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, float('inf'))
+BUCKETS_MEMORIA = (64, 128, 256, 512, 768, 1024, 1536, 2048, 4096, float('inf'))
+
+HISTOGRAMAS = {
+    'etapa_duracao_segundos': ('Duração de cada etapa do processamento em segundos', BUCKETS_DURACAO),
+    'paginas_por_segundo': ('Páginas lidas por segundo em cada PDF', BUCKETS_PAGINAS),
+    'paginas_arquivo': ('Páginas abertas em cada PDF (com as só varridas em busca de fotos)', BUCKETS_PAGINAS),
+    'memoria_worker_mib': ('Memória residente (MiB) de cada worker ao fim de um lote', BUCKETS_MEMORIA),
+    'memoria_worker_pico_mib': ('Pico de memória residente (MiB) de cada worker até o fim de um lote', BUCKETS_MEMORIA),
+}
+PREFIXO = 'crea_rj_'
+
+# Bibliotecas cujo DEBUG registra cada token lido do PDF; ficam sempre em WARNING
+LOGS_RUIDOSOS = ('pdfminer', 'pdfplumber', 'PIL', 'fontTools', 'fpdf')
+
+
+def memoria_residente():
+    """Memória residente atual do processo em bytes (pico, onde /proc não existe)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return memoria_residente_pico()
+
+
+def memoria_residente_pico():
+    """Pico de memória residente do processo em bytes (ru_maxrss é KiB no Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def configurar_log(nivel='INFO'):
+    """Configura o log do processo (web ou worker); chamadas seguintes não têm efeito"""
+    logging.basicConfig(level=nivel, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    for nome in LOGS_RUIDOSOS:
+        logging.getLogger(nome).setLevel(logging.WARNING)
+
+
+class Metricas:
+    """Histogramas indexados por (nome, etapa), seguros para várias threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}  # (nome, etapa) -> [contagens por bucket, soma, total]
+
+    def observar(self, nome, valor, etapa=''):
+        limites = HISTOGRAMAS[nome][1]
+        with self._lock:
+            histograma = self._histogramas.get((nome, etapa))
+            if histograma is None:
+                histograma = self._histogramas[(nome, etapa)] = [[0] * len(limites), 0.0, 0]
+            histograma[0][bisect_left(limites, valor)] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    def drenar(self):
+        """Devolve as observações acumuladas (serializáveis) e zera o registro"""
+        with self._lock:
+            estado, self._histogramas = self._histogramas, {}
+        return estado
+
+    def mesclar(self, estado):
+        """Soma as observações devolvidas por drenar() em outro processo"""
+        with self._lock:
+            for chave, (contagens, soma, total) in estado.items():
+                histograma = self._histogramas.get(chave)
+                if histograma is None:
+                    self._histogramas[chave] = [list(contagens), soma, total]
+                    continue
+                histograma[0] = [a + b for a, b in zip(histograma[0], contagens)]
+                histograma[1] += soma
+                histograma[2] += total
+
+    def resumo(self):
+        """Tempo total, chamadas e média (ms) por etapa, mais as médias de páginas/s
+        e de memória residente dos workers ao fim de cada lote e o total de páginas abertas"""
+        with self._lock:
+            itens = [(chave, soma, total) for chave, (_, soma, total) in self._histogramas.items()]
+        etapas = {}
+        medias = {}
+        somas = {}
+        for (nome, etapa), soma, total in sorted(itens):
+            if nome != 'etapa_duracao_segundos':
+                medias[nome] = round(soma / total, 1) if total else None
+                somas[nome] = soma
+                continue
+            etapas[etapa] = {'chamadas': total, 'total_segundos': round(soma, 3),
+                             'media_ms': round(soma / total * 1000, 2) if total else 0.0}
+        return {'etapas': etapas, 'paginas_por_segundo_media': medias.get('paginas_por_segundo'),
+                'memoria_worker_mib_media': medias.get('memoria_worker_mib'),
+                'paginas_lidas': int(somas.get('paginas_arquivo', 0))}
+
+    def exposicao(self):
+        """Histogramas no formato texto do Prometheus (version 0.0.4)"""
+        with self._lock:
+            itens = sorted((chave, list(contagens), soma, total)
+                           for chave, (contagens, soma, total) in self._histogramas.items())
+        linhas = []
+        for nome, (ajuda, limites) in HISTOGRAMAS.items():
+            metrica = PREFIXO + nome
+            linhas.append(f"# HELP {metrica} {ajuda}")
+            linhas.append(f"# TYPE {metrica} histogram")
+            for (nome_item, etapa), contagens, soma, total in itens:
+                if nome_item != nome:
+                    continue
+                rotulo = f'etapa="{etapa}",' if etapa else ''
+                acumulado = 0
+                for limite, contagem in zip(limites, contagens):
+                    acumulado += contagem
+                    le = '+Inf' if limite == float('inf') else repr(float(limite))
+                    linhas.append(f'{metrica}_bucket{{{rotulo}le="{le}"}} {acumulado}')
+                rotulo = f'{{etapa="{etapa}"}}' if etapa else ''
+                linhas.append(f"{metrica}_sum{rotulo} {soma}")
+                linhas.append(f"{metrica}_count{rotulo} {total}")
+        return "\n".join(linhas) + "\n"
+
+
+# Registro do processo (no processo web, soma também o que os workers devolvem)
+METRICAS = Metricas()
+
+
+@contextmanager
+def cronometro(etapa, *outras):
+    """Mede o bloco e registra a duração em METRICAS e nas outras instâncias de Metricas"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        METRICAS.observar('etapa_duracao_segundos', duracao, etapa)
+        for metricas in outras:
+            metricas.observar('etapa_duracao_segundos', duracao, etapa)
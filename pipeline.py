@@ -0,0 +1,271 @@
+"""Execução de um lote em estágios encadeados por filas limitadas.
+
+    ingestão -> extração -> pontuação -> planilha
+                                      -> PDF
+                                      -> fotos (quando pedidas)
+                                      -> banco (banco_resultados.py, quando ativo)
+                                      -> resultados (quem chamou executar())
+
+Cada estágio roda na sua thread (a extração em si continua no pool de
+processos do MotorExtracao), então os primeiros registros já estão sendo
+gravados na planilha e no PDF enquanto os PDFs seguintes ainda são lidos.
+As filas têm capacidade Config.PIPELINE_CAPACIDADE: um estágio lento segura
+os anteriores em vez de acumular registros em memória, e profundidades()
+mostra onde está o gargalo (a fila cheia é a entrada do estágio mais lento).
+Depois da extração cada registro segue junto com os args do seu arquivo.
+Os tempos de cada etapa do lote ficam em tempos (instrumentacao.Metricas).
+
+Com o banco de resultados ativo, a ingestão calcula o SHA-256 de cada PDF: os
+que o lote já recebeu antes (mesmo conteúdo) não são extraídos de novo, e o
+registro gravado segue direto para a pontuação; os novos têm o hash gravado
+no lote junto com o registro. É o que permite acrescentar arquivos a um lote
+existente (lote=<id>) extraindo só o que é novo. O hash segue com os args do
+arquivo, e o motor o reaproveita na chave do cache em vez de ler o PDF de novo.
+"""
+import logging
+import queue
+import threading
+import uuid
+from banco_resultados import obter_banco
+from cache_extracao import hash_conteudo
+from config import Config
+from extracao import nome_pasta_fotos
+from instrumentacao import Metricas, cronometro
+from pontuacao import pontuar
+from processamento import obter_motor
+
+logger = logging.getLogger(__name__)
+
+FIM = object()  # Marca de fim de fluxo entre os estágios
+
+# Filas alimentadas pela pontuação (as ausentes no lote são ignoradas)
+SAIDAS = ('planilha', 'pdf', 'fotos', 'banco', 'resultados')
+
+
+class PipelineCancelado(Exception):
+    pass
+
+
+class PipelineLote:
+    """Encadeia ingestão, extração, pontuação e as saídas (SaidasLote) de um lote"""
+
+    def __init__(self, saidas=None, temp_dir=None, motor=None, capacidade=None, bloco_pontuacao=None,
+                 banco=None, lote=None):
+        self.saidas = saidas
+        self.temp_dir = temp_dir
+        self.motor = motor
+        self.banco = banco if banco is not None else obter_banco()
+        self.lote = lote or uuid.uuid4().hex
+        # SHA-256 -> RF dos PDFs que o lote já tem
+        self._conhecidos = self.banco.arquivos_lote(lote) if self.banco is not None and lote else {}
+        self.reaproveitados = 0
+        self.capacidade = capacidade or Config.PIPELINE_CAPACIDADE
+        self.bloco_pontuacao = bloco_pontuacao or Config.PIPELINE_BLOCO_PONTUACAO
+        self.filas = {'extracao': queue.Queue(self.capacidade),
+                      'pontuacao': queue.Queue(self.capacidade)}
+        if saidas is not None:
+            self.filas['planilha'] = queue.Queue(self.capacidade)
+            self.filas['pdf'] = queue.Queue(self.capacidade)
+            if saidas.exportador is not None:
+                self.filas['fotos'] = queue.Queue(self.capacidade)
+        if self.banco is not None:
+            self.filas['banco'] = queue.Queue(self.capacidade)
+        self.filas['resultados'] = queue.Queue(self.capacidade)
+        self.picos = {nome: 0 for nome in self.filas}
+        self.erros = []  # Falhas de ingestão, extração ou pontuação (interrompem o lote)
+        self.falhas_saidas = {}  # Registros que uma saída não conseguiu gravar
+        # Tempos por etapa deste lote (os das saídas continuam em concluir())
+        self.tempos = saidas.tempos if saidas is not None else Metricas()
+        self._cancelado = threading.Event()
+        self._threads = []
+
+    # Filas --------------------------------------------------------------
+
+    def _colocar(self, nome, item):
+        fila = self.filas[nome]
+        while True:
+            if self._cancelado.is_set():
+                raise PipelineCancelado()
+            try:
+                fila.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        tamanho = fila.qsize()
+        if tamanho > self.picos[nome]:
+            self.picos[nome] = tamanho
+
+    def _retirar(self, nome, bloquear=True):
+        fila = self.filas[nome]
+        while True:
+            if self._cancelado.is_set():
+                raise PipelineCancelado()
+            try:
+                return fila.get(timeout=0.1) if bloquear else fila.get_nowait()
+            except queue.Empty:
+                if not bloquear:
+                    return None
+
+    def _consumir(self, nome):
+        while True:
+            item = self._retirar(nome)
+            if item is FIM:
+                return
+            yield item
+
+    def _consumir_blocos(self, nome, tamanho):
+        """Gera o próximo item junto com o que mais já estiver na fila (até tamanho)"""
+        while True:
+            primeiro = self._retirar(nome)
+            if primeiro is FIM:
+                return
+            bloco = [primeiro]
+            while len(bloco) < tamanho:
+                item = self._retirar(nome, bloquear=False)
+                if item is None:
+                    break
+                if item is FIM:
+                    yield bloco
+                    return
+                bloco.append(item)
+            yield bloco
+
+    def profundidades(self):
+        """Ocupação atual e pico de cada fila, mais a capacidade (para /tarefas/<id>)"""
+        return {
+            'capacidade': self.capacidade,
+            'filas': {nome: {'atual': fila.qsize(), 'pico': self.picos[nome]}
+                      for nome, fila in self.filas.items()}
+        }
+
+    # Estágios -----------------------------------------------------------
+
+    def _estagio(self, nome, funcao, *destinos):
+        """Roda funcao na thread do estágio; ao terminar (ou falhar) avisa os destinos"""
+        def executar():
+            try:
+                funcao()
+            except PipelineCancelado:
+                return
+            except Exception as e:
+                logger.error("Erro no estágio %s: %s", nome, e)
+                self.erros.append((nome, e))
+            try:
+                for destino in destinos:
+                    self._colocar(destino, FIM)
+            except PipelineCancelado:
+                pass
+
+        thread = threading.Thread(target=executar, name=f'pipeline-{nome}', daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _ingerir(self, arquivos):
+        for indice, args in enumerate(arquivos, 1):
+            if len(args) > 3 and args[3]:
+                # Pasta de fotos própria: arquivos com o mesmo nome no lote não se misturam
+                args = (*args[:3], nome_pasta_fotos(args[1], indice))
+            if self.banco is not None:
+                try:
+                    sha = hash_conteudo(args[0])
+                except OSError:
+                    sha = None
+                # Um único hash por arquivo: vai para o banco e para a chave do cache no motor
+                args = (*args[:3], args[3] if len(args) > 3 else None, sha)
+                rf = self._conhecidos.get(sha)
+                dados = self.banco.obter(rf) if rf is not None else None
+                if dados is not None:
+                    # Já recebido neste lote: o registro gravado segue sem nova extração
+                    dados['Nome_Arquivo'] = args[1]
+                    self.reaproveitados += 1
+                    self._colocar('pontuacao', (args, dados))
+                    continue
+            self._colocar('extracao', args)
+
+    def _extrair(self):
+        motor = self.motor or obter_motor()
+        # Os arquivos já enfileirados seguem juntos, em lotes de até CHUNK_SIZE por worker
+        blocos = self._consumir_blocos('extracao', motor.chunk_size * motor.max_workers)
+        for resultado in motor.processar(blocos, tempos=self.tempos, em_blocos=True):
+            self._colocar('pontuacao', resultado)
+
+    def _pontuar(self):
+        saidas = [nome for nome in SAIDAS if nome in self.filas]
+        # Junta o que já estiver na fila para uma única passagem vetorizada
+        for bloco in self._consumir_blocos('pontuacao', self.bloco_pontuacao):
+            with cronometro('pontuacao', self.tempos):
+                pontuar([dados for _, dados in bloco])
+            for resultado in bloco:
+                for nome in saidas:
+                    self._colocar(nome, resultado)
+
+    def _gravar(self, nome, etapa, funcao):
+        # Uma falha na saída não interrompe o lote (SaidasLote.concluir tem os próprios
+        # fallbacks) e a fila continua sendo esvaziada para não travar os outros estágios
+        for args, dados in self._consumir(nome):
+            try:
+                with cronometro(etapa, self.tempos):
+                    funcao(args, dados)
+            except Exception as e:
+                logger.error("Erro na saída %s (%s): %s", nome, dados.get('Nome_Arquivo'), e)
+                self.falhas_saidas[nome] = self.falhas_saidas.get(nome, 0) + 1
+
+    def _gravar_banco(self):
+        # Uma transação por bloco de registros em vez de uma por registro
+        for bloco in self._consumir_blocos('banco', self.bloco_pontuacao):
+            try:
+                with cronometro('banco', self.tempos):
+                    self.banco.gravar([dados for _, dados in bloco], self.lote,
+                                      [args[4] if len(args) > 4 else None for args, _ in bloco])
+            except Exception as e:
+                logger.error("Erro na saída banco (%d registros): %s", len(bloco), e)
+                self.falhas_saidas['banco'] = self.falhas_saidas.get('banco', 0) + len(bloco)
+
+    # Execução -----------------------------------------------------------
+
+    def executar(self, arquivos, com_args=False):
+        """Inicia os estágios e gera cada registro pontuado (na ordem de conclusão)
+        na thread de quem chamou; ao final espera as saídas terminarem de gravar.
+        Com com_args gera (args, dados), com o caminho do PDF recebido em args[0]."""
+        saidas = [nome for nome in SAIDAS if nome in self.filas]
+        self._estagio('ingestao', lambda: self._ingerir(arquivos), 'extracao')
+        self._estagio('extracao', self._extrair, 'pontuacao')
+        self._estagio('pontuacao', self._pontuar, *saidas)
+        if 'planilha' in self.filas:
+            self._estagio('planilha', lambda: self._gravar(
+                'planilha', 'planilha', lambda _, dados: self.saidas.planilha.adicionar(dados)))
+            self._estagio('pdf', lambda: self._gravar(
+                'pdf', 'relatorio_pdf', lambda _, dados: self.saidas.relatorio.adicionar(dados)))
+        if 'fotos' in self.filas:
+            exportador = self.saidas.exportador
+            self._estagio('fotos', lambda: self._gravar(
+                'fotos', 'exportacao_fotos',
+                lambda args, dados: exportador.adicionar(self.temp_dir, dados['Nome_Arquivo'],
+                                                     args[3] if len(args) > 3 else None)))
+        if 'banco' in self.filas:
+            self._estagio('banco', self._gravar_banco)
+
+        try:
+            for args, dados in self._consumir('resultados'):
+                yield (args, dados) if com_args else dados
+        except GeneratorExit:
+            self.cancelar()
+            raise
+
+        for thread in self._threads:
+            thread.join()
+        if self.erros:
+            nome, erro = self.erros[0]
+            raise RuntimeError(f"Falha no estágio {nome}: {erro}") from erro
+
+    def lote_consultavel(self):
+        """Id do lote para BancoResultados.pagina_lote, se todos os registros chegaram ao banco"""
+        if self.banco is None or self.falhas_saidas.get('banco'):
+            return None
+        return self.lote
+
+    def cancelar(self):
+        """Interrompe todos os estágios (ex.: a requisição falhou no meio do lote)"""
+        self._cancelado.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
@@ -0,0 +1,140 @@
+"""Gravação da planilha de dados do lote em fluxo.
+
+Em vez de montar um DataFrame, gravá-lo em um BytesIO e copiar os bytes
+para o arquivo final, os registros são gravados direto no destino em
+blocos de TAMANHO_BLOCO, à medida que chegam. O xlsx usa o modo write-only
+do openpyxl (linhas vão para um arquivo temporário e a memória não cresce
+com o número de RFs). CSV e Parquet são alternativas para ferramentas que
+não precisam de xlsx; Parquet depende do pyarrow, que é opcional. Cada
+biblioteca (openpyxl, pyarrow) só é importada ao abrir um arquivo no formato.
+"""
+import csv
+import importlib.util
+from processamento import CAMPOS_REGISTRO
+from pontuacao import pontuar
+
+TAMANHO_BLOCO = 1000
+
+# Mesmas colunas (e ordem) da planilha gerada antes a partir do DataFrame
+COLUNAS_PLANILHA = CAMPOS_REGISTRO + ('Pontuacao',)
+
+# Valores usados quando o registro não tem a chave (ex.: registros de erro)
+PADROES_PLANILHA = {
+    'Fotos_Extraidas': 0,
+    'Status_Fotos': 'NÃO',
+    'Resposta_Oficio': 0,
+    'Nome_Arquivo': '',
+    'RF_Principal': '',
+    'Data_ART': '',
+    'Data_Relatorio_Anterior': '',
+    'Acoes': 0,
+    'Oficio': 0,
+    'Regularizacao': 'NÃO',
+    'Fiscal_Nome_Completo': '',
+    'Informacoes_Complementares': '',
+}
+
+COLUNAS_INTEIRAS = {'Acoes', 'Oficio', 'Resposta_Oficio', 'Fotos_Extraidas'}
+
+EXTENSOES = {'xlsx': 'xlsx', 'csv': 'csv', 'parquet': 'parquet'}
+
+
+def formatos_disponiveis():
+    """Formatos de planilha suportados neste ambiente (Parquet só com pyarrow)"""
+    formatos = ['xlsx', 'csv']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formatos.append('parquet')
+    return formatos
+
+
+class EscritorPlanilha:
+    """Grava registros no arquivo de destino em blocos, sem manter a planilha em memória"""
+
+    def __init__(self, caminho, formato='xlsx', colunas=COLUNAS_PLANILHA, tamanho_bloco=TAMANHO_BLOCO):
+        if formato not in EXTENSOES:
+            raise ValueError(f"Formato de planilha desconhecido: {formato}")
+        self.caminho = caminho
+        self.formato = formato
+        self.colunas = tuple(colunas)
+        self.tamanho_bloco = tamanho_bloco
+        self.linhas = 0
+        self._bloco = []
+        self._fechado = False
+        getattr(self, f'_abrir_{formato}')()
+
+    def _abrir_xlsx(self):
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._planilha = self._workbook.create_sheet('Dados Completos')
+        self._planilha.append(self.colunas)
+
+    def _abrir_csv(self):
+        # utf-8-sig para o Excel reconhecer a acentuação ao abrir o CSV
+        self._arquivo = open(self.caminho, 'w', newline='', encoding='utf-8-sig')
+        self._csv = csv.writer(self._arquivo)
+        self._csv.writerow(self.colunas)
+
+    def _abrir_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._esquema = pa.schema([
+            (coluna, pa.float64() if coluna == 'Pontuacao'
+             else pa.int64() if coluna in COLUNAS_INTEIRAS else pa.string())
+            for coluna in self.colunas
+        ])
+        self._parquet = pq.ParquetWriter(self.caminho, self._esquema)
+
+    def adicionar(self, dados):
+        self._bloco.append(dados)
+        if len(self._bloco) >= self.tamanho_bloco:
+            self._gravar_bloco()
+
+    def _gravar_bloco(self):
+        bloco, self._bloco = self._bloco, []
+        if not bloco:
+            return
+        if 'Pontuacao' in self.colunas and any('Pontuacao' not in dados for dados in bloco):
+            pontuar(bloco)  # Uma passagem vetorizada por bloco
+
+        linhas = [
+            tuple(dados.get(coluna, PADROES_PLANILHA.get(coluna)) for coluna in self.colunas)
+            for dados in bloco
+        ]
+        getattr(self, f'_gravar_{self.formato}')(linhas)
+        self.linhas += len(linhas)
+
+    def _gravar_xlsx(self, linhas):
+        for linha in linhas:
+            self._planilha.append(linha)
+
+    def _gravar_csv(self, linhas):
+        self._csv.writerows(linhas)
+
+    def _gravar_parquet(self, linhas):
+        colunas = list(zip(*linhas))
+        arrays = []
+        for campo, valores in zip(self._esquema, colunas):
+            if campo.type == self._pa.string():
+                valores = [None if v is None else str(v) for v in valores]
+            arrays.append(self._pa.array(valores, type=campo.type, from_pandas=True))
+        self._parquet.write_table(self._pa.Table.from_arrays(arrays, schema=self._esquema))
+
+    def fechar(self):
+        if self._fechado:
+            return
+        self._gravar_bloco()
+        self._fechado = True
+        if self.formato == 'xlsx':
+            self._workbook.save(self.caminho)
+        elif self.formato == 'csv':
+            self._arquivo.close()
+        else:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,114 @@
+"""Pontuação vetorizada dos relatórios.
+
+Os pesos de Config.TABELA_PONTUACAO viram uma tabela (status das fotos x item)
+e a pontuação de todos os registros é calculada de uma vez sobre colunas
+NumPy. pontuar() grava o resultado em 'Pontuacao' de cada dicionário, e
+Excel, PDF, totais e a página de resultados reaproveitam essa coluna em vez
+de recalcular registro a registro.
+
+Regras (as mesmas da antiga calcular_pontuacao por registro):
+RFs + Ações x n + Ofícios x n + Resposta Ofícios x n + Protocolos (0/1)
++ Fotos + Regularização (quando SIM), com os pesos do status das fotos.
+Registros com status desconhecido ou contadores não numéricos valem 0.
+
+NumPy e pandas são importados na primeira pontuação, não na importação do
+módulo (as rotas que não pontuam nada não pagam por eles).
+"""
+from functools import lru_cache
+from config import Config
+
+TABELA_PONTUACAO = Config.TABELA_PONTUACAO
+
+# Colunas usadas na pontuação e valores assumidos quando ausentes
+COLUNAS_PONTUACAO = {
+    'RF': '',
+    'Status_Fotos': 'NÃO',
+    'Acoes': 0,
+    'Oficio': 0,
+    'Resposta_Oficio': 0,
+    'Protocolo': '',
+    'Regularizacao': 'NÃO',
+}
+
+
+@lru_cache(maxsize=1)
+def tabela_pesos():
+    """DataFrame de pesos indexado pelo status das fotos ('SIM'/'NÃO')"""
+    import pandas as pd
+
+    return pd.DataFrame.from_dict(TABELA_PONTUACAO, orient='index').astype(float)
+
+
+def quadro_pontuacao(dados_lista):
+    """Tabela colunar com os campos de pontuação de cada registro"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        coluna: [dados.get(coluna, padrao) for dados in dados_lista]
+        for coluna, padrao in COLUNAS_PONTUACAO.items()
+    })
+
+
+def calcular_pontuacoes(quadro):
+    """Acrescenta Tem_Protocolo e Pontuacao (arredondada em 2 casas) ao quadro"""
+    import numpy as np
+    import pandas as pd
+
+    pesos = tabela_pesos().reindex(quadro['Status_Fotos'].to_numpy())
+
+    def contador(coluna):
+        return pd.to_numeric(quadro[coluna], errors='coerce').to_numpy(dtype=float)
+
+    protocolo = quadro['Protocolo'].fillna('').astype(str).str.strip()
+    tem_protocolo = (protocolo != '').to_numpy()
+    regularizado = (quadro['Regularizacao'] == 'SIM').to_numpy()
+
+    total = (
+        pesos['RFs'].to_numpy()
+        + pesos['Ações'].to_numpy() * contador('Acoes')
+        + pesos['Ofícios'].to_numpy() * contador('Oficio')
+        + pesos['Resposta Ofícios'].to_numpy() * contador('Resposta_Oficio')
+        + pesos['Protocolos'].to_numpy() * tem_protocolo
+        + pesos['Fotos'].to_numpy()
+        + np.where(regularizado, pesos['Regularização'].to_numpy(), 0.0)
+    )
+
+    quadro['Tem_Protocolo'] = tem_protocolo.astype(int)
+    quadro['Pontuacao'] = np.nan_to_num(np.round(total, 2), nan=0.0)
+    return quadro
+
+
+def pontuar(dados_lista):
+    """Pontua todos os registros de uma vez, grava 'Pontuacao' em cada dicionário
+    e devolve o quadro com as colunas calculadas"""
+    quadro = calcular_pontuacoes(quadro_pontuacao(dados_lista))
+    for dados, pontos in zip(dados_lista, quadro['Pontuacao'].tolist()):
+        dados['Pontuacao'] = pontos
+    return quadro
+
+
+def resumo_pontuacao(quadro):
+    """Totais e divisão SIM/NÃO dos registros válidos (RF diferente de 'ERRO')"""
+    import pandas as pd
+
+    validos = quadro[quadro['RF'] != 'ERRO']
+    fotos_sim = (validos['Status_Fotos'] == 'SIM').to_numpy()
+    fotos_nao = (validos['Status_Fotos'] == 'NÃO').to_numpy()
+    pontos = validos['Pontuacao'].to_numpy()
+
+    def soma(coluna):
+        return int(pd.to_numeric(validos[coluna], errors='coerce').fillna(0).sum())
+
+    return {
+        'total_arquivos': len(validos),
+        'total_acoes': soma('Acoes'),
+        'total_oficios': soma('Oficio'),
+        'total_resposta': soma('Resposta_Oficio'),
+        'total_protocolos': int(validos['Tem_Protocolo'].sum()),
+        'total_regularizacoes': int((validos['Regularizacao'] == 'SIM').sum()),
+        'total_fotos_sim': int(fotos_sim.sum()),
+        'total_fotos_nao': len(validos) - int(fotos_sim.sum()),
+        'pontuacao_sim': float(pontos[fotos_sim].sum()),
+        'pontuacao_nao': float(pontos[fotos_nao].sum()),
+        'total_pontuacao': float(pontos.sum()),
+    }
@@ -0,0 +1,506 @@
+"""Motor de extração em pool de processos.
+
+A extração com pdfplumber/pdfminer é Python puro e presa ao GIL, por isso os
+PDFs são distribuídos entre processos (Config.MAX_WORKERS) em lotes de
+Config.CHUNK_SIZE arquivos. Cada processo é reciclado após
+Config.ARQUIVOS_POR_WORKER arquivos para conter o crescimento de memória do
+pdfminer. Os resultados voltam como tuplas compactas (ver CAMPOS_REGISTRO).
+Arquivos já presentes no cache de extração (cache_extracao.py) não são
+enviados aos workers. Junto com os registros, cada lote devolve os tempos
+medidos no worker (instrumentacao.py), somados às métricas do processo web.
+
+Memória: cada lote também devolve a memória residente do worker ao final;
+acima de Config.MEMORIA_WORKER_LIMITE_MB o pool é recriado (os lotes já
+enviados terminam nos workers antigos). A admissão de lotes é limitada pela
+soma do tamanho dos PDFs em voo em todos os lotes do motor
+(Config.MEMORIA_EM_VOO_MB), não só pela quantidade de lotes pendentes.
+
+Prazo: cada PDF tem Config.PRAZO_ARQUIVO_S segundos no worker (SIGALRM); ao
+estourar, volta um registro de erro com o nome do arquivo e o tempo gasto e o
+worker segue para o próximo. Um PDF preso em código C (que não deixa o sinal
+ser tratado) derruba o próprio worker Config.PRAZO_MARGEM_S segundos depois.
+PDFs muito grandes ou com muitas páginas, e os arquivos de um lote cujo worker
+morreu, vão para a faixa lenta (FaixaLenta): um processo por arquivo, que o
+motor encerra à força no prazo ou quando o processamento é cancelado. As
+páginas só são estimadas no que o processo web lê sem descompactar; membros
+de ZIP comprimidos são avaliados pelo tamanho descompactado do cabeçalho.
+"""
+import atexit
+import gc
+import logging
+import math
+import os
+import re
+import signal
+import sys
+import threading
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from config import Config
+from extracao import processar_pdf_individual, registro_erro
+from fontes_pdf import MembroZip, mapear, tamanho_fonte
+from cache_extracao import chave_arquivo, obter_cache
+from instrumentacao import METRICAS, configurar_log, memoria_residente, memoria_residente_pico
+
+logger = logging.getLogger(__name__)
+
+# Ordem dos campos nos registros compactos (mesma ordem das colunas do Excel)
+CAMPOS_REGISTRO = (
+    'RF', 'Situação', 'Fiscal', 'Data', 'Fato_Gerador', 'Protocolo', 'Nome_Arquivo',
+    'RF_Principal', 'Fiscal_Nome_Completo', 'Acoes', 'Oficio', 'Resposta_Oficio',
+    'Regularizacao', 'Fotos_Extraidas', 'Status_Fotos', 'Fotos', 'Data_ART',
+    'Data_Relatorio_Anterior', 'Informacoes_Complementares'
+)
+
+
+def dict_para_registro(dados):
+    """Converte o dicionário de um PDF na tupla compacta enviada entre processos"""
+    return tuple(dados.get(campo, '') for campo in CAMPOS_REGISTRO)
+
+
+def registro_para_dict(registro):
+    """Converte a tupla compacta de volta no dicionário usado pelos relatórios"""
+    return dict(zip(CAMPOS_REGISTRO, registro))
+
+
+def tamanho_pdf(origem):
+    """Tamanho em bytes de um PDF dado como caminho, bytes ou MembroZip (0 se não puder ser lido)"""
+    try:
+        return tamanho_fonte(origem)
+    except (OSError, TypeError):
+        return 0
+
+
+# Objetos de página e total declarado na árvore de páginas (sem abrir o PDF com o pdfminer)
+_PADRAO_PAGINA = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_PADRAO_CONTAGEM = re.compile(rb'/Count\s+(\d+)')
+
+
+def estimar_paginas(origem):
+    """Páginas de um PDF (caminho, bytes ou MembroZip) contadas no arquivo bruto mapeado.
+    Subestima PDFs cujas páginas estão em object streams comprimidos; 0 se não puder ser lido."""
+    try:
+        with mapear(origem) as conteudo:
+            contagens = [int(total) for total in _PADRAO_CONTAGEM.findall(conteudo)]
+            return max(len(_PADRAO_PAGINA.findall(conteudo)), max(contagens, default=0))
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+class PrazoExcedido(BaseException):
+    """Levantada no worker quando um PDF passa do prazo. É BaseException para atravessar
+    os 'except Exception' da extração e do pdfminer."""
+
+
+# (instante limite, arquivo) do PDF em leitura, conferido pelo vigia do worker
+_em_andamento = (None, None)
+_vigia = None
+
+
+def _vigiar():
+    while True:
+        time.sleep(0.2)
+        limite, nome = _em_andamento
+        if limite is not None and time.monotonic() > limite:
+            # A thread principal não voltou ao interpretador desde o SIGALRM
+            logger.error("%s não respondeu ao prazo: encerrando o worker", nome)
+            os._exit(1)
+
+
+@contextmanager
+def prazo_arquivo(nome, prazo, margem):
+    """Interrompe o bloco com PrazoExcedido depois de prazo segundos; se o sinal não puder
+    ser tratado em mais margem segundos, o vigia encerra o processo. Sem efeito com
+    prazo 0 ou fora da thread principal."""
+    global _em_andamento, _vigia
+    if not prazo or threading.current_thread() is not threading.main_thread() or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    if _vigia is None:
+        _vigia = threading.Thread(target=_vigiar, name='vigia-prazo', daemon=True)
+        _vigia.start()
+    
+    def estourar(signum, frame):
+        raise PrazoExcedido(nome)
+    
+    anterior = signal.signal(signal.SIGALRM, estourar)
+    _em_andamento = (time.monotonic() + prazo + margem, nome)
+    signal.setitimer(signal.ITIMER_REAL, prazo)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, anterior)
+        _em_andamento = (None, None)
+
+
+def registro_tempo_esgotado(filename, duracao):
+    return registro_erro(filename, f"Tempo limite excedido ({duracao:.1f} s)")
+
+
+def processar_lote(lote, prazo=0, margem=0):
+    """Executado no processo worker: processa um lote de (file_path, filename, temp_dir).
+    Retorna (registros, tempos medidos no lote, memória residente do worker em bytes)."""
+    registros = []
+    for args in lote:
+        inicio = time.perf_counter()
+        try:
+            with prazo_arquivo(args[1], prazo, margem):
+                dados = processar_pdf_individual(args)
+        except PrazoExcedido:
+            duracao = time.perf_counter() - inicio
+            logger.warning("Prazo de %g s excedido em %s (%.1f s)", prazo, args[1], duracao)
+            METRICAS.observar('etapa_duracao_segundos', duracao, 'prazo_excedido')
+            dados = registro_tempo_esgotado(args[1], duracao)
+        except Exception as e:
+            logger.error("Erro ao processar %s: %s", args[1], e)
+            dados = registro_erro(args[1])
+        registros.append(dict_para_registro(dados))
+    # Ciclos do pdfminer (páginas, fontes, layout) liberados antes de medir a memória
+    gc.collect()
+    rss = memoria_residente()
+    METRICAS.observar('memoria_worker_mib', rss / 2**20)
+    METRICAS.observar('memoria_worker_pico_mib', memoria_residente_pico() / 2**20)
+    # As métricas do worker só contêm este lote; vão para o processo web e são zeradas
+    return registros, METRICAS.drenar(), rss
+
+
+# Módulos carregados uma vez no forkserver: o processo web não importa pdfplumber,
+# pdfminer nem PIL (extracao os importa sob demanda), mas cada worker os usa
+PRECARGA_WORKERS = ['extracao', 'pdfplumber', 'backends_texto', 'PIL.Image']
+
+
+def _contexto_multiprocessing():
+    """forkserver quando disponível (workers reciclados nascem com PRECARGA_WORKERS já importados)"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        contexto.set_forkserver_preload(PRECARGA_WORKERS)
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+
+def _processar_isolado(conexao, args, prazo, margem, nivel_log):
+    """Executado num processo da faixa lenta: um único PDF, resultado pela conexão"""
+    configurar_log(nivel_log)
+    conexao.send(processar_lote([args], prazo, margem))
+    conexao.close()
+
+
+class FaixaLenta:
+    """Lê cada PDF num processo próprio (no máximo `processos` ao mesmo tempo) e o encerra
+    à força quando passa de prazo + margem ou quando `cancelado` é sinalizado.
+    submit() devolve um Future com o mesmo resultado de processar_lote."""
+    
+    def __init__(self, processos, prazo, margem):
+        self.prazo = prazo
+        self.margem = margem
+        self.encerrados = 0  # Processos mortos por prazo ou cancelamento
+        self._threads = ThreadPoolExecutor(max_workers=processos, thread_name_prefix='faixa-lenta')
+    
+    def submit(self, args, cancelado):
+        return self._threads.submit(self._executar, args, cancelado)
+    
+    def _executar(self, args, cancelado):
+        contexto = _contexto_multiprocessing()
+        receber, enviar = contexto.Pipe(duplex=False)
+        processo = contexto.Process(target=_processar_isolado, name=f'faixa-lenta-{args[1]}', daemon=True,
+                                    args=(enviar, args, self.prazo, self.margem, Config.NIVEL_LOG))
+        inicio = time.perf_counter()
+        processo.start()
+        enviar.close()
+        try:
+            while not receber.poll(0.1):
+                duracao = time.perf_counter() - inicio
+                if cancelado.is_set():
+                    motivo = "Processamento cancelado"
+                elif self.prazo and duracao > self.prazo + self.margem:
+                    motivo = None
+                else:
+                    continue
+                processo.kill()
+                self.encerrados += 1
+                logger.warning("%s encerrado à força após %.1f s", args[1], duracao)
+                dados = registro_tempo_esgotado(args[1], duracao) if motivo is None else registro_erro(args[1], motivo)
+                return [dict_para_registro(dados)], {}, 0
+            try:
+                return receber.recv()
+            except EOFError:
+                # O processo morreu sem responder (ex.: falta de memória)
+                processo.join()
+                raise RuntimeError(f"processo da faixa lenta terminou com código {processo.exitcode}")
+        finally:
+            receber.close()
+            processo.join()
+    
+    def encerrar(self):
+        self._threads.shutdown(wait=True, cancel_futures=True)
+
+
+class AdmissaoPorBytes:
+    """Orçamento de bytes em voo compartilhado pelos lotes de todas as chamadas do motor.
+    
+    Um lote maior que o limite inteiro é admitido quando não há nada em voo,
+    para que nunca fique esperando para sempre. Limite 0 admite tudo."""
+    
+    def __init__(self, limite):
+        self.limite = limite
+        self.em_voo = 0
+        self._condicao = threading.Condition()
+    
+    def tentar(self, tamanho):
+        with self._condicao:
+            if self.limite and self.em_voo and self.em_voo + tamanho > self.limite:
+                return False
+            self.em_voo += tamanho
+            return True
+    
+    def liberar(self, tamanho):
+        with self._condicao:
+            self.em_voo -= tamanho
+            self._condicao.notify_all()
+    
+    def esperar(self, timeout):
+        with self._condicao:
+            self._condicao.wait(timeout)
+
+
+class MotorExtracao:
+    """Distribui os PDFs entre processos e devolve os resultados à medida que ficam prontos"""
+    
+    def __init__(self, max_workers=None, chunk_size=None, arquivos_por_worker=None, cache=None,
+                 limite_memoria_worker_mb=None, limite_em_voo_mb=None, prazo_arquivo_s=None):
+        self.max_workers = max_workers or Config.MAX_WORKERS
+        self.chunk_size = chunk_size or Config.CHUNK_SIZE
+        self.arquivos_por_worker = arquivos_por_worker or Config.ARQUIVOS_POR_WORKER
+        self.cache = cache
+        if limite_memoria_worker_mb is None:
+            limite_memoria_worker_mb = Config.MEMORIA_WORKER_LIMITE_MB
+        if limite_em_voo_mb is None:
+            limite_em_voo_mb = Config.MEMORIA_EM_VOO_MB
+        self.limite_memoria_worker = limite_memoria_worker_mb * 2**20
+        self.admissao = AdmissaoPorBytes(limite_em_voo_mb * 2**20)
+        self.reciclagens = 0
+        self.prazo = Config.PRAZO_ARQUIVO_S if prazo_arquivo_s is None else prazo_arquivo_s
+        self.limite_lenta_bytes = Config.FAIXA_LENTA_MB * 2**20
+        self.faixa_lenta = FaixaLenta(Config.FAIXA_LENTA_PROCESSOS, self.prazo, Config.PRAZO_MARGEM_S)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _obter_executor(self):
+        """Pool compartilhado por todas as chamadas; um worker lê no máximo arquivos_por_worker arquivos"""
+        with self._lock:
+            if self._executor is None:
+                kwargs = {'max_workers': self.max_workers, 'mp_context': _contexto_multiprocessing(),
+                          'initializer': configurar_log, 'initargs': (Config.NIVEL_LOG,)}
+                # max_tasks_per_child conta lotes, não arquivos: calculado para lotes cheios
+                # (chunk_size), o worker nunca passa de arquivos_por_worker; com lotes menores é
+                # reciclado antes, e o limite de memória (_verificar_memoria) cobre o resto
+                if sys.version_info >= (3, 11):
+                    kwargs['max_tasks_per_child'] = max(1, self.arquivos_por_worker // self.chunk_size)
+                self._executor = ProcessPoolExecutor(**kwargs)
+            return self._executor
+    
+    def _descartar_executor(self, executor):
+        """Troca o pool (o próximo lote cria outro). Retorna False se ele já foi trocado."""
+        with self._lock:
+            # Vários lotes do mesmo pool podem pedir a troca: só o primeiro recria
+            if self._executor is not executor:
+                return False
+            self._executor = None
+            self.reciclagens += 1
+        # Sem cancelar: os lotes já enviados terminam e os workers antigos saem
+        executor.shutdown(wait=False)
+        return True
+    
+    def _verificar_memoria(self, executor, rss):
+        """Recria o pool se um worker terminou um lote acima do limite de memória"""
+        if not self.limite_memoria_worker or rss <= self.limite_memoria_worker:
+            return
+        if self._descartar_executor(executor):
+            logger.info("Worker com %.0f MiB (limite %.0f MiB): recriando o pool de processos",
+                        rss / 2**20, self.limite_memoria_worker / 2**20)
+    
+    def _pesado(self, origem):
+        """PDF que vai direto para a faixa lenta (tamanho ou páginas acima dos limites)"""
+        tamanho = tamanho_pdf(origem)
+        if tamanho > self.limite_lenta_bytes:
+            return True
+        if isinstance(origem, MembroZip) and origem.compressao != zipfile.ZIP_STORED:
+            # Contar as páginas exigiria descompactar o membro no processo web
+            return False
+        return estimar_paginas(origem) > Config.FAIXA_LENTA_PAGINAS
+    
+    def _tamanho_lote(self, total):
+        """Lotes menores em envios pequenos para ocupar todos os workers"""
+        if total is None:
+            # Fluxo contínuo (upload em andamento): cada arquivo segue assim que chega
+            return 1
+        return max(1, min(self.chunk_size, math.ceil(total / self.max_workers)))
+    
+    def processar(self, arquivos, tempos=None, em_blocos=False):
+        """Processa um iterável de (file_path, bytes ou MembroZip do PDF, filename, temp_dir[, exportar_fotos[, sha256]]).
+        
+        Gera (args, dados) por arquivo na ordem de conclusão, com os args recebidos
+        (nomes de arquivo podem se repetir no lote). O iterável é
+        consumido aos poucos, então os lotes são enviados assim que ficam
+        completos e no máximo 2 lotes por worker ficam pendentes. Um lote só
+        é enviado quando os PDFs cabem no orçamento de bytes em voo (self.admissao);
+        enquanto espera, os resultados já prontos continuam sendo gerados. Acertos
+        do cache são gerados imediatamente, sem passar pelos workers (com o
+        sha256 já calculado, a chave do cache não relê o PDF); arquivos
+        com exportar_fotos sempre vão aos workers, que gravam as fotos em disco.
+        PDFs pesados vão, um a um, para a faixa lenta, assim como os arquivos de
+        um lote cujo worker morreu (o que estourou o prazo volta como erro e os
+        demais são lidos de novo). Fechar o gerador cancela os lotes ainda na
+        fila e encerra os processos da faixa lenta deste processamento.
+        Os tempos dos workers também são somados em tempos (Metricas do lote), se dado.
+        
+        Com em_blocos, arquivos gera listas de args (o que já chegou, como a fila
+        de extração do PipelineLote): cada bloco é dividido em lotes de até
+        chunk_size como uma lista, e o lote incompleto do fim do bloco segue sem
+        esperar o próximo. Quando os workers estão ocupados os arquivos se
+        acumulam e os blocos crescem; num upload lento cada arquivo segue sozinho.
+        """
+        blocos = arquivos if em_blocos else [arquivos]
+        limite_pendentes = self.max_workers * 2
+        pendentes = {}  # future -> (executor ou faixa lenta, lote)
+        lote = []  # pares (args, chave do cache ou None)
+        cancelado = threading.Event()
+        
+        def enviar(lote_atual, lenta=False):
+            tamanho = sum(tamanho_pdf(args[0]) for args, _ in lote_atual)
+            while not self.admissao.tentar(tamanho):
+                # Orçamento esgotado: espera algum lote (deste ou de outro processamento) terminar
+                if pendentes:
+                    yield from coletar(bloquear=True)
+                else:
+                    self.admissao.esperar(0.1)
+            try:
+                if lenta:
+                    executor = self.faixa_lenta
+                    future = executor.submit(lote_atual[0][0], cancelado)
+                else:
+                    executor = self._obter_executor()
+                    future = executor.submit(processar_lote, [args for args, _ in lote_atual],
+                                             self.prazo, Config.PRAZO_MARGEM_S)
+            except BaseException:
+                self.admissao.liberar(tamanho)
+                raise
+            # Liberado ao terminar, mesmo que o resultado nunca seja coletado (cancelamento)
+            future.add_done_callback(lambda _: self.admissao.liberar(tamanho))
+            pendentes[future] = (executor, lote_atual)
+        
+        def coletar(bloquear):
+            if not pendentes:
+                return
+            concluidos, _ = wait(list(pendentes), timeout=None if bloquear else 0,
+                                 return_when=FIRST_COMPLETED)
+            # Todos retirados antes de gerar qualquer resultado: o reenvio à faixa lenta
+            # pode esperar o orçamento e coletar de novo, sem ver os futures desta rodada
+            prontos = [(future, *pendentes.pop(future)) for future in concluidos]
+            reenviar = []
+            for future, executor, lote_concluido in prontos:
+                try:
+                    registros, medicoes, rss = future.result()
+                except Exception as e:
+                    if executor is self.faixa_lenta:
+                        args = lote_concluido[0][0]
+                        logger.error("Erro ao processar %s na faixa lenta: %s", args[1], e)
+                        yield args, registro_erro(args[1])
+                        continue
+                    # Worker morreu (prazo estourado em código C, falta de memória): o pool é
+                    # trocado e cada arquivo do lote é lido de novo, isolado, na faixa lenta
+                    if isinstance(e, BrokenProcessPool):
+                        self._descartar_executor(executor)
+                    logger.error("Erro no lote de %d arquivo(s), reenviados à faixa lenta: %s",
+                                 len(lote_concluido), e)
+                    reenviar.extend(lote_concluido)
+                    continue
+                
+                METRICAS.mesclar(medicoes)
+                if tempos is not None:
+                    tempos.mesclar(medicoes)
+                self._verificar_memoria(executor, rss)
+                for (args, chave), registro in zip(lote_concluido, registros):
+                    dados = registro_para_dict(registro)
+                    if chave is not None:
+                        self.cache.gravar(chave, dados)
+                    yield args, dados
+            
+            for item in reenviar:
+                yield from enviar([item], lenta=True)
+        
+        try:
+            for bloco in blocos:
+                tamanho_lote = self._tamanho_lote(len(bloco) if hasattr(bloco, '__len__') else None)
+                for args in bloco:
+                    chave = None
+                    exportar_fotos = len(args) > 3 and args[3]
+                    if self.cache is not None:
+                        try:
+                            chave = chave_arquivo(args[0], 'completo' if exportar_fotos else None,
+                                                  args[4] if len(args) > 4 else None)
+                        except OSError:
+                            chave = None
+                        if chave is not None and not exportar_fotos:
+                            dados = self.cache.obter(chave)
+                            if dados is not None:
+                                dados['Nome_Arquivo'] = args[1]
+                                yield args, dados
+                                continue
+                    
+                    if self._pesado(args[0]):
+                        yield from enviar([(args, chave)], lenta=True)
+                        yield from coletar(bloquear=len(pendentes) >= limite_pendentes)
+                        continue
+                    
+                    lote.append((args, chave))
+                    if len(lote) >= tamanho_lote:
+                        yield from enviar(lote)
+                        lote = []
+                        yield from coletar(bloquear=len(pendentes) >= limite_pendentes)
+                
+                if lote:
+                    # Fim do que estava disponível: o lote incompleto segue sem esperar mais arquivos
+                    yield from enviar(lote)
+                    lote = []
+                    yield from coletar(bloquear=len(pendentes) >= limite_pendentes)
+            
+            while pendentes:
+                yield from coletar(bloquear=True)
+        finally:
+            # Fim normal ou gerador fechado: nada mais deste processamento fica rodando
+            cancelado.set()
+            for future in pendentes:
+                future.cancel()
+    
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+        self.faixa_lenta.encerrar()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.encerrar()
+
+
+_motor_padrao = None
+_motor_lock = threading.Lock()
+
+
+def obter_motor():
+    """Motor compartilhado pelo processo web (os workers sobrevivem entre requisições)"""
+    global _motor_padrao
+    with _motor_lock:
+        if _motor_padrao is None:
+            _motor_padrao = MotorExtracao(cache=obter_cache())
+            atexit.register(_motor_padrao.encerrar)
+        return _motor_padrao
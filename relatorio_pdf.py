@@ -0,0 +1,287 @@
+"""Relatório em PDF montado de forma incremental.
+
+Os registros chegam um a um (ver saidas.py) e as linhas da tabela são
+desenhadas em blocos enquanto a extração ainda está em andamento, com os
+totais acumulados na mesma passagem. Assim os quadros de resumo do final
+não precisam percorrer a lista de novo. O cabeçalho depende do lote inteiro
+(período e total de arquivos), então o espaço dele é reservado na primeira
+página e preenchido em concluir(). O arquivo é gravado direto no destino.
+O fpdf2 (e o fontTools que ele carrega) só é importado ao criar um relatório.
+"""
+import logging
+import os
+from datetime import datetime
+from extracao import extrair_nome_completo_agente
+from pontuacao import TABELA_PONTUACAO, pontuar
+
+logger = logging.getLogger(__name__)
+
+LOGO = "10.png"
+SUPERVISAO = "SBXD"  # Valor padrão
+
+# Tabela completa - CORREÇÃO: larguras para mostrar os 13 dígitos do RF
+COLUNAS = ['RF', 'RF Principal', 'Data ART', 'Data Rel Ant', 'Regularização', 'Data', 'Ações', 'Ofícios', 'Resposta', 'Protocolos', 'Fotos', 'Pontuação']
+LARGURAS = [20, 20, 16, 20, 22, 18, 10, 13, 15, 17, 11, 16]
+
+LINHAS_CABECALHO = 5  # Agente, Supervisão, Período, Gerado em, Total de arquivos
+ALTURA_LINHA_CABECALHO = 10
+
+TAMANHO_BLOCO = 50
+
+
+class RelatorioPDF:
+    """Recebe registros com adicionar() e grava o relatório com concluir(caminho)"""
+
+    def __init__(self, tamanho_bloco=TAMANHO_BLOCO):
+        self.tamanho_bloco = tamanho_bloco
+        self._pendentes = []
+
+        # Totais acumulados (apenas registros válidos)
+        self.total_arquivos = 0
+        self.total_fotos_sim = 0
+        self.total_fotos_nao = 0
+        self.pontuacao_sim = 0
+        self.pontuacao_nao = 0
+        self.total_regularizacoes = 0
+        self.total_pontuacao = 0
+        self.agente_nome_completo = None
+        self._primeira_data = None
+        self._ultima_data = None
+        self._complementares = []  # (RF, texto) só dos registros que têm informações
+
+        from fpdf import FPDF
+
+        self.pdf = FPDF()
+        self.pdf.add_page()
+        self.pdf.set_auto_page_break(auto=True, margin=15)
+        self._iniciar()
+
+    def _iniciar(self):
+        pdf = self.pdf
+
+        # CORREÇÃO: Adicionar logo centralizado no cabeçalho
+        try:
+            if os.path.exists(LOGO):
+                # Centralizar o logo (largura da página é 210mm, logo com 110mm)
+                pdf.image(LOGO, x=50, y=10, w=110)
+                pdf.ln(40)  # Espaço após o logo
+        except Exception as e:
+            logger.warning("Erro ao carregar logo: %s", e)
+
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(0, 10, 'RELATÓRIO CREA-RJ - PONTUAÇÃO', 0, 1, 'C')
+
+        # Espaço do cabeçalho, preenchido em concluir()
+        self._y_cabecalho = pdf.get_y()
+        pdf.ln(LINHAS_CABECALHO * ALTURA_LINHA_CABECALHO + 10)
+
+        pdf.set_font('Arial', 'B', 8)
+        for coluna, largura in zip(COLUNAS, LARGURAS):
+            pdf.cell(largura, 8, coluna, 1, 0, 'C')
+        pdf.ln()
+        pdf.set_font('Arial', '', 7)
+
+    def adicionar(self, dados):
+        """Enfileira um registro; as linhas são desenhadas a cada bloco completo"""
+        if dados.get('RF') == 'ERRO':
+            return
+        self._pendentes.append(dados)
+        if len(self._pendentes) >= self.tamanho_bloco:
+            self._desenhar_bloco()
+
+    def _desenhar_bloco(self):
+        bloco, self._pendentes = self._pendentes, []
+        if not bloco:
+            return
+        if any('Pontuacao' not in dados for dados in bloco):
+            pontuar(bloco)
+
+        for dados in bloco:
+            self._desenhar_linha(dados)
+            self._acumular(dados)
+
+    def _desenhar_linha(self, dados):
+        pdf = self.pdf
+        tem_protocolo = 1 if dados.get('Protocolo') and str(dados['Protocolo']).strip() else 0
+
+        # CORREÇÃO ESPECÍFICA: Exibir as datas exatamente como foram extraídas do PDF
+        data_art = dados.get('Data_ART', '') or ''
+        data_rel_ant = dados.get('Data_Relatorio_Anterior', '') or ''
+        data_relatorio = dados.get('Data', '') or ''
+
+        # CORREÇÃO: Mostrar RF e RF Principal completos (13 dígitos)
+        pdf.cell(LARGURAS[0], 6, str(dados.get('RF', ''))[:15], 1, 0, 'C')
+        pdf.cell(LARGURAS[1], 6, str(dados.get('RF_Principal', ''))[:15], 1, 0, 'C')
+        pdf.cell(LARGURAS[2], 6, data_art[:10], 1, 0, 'C')
+        pdf.cell(LARGURAS[3], 6, data_rel_ant[:10], 1, 0, 'C')
+        pdf.cell(LARGURAS[4], 6, dados.get('Regularizacao', 'NÃO'), 1, 0, 'C')
+        pdf.cell(LARGURAS[5], 6, data_relatorio[:10], 1, 0, 'C')
+        pdf.cell(LARGURAS[6], 6, str(dados.get('Acoes', 0)), 1, 0, 'C')
+        pdf.cell(LARGURAS[7], 6, str(dados.get('Oficio', 0)), 1, 0, 'C')
+        pdf.cell(LARGURAS[8], 6, str(dados.get('Resposta_Oficio', 0)), 1, 0, 'C')
+        pdf.cell(LARGURAS[9], 6, str(tem_protocolo), 1, 0, 'C')
+        pdf.cell(LARGURAS[10], 6, dados.get('Status_Fotos', 'NÃO'), 1, 0, 'C')
+        pdf.cell(LARGURAS[11], 6, f"{dados['Pontuacao']:.2f}", 1, 0, 'C')
+        pdf.ln()
+
+    def _acumular(self, dados):
+        pontuacao = dados['Pontuacao']
+        status_fotos = dados.get('Status_Fotos', 'NÃO')
+
+        self.total_arquivos += 1
+        self.total_pontuacao += pontuacao
+        if dados.get('Regularizacao', 'NÃO') == 'SIM':
+            self.total_regularizacoes += 1
+        if status_fotos == 'SIM':
+            self.total_fotos_sim += 1
+            self.pontuacao_sim += pontuacao
+        else:
+            self.total_fotos_nao += 1
+            if status_fotos == 'NÃO':
+                self.pontuacao_nao += pontuacao
+
+        # Nome completo do agente (do primeiro registro válido)
+        if self.agente_nome_completo is None:
+            if dados.get('Fiscal_Nome_Completo'):
+                self.agente_nome_completo = dados['Fiscal_Nome_Completo']
+            elif dados.get('Fiscal'):
+                self.agente_nome_completo = extrair_nome_completo_agente(dados['Fiscal'])
+            else:
+                self.agente_nome_completo = ""
+
+        if dados.get('Data'):
+            try:
+                data = datetime.strptime(dados['Data'], '%d/%m/%Y')
+                if self._primeira_data is None or data < self._primeira_data:
+                    self._primeira_data = data
+                if self._ultima_data is None or data > self._ultima_data:
+                    self._ultima_data = data
+            except ValueError:
+                pass
+
+        informacoes = dados.get('Informacoes_Complementares')
+        if dados.get('RF') and str(dados['RF']).strip() and informacoes and str(informacoes).strip():
+            self._complementares.append((str(dados['RF']), str(informacoes)))
+
+    def _desenhar_cabecalho(self):
+        """Preenche o espaço reservado na primeira página e volta à posição atual"""
+        pdf = self.pdf
+        pagina, x, y = pdf.page, pdf.get_x(), pdf.get_y()
+        pdf.page = 1
+        pdf.set_xy(pdf.l_margin, self._y_cabecalho)
+        pdf.set_font('Arial', '', 12)
+
+        pdf.cell(0, 10, f'Agente de Fiscalização: {self.agente_nome_completo or ""}', 0, 1)
+        pdf.cell(0, 10, f'Supervisão: {SUPERVISAO}', 0, 1)
+        if self._primeira_data is not None:
+            pdf.cell(0, 10, f'Período: {self._primeira_data.strftime("%d/%m/%Y")} a {self._ultima_data.strftime("%d/%m/%Y")}', 0, 1)
+        else:
+            pdf.cell(0, 10, 'Período: Não disponível', 0, 1)
+        pdf.cell(0, 10, f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}', 0, 1)
+        pdf.cell(0, 10, f'Total de arquivos: {self.total_arquivos}', 0, 1)
+
+        pdf.page = pagina
+        pdf.set_xy(x, y)
+
+    def _desenhar_resumos(self):
+        pdf = self.pdf
+
+        # Rodapé com totais
+        pdf.set_font('Arial', 'B', 8)
+        pdf.cell(sum(LARGURAS[:-1]), 6, "TOTAIS", 1, 0, 'R')
+        pdf.cell(LARGURAS[11], 6, f"{self.total_pontuacao:.2f}", 1, 0, 'C')
+        pdf.ln()
+
+        # INFORMAÇÕES COMPLEMENTARES
+        pdf.ln(10)
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'INFORMAÇÕES COMPLEMENTARES', 0, 1, 'C')
+        pdf.ln(5)
+
+        for rf, informacoes in self._complementares:
+            pdf.set_font('Arial', 'B', 12)
+            pdf.cell(30, 10, 'RF:', 0, 0)
+            pdf.set_font('Arial', '', 12)
+            pdf.cell(0, 10, rf, 0, 1)
+            pdf.multi_cell(0, 8, informacoes)
+            pdf.ln(5)
+
+        if not self._complementares:
+            pdf.set_font('Arial', '', 12)
+            pdf.cell(0, 10, 'Nenhuma informação complementar disponível.', 0, 1, 'C')
+
+        # RESUMO DE PONTUAÇÃO POR STATUS DE FOTOS
+        pdf.ln(10)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'RESUMO DE PONTUAÇÃO POR STATUS DE FOTOS', 0, 1, 'C')
+        pdf.ln(5)
+
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(60, 8, 'Status Fotos', 1, 0, 'C')
+        pdf.cell(60, 8, 'Quantidade', 1, 0, 'C')
+        pdf.cell(60, 8, 'Pontuação Total', 1, 1, 'C')
+
+        pdf.set_font('Arial', '', 10)
+        pdf.cell(60, 8, 'SIM', 1, 0, 'C')
+        pdf.cell(60, 8, str(self.total_fotos_sim), 1, 0, 'C')
+        pdf.cell(60, 8, f"{self.pontuacao_sim:.2f}", 1, 1, 'C')
+
+        pdf.cell(60, 8, 'NÃO', 1, 0, 'C')
+        pdf.cell(60, 8, str(self.total_fotos_nao), 1, 0, 'C')
+        pdf.cell(60, 8, f"{self.pontuacao_nao:.2f}", 1, 1, 'C')
+
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(60, 8, 'TOTAL', 1, 0, 'C')
+        pdf.cell(60, 8, str(self.total_arquivos), 1, 0, 'C')
+        pdf.cell(60, 8, f"{self.total_pontuacao:.2f}", 1, 1, 'C')
+
+        # RESUMO DE REGULARIZAÇÕES
+        pdf.ln(10)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'RESUMO DE REGULARIZAÇÕES', 0, 1, 'C')
+        pdf.ln(5)
+
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(90, 8, 'Status Regularização', 1, 0, 'C')
+        pdf.cell(90, 8, 'Quantidade', 1, 1, 'C')
+
+        pdf.set_font('Arial', '', 10)
+        pdf.cell(90, 8, 'SIM', 1, 0, 'C')
+        pdf.cell(90, 8, str(self.total_regularizacoes), 1, 1, 'C')
+
+        pdf.cell(90, 8, 'NÃO', 1, 0, 'C')
+        pdf.cell(90, 8, str(self.total_arquivos - self.total_regularizacoes), 1, 1, 'C')
+
+        # TABELA DE PONTUAÇÃO DE REFERÊNCIA
+        pdf.ln(10)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'TABELA DE PONTUAÇÃO - REFERÊNCIA', 0, 1, 'C')
+
+        pdf.set_font('Arial', 'B', 9)
+        pdf.cell(40, 8, 'Item', 1, 0, 'C')
+        pdf.cell(25, 8, 'SIM', 1, 0, 'C')
+        pdf.cell(25, 8, 'NÃO', 1, 1, 'C')
+
+        pdf.set_font('Arial', '', 8)
+        for item, valores in TABELA_PONTUACAO['SIM'].items():
+            pdf.cell(40, 6, item, 1, 0, 'L')
+            pdf.cell(25, 6, str(valores), 1, 0, 'C')
+            pdf.cell(25, 6, str(TABELA_PONTUACAO['NÃO'][item]), 1, 1, 'C')
+
+    def concluir(self, caminho):
+        """Desenha as linhas pendentes, os resumos e o cabeçalho e grava o PDF em caminho"""
+        try:
+            self._desenhar_bloco()
+            self._desenhar_resumos()
+            self._desenhar_cabecalho()
+            self.pdf.output(caminho)
+        except Exception as e:
+            logger.error("Erro ao gerar PDF: %s", e)
+            # Fallback seguro
+            from fpdf import FPDF
+
+            pdf = FPDF()
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 16)
+            pdf.cell(0, 10, 'Erro na geração do relatório', 0, 1, 'C')
+            pdf.output(caminho)
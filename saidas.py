@@ -0,0 +1,72 @@
+"""Arquivos de saída de um lote, alimentados à medida que os registros ficam prontos.
+
+A planilha (planilha.py), o relatório em PDF (relatorio_pdf.py) e, quando
+pedida, a exportação de fotos (exportacao_fotos.py) recebem cada registro
+assim que o motor o devolve, em vez de esperar o fim do lote. A planilha é
+gravada com um nome provisório e só recebe o nome definitivo (com o horário
+de conclusão) em concluir(). Os tempos de gravação do lote ficam em tempos.
+"""
+import logging
+import os
+import uuid
+from config import Config
+from instrumentacao import Metricas, cronometro
+from planilha import EXTENSOES, EscritorPlanilha
+from relatorio_pdf import RelatorioPDF
+
+logger = logging.getLogger(__name__)
+
+
+class SaidasLote:
+    """Planilha, relatório em PDF e exportação de fotos de um lote em andamento"""
+
+    def __init__(self, pasta, formato_planilha=None, exportador=None):
+        self.formato_planilha = formato_planilha or Config.FORMATO_PLANILHA
+        self.extensao = EXTENSOES[self.formato_planilha]
+        self.exportador = exportador
+        self._caminho_parcial = os.path.join(pasta, f".parcial_{uuid.uuid4().hex}.{self.extensao}")
+        self.planilha = EscritorPlanilha(self._caminho_parcial, self.formato_planilha)
+        self.relatorio = RelatorioPDF()
+        self.tempos = Metricas()
+        self._concluida = False
+
+    def adicionar(self, dados, temp_dir=None):
+        """Grava o registro na planilha e no PDF e agenda a exportação das fotos gravadas em temp_dir"""
+        self.planilha.adicionar(dados)
+        self.relatorio.adicionar(dados)
+        if self.exportador is not None and temp_dir is not None:
+            self.exportador.adicionar(temp_dir, dados['Nome_Arquivo'])
+
+    def concluir(self, caminho_planilha, caminho_pdf):
+        """Fecha a planilha em caminho_planilha, grava o PDF em caminho_pdf e conclui o
+        ZIP de fotos. Retorna as estatísticas da exportação de fotos ({} quando não pedida)."""
+        with cronometro('planilha_conclusao', self.tempos):
+            try:
+                self.planilha.fechar()
+                os.replace(self._caminho_parcial, caminho_planilha)
+            except Exception as e:
+                logger.error("Erro ao gerar planilha: %s", e)
+                with EscritorPlanilha(caminho_planilha, self.formato_planilha, colunas=('Erro',)) as erro:
+                    erro.adicionar({'Erro': 'Falha na geração do arquivo'})
+        with cronometro('relatorio_pdf_conclusao', self.tempos):
+            self.relatorio.concluir(caminho_pdf)
+        self._concluida = True
+
+        if self.exportador is None:
+            return {}
+        with cronometro('exportacao_fotos_conclusao', self.tempos):
+            return self.exportador.concluir()
+
+    def cancelar(self):
+        """Descarta as saídas de um lote interrompido (sem efeito depois de concluir)"""
+        if self._concluida:
+            return
+        self._concluida = True
+        try:
+            self.planilha.fechar()
+        except Exception:
+            pass
+        if os.path.exists(self._caminho_parcial):
+            os.remove(self._caminho_parcial)
+        if self.exportador is not None:
+            self.exportador.cancelar()
@@ -13,7 +13,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const forms = document.querySelectorAll('form');
     forms.forEach(form => {
         form.addEventListener('submit', function(e) {
-            handleFormSubmit(this);
+            handleFormSubmit(this, e);
         });
     });
 
@@ -29,10 +29,11 @@ function validateFiles(files) {
     for (let file of files) {
         totalSize += file.size;
         
-        // Verificar se é PDF
-        if (!file.name.toLowerCase().endsWith('.pdf')) {
+        // Verificar se é PDF ou ZIP com PDFs
+        const nome = file.name.toLowerCase();
+        if (!nome.endsWith('.pdf') && !nome.endsWith('.zip')) {
             hasInvalidFiles = true;
-            showToast('Apenas arquivos PDF são permitidos', 'warning');
+            showToast('Apenas arquivos PDF ou ZIP são permitidos', 'warning');
         }
     }
     
@@ -48,7 +49,7 @@ function validateFiles(files) {
     updateFileCounter(files.length, totalSize);
     
     if (hasInvalidFiles) {
-        showToast('Alguns arquivos não são PDFs e serão ignorados', 'warning');
+        showToast('Alguns arquivos não são PDF/ZIP e serão ignorados', 'warning');
     }
 }
 
@@ -68,7 +69,7 @@ function updateFileCounter(fileCount, totalSize) {
 }
 
 // FUNÇÃO 3: Manipular envio de formulário
-function handleFormSubmit(form) {
+function handleFormSubmit(form, event) {
     const submitBtn = form.querySelector('button[type="submit"]');
     const files = document.getElementById('pdfFiles')?.files;
     
@@ -77,10 +78,29 @@ function handleFormSubmit(form) {
         submitBtn.disabled = true;
         submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Processando...';
         
-        // Mostrar modal de progresso para uploads grandes
-        if (files.length > 10) {
-            showProgressModal(files.length);
+        // Sem fetch/FormData o formulário segue pelo envio tradicional (/processar)
+        if (!window.fetch || !window.FormData) {
+            return;
         }
+        
+        // Envio assíncrono: o servidor devolve o id da tarefa e o progresso é consultado
+        event.preventDefault();
+        showProgressModal(files.length);
+        
+        fetch('/tarefas', { method: 'POST', body: new FormData(form) })
+            .then(response => response.json().then(corpo => ({ ok: response.ok, corpo })))
+            .then(({ ok, corpo }) => {
+                if (!ok) {
+                    throw new Error(corpo.erro || 'Falha no envio dos arquivos');
+                }
+                pollJobStatus(corpo.url_status, corpo.url_resultado);
+            })
+            .catch(error => {
+                hideProgressModal();
+                showToast(error.message, 'danger');
+                submitBtn.disabled = false;
+                submitBtn.innerHTML = '🚀 Processar Arquivos';
+            });
     }
 }
 
@@ -117,35 +137,78 @@ function showProgressModal(totalFiles) {
         document.body.appendChild(modal);
     }
     
-    const bsModal = new bootstrap.Modal(modal);
+    const bsModal = bootstrap.Modal.getOrCreateInstance(modal);
     bsModal.show();
     
-    // Simular progresso (em uma aplicação real, isso viria do servidor via WebSocket)
-    simulateProgress(totalFiles);
+    document.getElementById('progressText').textContent = `Enviando ${totalFiles} arquivos...`;
+}
+
+// FUNÇÃO 5: Acompanhar a tarefa no servidor até a conclusão
+function pollJobStatus(statusUrl, resultUrl) {
+    const intervalo = 1000;
+    
+    const consultar = () => {
+        fetch(statusUrl)
+            .then(response => response.json())
+            .then(progresso => {
+                if (progresso.erro) {
+                    throw new Error(progresso.erro);
+                }
+                updateProgress(progresso);
+                
+                // Concluída ou com erro: a página de resultado mostra os dados ou a mensagem
+                if (progresso.status === 'concluida' || progresso.status === 'erro') {
+                    window.location.href = resultUrl;
+                } else {
+                    setTimeout(consultar, intervalo);
+                }
+            })
+            .catch(error => {
+                hideProgressModal();
+                showToast(`Erro ao consultar o progresso: ${error.message}`, 'danger');
+            });
+    };
+    
+    consultar();
 }
 
-// FUNÇÃO 5: Simular progresso (para demonstração)
-function simulateProgress(totalFiles) {
+// FUNÇÃO 5.1: Atualizar o modal com o progresso real
+function updateProgress(progresso) {
     const progressBar = document.getElementById('progressBar');
     const progressText = document.getElementById('progressText');
+    const currentFile = document.getElementById('currentFile');
     const progressDetail = document.getElementById('progressDetail');
     
-    let progress = 0;
-    const interval = setInterval(() => {
-        progress += 2;
-        if (progress <= 90) { // Para em 90% - o resto é processamento real
-            progressBar.style.width = progress + '%';
-            progressDetail.textContent = `${progress}% - Processando...`;
-            
-            // Atualizar texto a cada 20%
-            if (progress % 20 === 0) {
-                const filesProcessed = Math.floor((progress / 100) * totalFiles);
-                progressText.textContent = `Processando ${filesProcessed} de ${totalFiles} arquivos`;
-            }
-        } else {
-            clearInterval(interval);
-        }
-    }, 500);
+    progressBar.style.width = progresso.percentual + '%';
+    
+    if (progresso.status === 'gerando_relatorios') {
+        progressText.textContent = 'Gerando relatórios Excel e PDF...';
+    } else if (progresso.status === 'fila') {
+        progressText.textContent = 'Aguardando na fila de processamento...';
+    } else {
+        progressText.textContent = `Processando ${progresso.processados} de ${progresso.total} arquivos`;
+    }
+    
+    currentFile.textContent = progresso.falhas > 0
+        ? `${progresso.concluidos} concluído(s), ${progresso.falhas} com erro`
+        : `${progresso.concluidos} concluído(s)`;
+    
+    let detalhe = `${progresso.percentual}% concluído`;
+    if (progresso.vazao > 0) {
+        detalhe += ` - ${progresso.vazao} arquivo(s)/s`;
+    }
+    if (progresso.eta_segundos !== null) {
+        detalhe += ` - restam ~${formatDuration(progresso.eta_segundos)}`;
+    }
+    progressDetail.textContent = detalhe;
+}
+
+// FUNÇÃO 5.2: Fechar o modal de progresso
+function hideProgressModal() {
+    const modal = document.getElementById('progressModal');
+    if (modal) {
+        bootstrap.Modal.getOrCreateInstance(modal).hide();
+    }
 }
 
 // FUNÇÃO 6: Inicializar auto-dismiss de alertas
@@ -170,6 +233,14 @@ function formatFileSize(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
+// FUNÇÃO 7.1: Utilidade - Formatar duração em segundos
+function formatDuration(segundos) {
+    const total = Math.round(segundos);
+    const minutos = Math.floor(total / 60);
+    const resto = total % 60;
+    return minutos > 0 ? `${minutos}min ${resto}s` : `${resto}s`;
+}
+
 // FUNÇÃO 8: Mostrar notificação toast
 function showToast(message, type = 'info') {
     // Criar container de toasts se não existir
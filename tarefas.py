@@ -0,0 +1,203 @@
+"""Tarefas assíncronas de processamento.
+
+O envio de um lote cria uma Tarefa e devolve o controle imediatamente; uma
+thread de fundo alimenta o motor de extração (processamento.py), atualiza o
+progresso arquivo a arquivo e, ao final, chama a função de finalização que
+gera Excel e PDF. As tarefas ficam em memória do processo web e são
+descartadas Config.TAREFAS_RETENCAO segundos após terminarem.
+
+A tarefa começa antes do fim do upload: submeter_continuo devolve uma
+EntradaContinua que a requisição alimenta à medida que os PDFs chegam.
+"""
+import logging
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from pipeline import PipelineLote
+
+logger = logging.getLogger(__name__)
+
+FILA = 'fila'
+PROCESSANDO = 'processando'
+GERANDO_RELATORIOS = 'gerando_relatorios'
+CONCLUIDA = 'concluida'
+ERRO = 'erro'
+
+
+class Tarefa:
+    """Estado e progresso de um lote enviado"""
+    
+    def __init__(self, total):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.concluidos = 0
+        self.falhas = 0
+        self.status = FILA
+        self.mensagem = ''
+        self.resultado = None
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.finalizada_em = None
+        self.recebendo = False
+        self.cancelada = False
+        self.pipeline = None
+        self._lock = threading.Lock()
+    
+    def adicionar_arquivo(self):
+        with self._lock:
+            self.total += 1
+    
+    def registrar(self, dados):
+        with self._lock:
+            if dados.get('RF') == 'ERRO':
+                self.falhas += 1
+            else:
+                self.concluidos += 1
+    
+    def progresso(self):
+        """Resumo serializável em JSON (arquivos, vazão em arquivos/s e ETA em segundos)"""
+        with self._lock:
+            processados = self.concluidos + self.falhas
+            fim = self.finalizada_em or time.time()
+            decorrido = fim - self.iniciada_em if self.iniciada_em else 0.0
+            vazao = processados / decorrido if decorrido > 0 else 0.0
+            restantes = self.total - processados
+            # Sem ETA enquanto o upload ainda está chegando (total desconhecido)
+            eta = restantes / vazao if vazao > 0 and self.status == PROCESSANDO and not self.recebendo else None
+            progresso = {
+                'id': self.id,
+                'status': self.status,
+                'recebendo': self.recebendo,
+                'mensagem': self.mensagem,
+                'total': self.total,
+                'concluidos': self.concluidos,
+                'falhas': self.falhas,
+                'processados': processados,
+                'percentual': round(100 * processados / self.total, 1) if self.total else 100.0,
+                'vazao': round(vazao, 2),
+                'eta_segundos': round(eta, 1) if eta is not None else None,
+                'decorrido_segundos': round(decorrido, 1)
+            }
+        # Ocupação das filas entre os estágios (a fila cheia indica o gargalo) e tempo por etapa
+        if self.pipeline is not None:
+            progresso['pipeline'] = self.pipeline.profundidades()
+            progresso['tempos'] = self.pipeline.tempos.resumo()
+        return progresso
+
+
+class EntradaContinua:
+    """Arquivos de uma tarefa que ainda estão chegando pelo upload"""
+    
+    def __init__(self, tarefa):
+        self._tarefa = tarefa
+        self._fila = queue.Queue()
+    
+    def adicionar(self, args):
+        self._tarefa.adicionar_arquivo()
+        self._fila.put(args)
+    
+    def fechar(self):
+        """Sinaliza o fim do upload (sempre chamar, inclusive em caso de erro)"""
+        self._tarefa.recebendo = False
+        self._fila.put(None)
+    
+    def __iter__(self):
+        while True:
+            args = self._fila.get()
+            if args is None:
+                return
+            yield args
+
+
+class GerenciadorTarefas:
+    """Executa tarefas em threads de fundo; a extração em si roda no pool de processos"""
+    
+    def __init__(self, finalizar, max_simultaneas=None, retencao=None):
+        self._finalizar = finalizar
+        self._retencao = retencao or Config.TAREFAS_RETENCAO
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_simultaneas or Config.TAREFAS_SIMULTANEAS,
+            thread_name_prefix='tarefa'
+        )
+        self._tarefas = {}
+        self._lock = threading.Lock()
+    
+    def submeter_continuo(self, temp_dir, saidas=None, lote=None):
+        """Agenda uma tarefa cujos arquivos ainda vão chegar. Retorna (tarefa, entrada);
+        a entrada deve ser alimentada com adicionar() e encerrada com fechar().
+        O diretório temporário é removido pela tarefa ao terminar. As saídas
+        (SaidasLote) recebem cada registro assim que fica pronto; com lote (id de
+        um lote existente no banco) os arquivos são acrescentados a ele e as
+        saídas são refeitas com todos os registros do lote."""
+        self._limpar_expiradas()
+        tarefa = Tarefa(0)
+        tarefa.recebendo = True
+        entrada = EntradaContinua(tarefa)
+        with self._lock:
+            self._tarefas[tarefa.id] = tarefa
+        self._executor.submit(self._executar, tarefa, entrada, temp_dir, saidas, lote)
+        return tarefa, entrada
+    
+    def obter(self, tarefa_id):
+        with self._lock:
+            return self._tarefas.get(tarefa_id)
+    
+    def descartar(self, tarefa):
+        """Cancela uma tarefa (ex.: upload sem nenhum PDF válido): ela sai do registro e
+        termina sem gerar saídas nem mexer no lote"""
+        tarefa.cancelada = True
+        with self._lock:
+            self._tarefas.pop(tarefa.id, None)
+    
+    def _executar(self, tarefa, arquivos, temp_dir, saidas=None, lote=None):
+        tarefa.iniciada_em = time.time()
+        tarefa.status = PROCESSANDO
+        todos_dados = []
+        try:
+            # Extração, pontuação e gravação das saídas correm em paralelo (pipeline.py);
+            # num acréscimo as saídas só são montadas no fim, com o lote inteiro
+            tarefa.pipeline = PipelineLote(None if lote else saidas, temp_dir, lote=lote or tarefa.id)
+            for dados in tarefa.pipeline.executar(arquivos):
+                todos_dados.append(dados)
+                tarefa.registrar(dados)
+            if tarefa.cancelada:
+                tarefa.mensagem = 'Tarefa cancelada'
+                tarefa.status = ERRO
+                return
+            
+            tarefa.status = GERANDO_RELATORIOS
+            resultado = self._finalizar(todos_dados, sufixo=f"_{tarefa.id[:8]}", saidas=saidas,
+                                        lote=tarefa.pipeline.lote_consultavel(), acrescimo=bool(lote))
+            if resultado is None:
+                tarefa.mensagem = 'Nenhum dado válido foi extraído dos arquivos'
+                tarefa.status = ERRO
+            else:
+                tarefa.resultado = resultado
+                if lote:
+                    tarefa.mensagem = (f'Lote atualizado! {tarefa.total - tarefa.pipeline.reaproveitados} arquivo(s) '
+                                       f'novo(s), {tarefa.pipeline.reaproveitados} já estavam no lote; '
+                                       f'{resultado["total_arquivos"]} RFs no lote.')
+                else:
+                    tarefa.mensagem = f'Sucesso! {resultado["total_arquivos"]} de {tarefa.total} arquivos processados.'
+                tarefa.status = CONCLUIDA
+            logger.info("Tempos da tarefa %s: %s", tarefa.id, tarefa.pipeline.tempos.resumo())
+        except Exception as e:
+            logger.error("Erro na tarefa %s: %s", tarefa.id, e)
+            tarefa.mensagem = f'Erro durante o processamento: {str(e)}'
+            tarefa.status = ERRO
+        finally:
+            if saidas is not None:
+                saidas.cancelar()  # Sem efeito se finalizar já concluiu as saídas
+            tarefa.finalizada_em = time.time()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _limpar_expiradas(self):
+        limite = time.time() - self._retencao
+        with self._lock:
+            for tarefa_id in [t.id for t in self._tarefas.values()
+                              if t.finalizada_em and t.finalizada_em < limite]:
+                del self._tarefas[tarefa_id]
@@ -0,0 +1,22 @@
+"""Backends de leitura das páginas: o 'pdfminer' (padrão) reproduz o 'pdfplumber'."""
+import pytest
+
+from benchmarks.sintetico import gerar_lote
+from extracao import extrair_dados_texto, ler_pdf_passagem_unica
+
+
+@pytest.fixture(scope='module')
+def relatorios(tmp_path_factory):
+    return gerar_lote(str(tmp_path_factory.mktemp('relatorios')), 12, variado=True, semente=17)
+
+
+@pytest.mark.parametrize('modo_texto', ['dirigido', 'completo'])
+def test_backends_extraem_os_mesmos_campos(relatorios, tmp_path, modo_texto):
+    for caminho in relatorios:
+        resultados = {}
+        for backend in ('pdfplumber', 'pdfminer'):
+            texto, fotos = ler_pdf_passagem_unica(caminho, str(tmp_path), 'rf.pdf', modo_texto=modo_texto,
+                                                  backend_texto=backend)
+            resultados[backend] = (texto, fotos, extrair_dados_texto(texto, 'rf.pdf'))
+
+        assert resultados['pdfminer'] == resultados['pdfplumber'], caminho
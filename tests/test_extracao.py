@@ -0,0 +1,15 @@
+"""Extração: contagem de fotos pelos metadados contra a gravação das fotos."""
+import pytest
+
+from benchmarks.sintetico import gerar_relatorio
+from extracao import ler_pdf_passagem_unica
+
+
+@pytest.mark.parametrize('fotos', [0, 1, 3, 5])
+def test_contagem_igual_ao_modo_completo(tmp_path, fotos):
+    caminho = gerar_relatorio(str(tmp_path / 'rf.pdf'), numero=fotos + 1, paginas_extras=1, fotos=fotos)
+
+    _, contagem = ler_pdf_passagem_unica(caminho, str(tmp_path), 'rf.pdf', modo_fotos='contagem')
+    _, completo = ler_pdf_passagem_unica(caminho, str(tmp_path), 'rf.pdf', modo_fotos='completo')
+
+    assert contagem == completo == fotos
@@ -0,0 +1,120 @@
+"""Motor de extração: reciclagem dos workers, coleta dos lotes e escolha da faixa lenta."""
+import sys
+import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from benchmarks.sintetico import gerar_relatorio
+from config import Config
+from fontes_pdf import MembroZip
+from processamento import MotorExtracao, dict_para_registro
+
+
+@pytest.fixture
+def motor():
+    motor = MotorExtracao(max_workers=2, chunk_size=10, arquivos_por_worker=100)
+    yield motor
+    motor.encerrar()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='max_tasks_per_child requer Python 3.11')
+def test_pool_unico_reciclado_por_lotes_cheios(motor):
+    # Um só pool para todas as chamadas; com lotes de chunk_size, 100 arquivos por worker
+    executor = motor._obter_executor()
+    assert motor._obter_executor() is executor
+    assert executor._max_tasks_per_child == 10
+
+
+class ExecutorFalso:
+    """Pool que não roda nada: ao receber o segundo lote, os dois falham juntos"""
+
+    def __init__(self, admissao):
+        self.admissao = admissao
+        self.futures = []
+
+    def submit(self, funcao, lote, *args):
+        self.futures.append(Future())
+        if len(self.futures) == 2:
+            for future in self.futures:
+                future.set_exception(BrokenProcessPool('worker morto'))
+            # O reenvio à faixa lenta vai esperar o orçamento (e coletar de novo)
+            self.admissao.recusar = True
+        return self.futures[-1]
+
+
+class FaixaLentaFalsa:
+    def submit(self, args, cancelado):
+        future = Future()
+        future.set_result(([dict_para_registro({'RF': args[1], 'Nome_Arquivo': args[1]})], {}, 0))
+        return future
+
+
+class AdmissaoFalsa:
+    recusar = False
+
+    def tentar(self, tamanho):
+        recusar, self.recusar = self.recusar, False
+        return not recusar
+
+    def liberar(self, tamanho):
+        pass
+
+    def esperar(self, timeout):
+        pass
+
+
+def test_lotes_falhos_reenviados_uma_vez_a_faixa_lenta(motor, monkeypatch):
+    monkeypatch.setattr(motor, 'chunk_size', 1)
+    monkeypatch.setattr(motor, 'admissao', AdmissaoFalsa())
+    monkeypatch.setattr(motor, 'faixa_lenta', FaixaLentaFalsa())
+    executor = ExecutorFalso(motor.admissao)
+    monkeypatch.setattr(motor, '_obter_executor', lambda: executor)
+
+    arquivos = [(b'%PDF-1.4 ' * 10, nome, '/tmp') for nome in ('a.pdf', 'b.pdf')]
+    resultados = [dados['Nome_Arquivo'] for _, dados in motor.processar(arquivos)]
+
+    assert sorted(resultados) == ['a.pdf', 'b.pdf']
+
+
+def test_paginas_nao_estimadas_em_membro_comprimido(motor, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'FAIXA_LENTA_PAGINAS', 2)
+    caminho = gerar_relatorio(str(tmp_path / 'rf.pdf'), paginas_extras=3, fotos=0)
+    membros = {}
+    for nome, compressao in (('armazenado', zipfile.ZIP_STORED), ('comprimido', zipfile.ZIP_DEFLATED)):
+        caminho_zip = str(tmp_path / f'{nome}.zip')
+        with zipfile.ZipFile(caminho_zip, 'w', compressao) as arquivo_zip:
+            arquivo_zip.write(caminho, 'rf.pdf')
+        with zipfile.ZipFile(caminho_zip) as arquivo_zip:
+            membros[nome] = MembroZip.de_info(caminho_zip, arquivo_zip.getinfo('rf.pdf'))
+
+    assert motor._pesado(caminho)
+    assert motor._pesado(membros['armazenado'])
+    assert not motor._pesado(membros['comprimido'])
+
+
+class ExecutorRegistrador:
+    """Pool que responde na hora e guarda o tamanho de cada lote recebido"""
+
+    def __init__(self):
+        self.tamanhos = []
+
+    def submit(self, funcao, lote, *args):
+        self.tamanhos.append(len(lote))
+        future = Future()
+        future.set_result(([dict_para_registro({'RF': nome, 'Nome_Arquivo': nome}) for _, nome, _ in lote], {}, 0))
+        return future
+
+
+def test_blocos_divididos_em_lotes(motor, monkeypatch):
+    executor = ExecutorRegistrador()
+    monkeypatch.setattr(motor, '_obter_executor', lambda: executor)
+    monkeypatch.setattr(motor, '_pesado', lambda origem: False)
+
+    blocos = [[(b'%PDF', f'{i}.pdf', '/tmp') for i in range(quantidade)] for quantidade in (40, 3, 1)]
+    resultados = list(motor.processar(blocos, em_blocos=True))
+
+    assert len(resultados) == 44
+    # 40 arquivos em lotes de chunk_size; os 3 seguintes divididos entre os 2 workers
+    assert executor.tamanhos == [10, 10, 10, 10, 2, 1, 1]